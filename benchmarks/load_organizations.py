@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark loading a large organization catalogue for validation.
+
+Compares the previous two-pass loading (slug index, then every validated file
+parsed again) with the single-pass Organization records, and building the
+slug index alone with full parses, with the slug scanner and from a warm
+persistent index, and the single pass on a process pool. Each mode runs in
+a fresh interpreter so peak resident memory (of the main process) is
+measured independently:
+
+    uv run python benchmarks/load_organizations.py --files 10000
+"""
+
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from repository import FileSystemRepository  # noqa: E402
+
+CITIES = ["Warszawa", "Kraków", "Wrocław", "Poznań", "Gdańsk", "Łódź", "Lublin"]
+MODES = (
+    "two-pass",
+    "single-pass",
+    "single-pass-pool",
+    "index-parse",
+    "index-scan",
+    "index-warm",
+)
+
+
+def generate(directory: Path, count: int):
+    """Write `count` organization files resembling the real catalogue."""
+    for i in range(count):
+        city = CITIES[i % len(CITIES)]
+        document = {
+            "nazwa": f"Fundacja Pomocy Zwierzętom nr {i}",
+            "adres": f"fundacja-{i}",
+            "strona": f"https://fundacja-{i}.org.pl",
+            "krs": f"{i:010d}",
+            "nazwa_w_krs": f"FUNDACJA POMOCY ZWIERZĘTOM NR {i}",
+            "dostawa": {
+                "ulica": f"ul. Schroniskowa {i % 200}",
+                "kod": "00-001",
+                "miasto": city,
+                "telefon": "123456789",
+            },
+            "produkty": [
+                {"nazwa": product, "link": f"https://sklep.pl/{product.lower()}"}
+                for product in ("Karma", "Koc", "Żwirek")
+            ],
+        }
+        with open(directory / f"fundacja-{i}.yaml", "w", encoding="utf-8") as f:
+            yaml.safe_dump(document, f, allow_unicode=True)
+
+
+def measure(organizations_dir: str, mode: str, processes: int) -> dict:
+    """Load every file for validation in this process and report the cost."""
+    parses = 0
+    safe_load = yaml.safe_load
+
+    def counting_safe_load(stream):
+        nonlocal parses
+        parses += 1
+        return safe_load(stream)
+
+    yaml.safe_load = counting_safe_load
+    index_dir = tempfile.mkdtemp()
+    # The two-pass baseline is how files were loaded before the scanner, too
+    repository = FileSystemRepository(
+        organizations_dir,
+        scan_slugs=mode not in ("two-pass", "index-parse"),
+        processes=processes if mode == "single-pass-pool" else 1,
+        index_path=f"{index_dir}/slug-index.json" if mode == "index-warm" else None,
+    )
+    files = [str(path) for path in repository.organization_files()]
+    if mode == "index-warm":
+        repository.load_all_organizations("adres")
+        parses = 0
+
+    started = time.perf_counter()
+    if mode == "two-pass":
+        index, errors = repository.load_all_organizations("adres")
+        documents = [repository.load_organization_data(path) for path in files]
+    elif mode.startswith("single-pass"):
+        index, errors, records = repository.load_organizations("adres", files)
+        documents = [record.data for record in records]
+    else:
+        index, errors = repository.load_all_organizations("adres")
+        documents = list(index)
+    elapsed = time.perf_counter() - started
+
+    shutil.rmtree(index_dir)
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        max_rss //= 1024
+    assert not errors and len(documents) == len(index) == len(files)
+    return {
+        "mode": mode,
+        "files": len(files),
+        # Parses made in worker processes are not counted here
+        "parses": parses if mode != "single-pass-pool" else None,
+        "seconds": round(elapsed, 2),
+        "max_rss_mb": round(max_rss / 1024, 1),
+    }
+
+
+@click.command()
+@click.option("--files", "count", default=10000, show_default=True, type=int)
+@click.option(
+    "--organizations-dir",
+    default=None,
+    type=click.Path(file_okay=False),
+    help="Benchmark an existing catalogue instead of a generated one",
+)
+@click.option(
+    "--processes",
+    default=max(2, os.cpu_count() or 1),
+    type=click.IntRange(min=2),
+    show_default=True,
+    help="Worker processes for the single-pass-pool mode",
+)
+@click.option("--mode", type=click.Choice(MODES), hidden=True)
+def main(count, organizations_dir, processes, mode):
+    """Compare parse count, time and peak memory of the loading modes."""
+    if mode is not None:
+        click.echo(json.dumps(measure(organizations_dir, mode, processes)))
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if organizations_dir is None:
+            organizations_dir = temp_dir
+            click.echo(f"Generowanie {count} plików organizacji...", err=True)
+            generate(Path(temp_dir), count)
+
+        for mode in MODES:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--organizations-dir",
+                    organizations_dir,
+                    "--processes",
+                    str(processes),
+                    "--mode",
+                    mode,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output)
+            click.echo(
+                f"{result['mode']:>16}: {result['files']} plików, "
+                f"{result['parses'] if result['parses'] is not None else '?'} "
+                f"parsowań, {result['seconds']} s, "
+                f"szczytowa pamięć {result['max_rss_mb']} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
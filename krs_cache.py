@@ -0,0 +1,252 @@
+"""
+Persistent on-disk cache for KRS registry lookups.
+Backed by SQLite in WAL mode so parallel validator processes can share it.
+"""
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+# Default time-to-live values, in seconds
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_NEGATIVE_TTL = 6 * 3600
+DEFAULT_STALE_TTL = 0
+
+# Bump when the table layout changes; older caches are simply rebuilt
+SCHEMA_VERSION = 2
+
+_COLUMNS = "krs, registry, found, name, fetched_at, etag, last_modified, content_hash"
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+
+@dataclass
+class CachedKRSEntry:
+    """A single cached KRS lookup result."""
+
+    krs: str
+    registry: str
+    found: bool
+    name: Optional[str]
+    fetched_at: float
+    state: str = FRESH
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+    @property
+    def is_stale(self) -> bool:
+        return self.state == STALE
+
+    @property
+    def is_expired(self) -> bool:
+        return self.state == EXPIRED
+
+    @property
+    def can_revalidate(self) -> bool:
+        """True if the entry carries validators for a conditional request."""
+        return self.found and bool(self.etag or self.last_modified)
+
+
+class KRSCache:
+    """SQLite-backed cache of KRS lookups keyed by KRS number and registry."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        stale_ttl: float = DEFAULT_STALE_TTL,
+        busy_timeout: float = 30.0,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        if self.path.parent and not self.path.parent.exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the connection owned by the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Each connection is used by one thread only; it may be closed by
+            # another one in close_all(), after its thread is done with it
+            conn = sqlite3.connect(
+                str(self.path),
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _init_schema(self):
+        """Create (or rebuild, on version mismatch) the cache table."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS krs_entries")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS krs_entries (
+                    krs TEXT NOT NULL,
+                    registry TEXT NOT NULL,
+                    found INTEGER NOT NULL,
+                    name TEXT,
+                    fetched_at REAL NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    PRIMARY KEY (krs, registry)
+                )
+                """
+            )
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(
+        self,
+        krs: str,
+        registry: str = "S",
+        now: Optional[float] = None,
+        include_expired: bool = False,
+    ) -> Optional[CachedKRSEntry]:
+        """
+        Look up a cached entry.
+
+        Args:
+            include_expired: Also return expired entries, so their validators
+                can be used for a conditional request
+
+        Returns:
+            Fresh or stale (within the stale-while-revalidate window) entry,
+            an expired one if requested, or None if nothing usable is cached
+        """
+        row = (
+            self._connect()
+            .execute(
+                f"SELECT {_COLUMNS} FROM krs_entries WHERE krs = ? AND registry = ?",
+                (krs, registry),
+            )
+            .fetchone()
+        )
+        return self._entry(row, now, include_expired)
+
+    def find(
+        self, krs: str, now: Optional[float] = None, include_expired: bool = False
+    ) -> Optional[CachedKRSEntry]:
+        """
+        Look up a KRS number in whichever register it was found in.
+
+        A positive entry wins over "not found" entries for other registers.
+        """
+        row = (
+            self._connect()
+            .execute(
+                f"SELECT {_COLUMNS} FROM krs_entries WHERE krs = ? "
+                "ORDER BY found DESC, fetched_at DESC LIMIT 1",
+                (krs,),
+            )
+            .fetchone()
+        )
+        return self._entry(row, now, include_expired)
+
+    def _entry(
+        self, row: Optional[tuple], now: Optional[float], include_expired: bool
+    ) -> Optional[CachedKRSEntry]:
+        if row is None:
+            return None
+
+        krs, registry, found, name, fetched_at = row[:5]
+        found = bool(found)
+        age = (now if now is not None else time.time()) - fetched_at
+        ttl = self.ttl if found else self.negative_ttl
+
+        if age <= ttl:
+            state = FRESH
+        elif age <= ttl + self.stale_ttl:
+            state = STALE
+        elif include_expired:
+            state = EXPIRED
+        else:
+            return None
+
+        return CachedKRSEntry(krs, registry, found, name, fetched_at, state, *row[5:])
+
+    def put(
+        self,
+        krs: str,
+        found: bool,
+        name: Optional[str] = None,
+        registry: str = "S",
+        fetched_at: Optional[float] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_hash: Optional[str] = None,
+    ):
+        """Store a lookup result and its HTTP validators, replacing any previous entry."""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO krs_entries "
+            "(krs, registry, found, name, fetched_at, etag, last_modified, content_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                krs,
+                registry,
+                int(found),
+                name,
+                fetched_at if fetched_at is not None else time.time(),
+                etag,
+                last_modified,
+                content_hash,
+            ),
+        )
+
+    def touch(self, krs: str, registry: str = "S", fetched_at: Optional[float] = None):
+        """Mark an entry as confirmed unchanged, restarting its time-to-live."""
+        self._connect().execute(
+            "UPDATE krs_entries SET fetched_at = ? WHERE krs = ? AND registry = ?",
+            (fetched_at if fetched_at is not None else time.time(), krs, registry),
+        )
+
+    def close(self):
+        """Close the connection owned by the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            with self._connections_lock:
+                self._connections.remove(conn)
+            conn.close()
+            self._local.conn = None
+
+    def close_all(self):
+        """
+        Close the connections of every thread, e.g. of a finished thread pool.
+
+        Only call this once no other thread uses the cache any more.
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local.conn = None
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Shared KRS cache service for validator runs on many machines.
+Run it on a sidecar host with `python -m krs_cache_service` and point
+validators at it with --krs-cache-service.
+
+Protocol (JSON over HTTP):
+    GET  /krs/<krs>           entry; a miss is fetched from KRS once, however
+                              many clients ask for it at the same time
+    GET  /krs/<krs>?fetch=0   entry, or 404 without contacting KRS
+    PUT  /krs/<krs>           store an entry fetched by a client; requires
+                              "Authorization: Bearer <token>"
+    POST /krs/_batch          {"krs": [...]} -> {"entries": {krs: entry}},
+                              cached entries only
+    GET  /stats               service counters
+"""
+
+import hmac
+import json
+import re
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+import click
+import requests
+
+from krs_cache import (
+    CachedKRSEntry,
+    KRSCache,
+    DEFAULT_TTL,
+    DEFAULT_NEGATIVE_TTL,
+)
+from krs_puller import KRSMaintenanceError, KRSNotFoundError
+from krs_remote_cache import TOKEN_ENVVAR, entry_from_json, entry_to_json
+from krs_resilience import SingleFlight
+from krs_stats import KRSStats
+from validators import KRSClientConfig, RealKRSClient
+
+KRS_PATH = re.compile(r"^/krs/(\d{10})$")
+BATCH_PATH = "/krs/_batch"
+
+
+class KRSUpstreamError(Exception):
+    """Raised when KRS could not answer a lookup the service had to fetch."""
+
+    pass
+
+
+class KRSCacheService:
+    """
+    Shared cache in front of KRS, with single-flight upstream fetches.
+
+    Every validator trusts the names the service serves, so only clients
+    holding `token` may store entries; without a token clients can only read.
+    """
+
+    def __init__(
+        self,
+        cache: KRSCache,
+        upstream: Optional[RealKRSClient] = None,
+        token: Optional[str] = None,
+    ):
+        self.cache = cache
+        self.upstream = upstream
+        self.token = token or None
+        self.stats = KRSStats()
+        self.single_flight = SingleFlight(stats=self.stats)
+
+    def get(self, krs: str, fetch: bool = True) -> Optional[CachedKRSEntry]:
+        """
+        Return the cached entry for a KRS number, fetching it on a miss.
+
+        Raises:
+            KRSUpstreamError: If the number had to be fetched and KRS failed
+        """
+        self.stats.incr("requests")
+        entry = self.cache.find(krs)
+        if entry is not None:
+            self.stats.incr("hits")
+            return entry
+
+        self.stats.incr("misses")
+        if not fetch or self.upstream is None:
+            return None
+        return self.single_flight.do(krs, lambda: self._fetch(krs))
+
+    def _fetch(self, krs: str) -> Optional[CachedKRSEntry]:
+        self.stats.incr("upstream_fetches")
+        try:
+            # The upstream client writes the answer, found or not, to the cache
+            self.upstream.fetch(krs)
+        except KRSNotFoundError:
+            pass
+        except (KRSMaintenanceError, requests.HTTPError) as e:
+            self.stats.incr("upstream_errors")
+            raise KRSUpstreamError(str(e)) from e
+        return self.cache.find(krs)
+
+    def get_many(self, numbers: Iterable[str]) -> Dict[str, CachedKRSEntry]:
+        """Return the cached entries for several KRS numbers, without fetching."""
+        entries = {}
+        for krs in dict.fromkeys(numbers):
+            self.stats.incr("requests")
+            entry = self.cache.find(krs)
+            if entry is not None:
+                self.stats.incr("hits")
+                entries[krs] = entry
+            else:
+                self.stats.incr("misses")
+        return entries
+
+    def can_write(self, authorization: Optional[str]) -> bool:
+        """True if the Authorization header carries the service token."""
+        if self.token is None:
+            return False
+        expected = f"Bearer {self.token}".encode("utf-8")
+        return hmac.compare_digest((authorization or "").encode("utf-8"), expected)
+
+    def put(self, entry: CachedKRSEntry):
+        """Store an entry fetched by a client."""
+        self.stats.incr("client_puts")
+        self.cache.put(
+            entry.krs,
+            found=entry.found,
+            name=entry.name,
+            registry=entry.registry,
+            fetched_at=entry.fetched_at,
+            etag=entry.etag,
+            last_modified=entry.last_modified,
+            content_hash=entry.content_hash,
+        )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "KRSCacheServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            return self._send(200, self.server.service.stats.as_dict())
+
+        match = KRS_PATH.match(url.path)
+        if not match:
+            return self._send(404, {"error": "nieznana ścieżka"})
+
+        fetch = parse_qs(url.query).get("fetch", ["1"])[0] != "0"
+        try:
+            entry = self.server.service.get(match.group(1), fetch=fetch)
+        except KRSUpstreamError as e:
+            return self._send(502, {"error": str(e)})
+        if entry is None:
+            return self._send(404, {"error": "brak wpisu"})
+        self._send(200, entry_to_json(entry))
+
+    def do_PUT(self):
+        match = KRS_PATH.match(urlparse(self.path).path)
+        data = self._read_json()
+        if not self.server.service.can_write(self.headers.get("Authorization")):
+            return self._send(403, {"error": "zapis wymaga tokenu usługi"})
+        if not match or not isinstance(data, dict):
+            return self._send(400, {"error": "nieprawidłowe żądanie"})
+
+        data["krs"] = match.group(1)
+        try:
+            entry = entry_from_json(data)
+        except ValueError:
+            return self._send(400, {"error": "nieprawidłowy wpis"})
+        self.server.service.put(entry)
+        self._send(204)
+
+    def do_POST(self):
+        data = self._read_json()
+        numbers = data.get("krs", []) if isinstance(data, dict) else None
+        if (
+            urlparse(self.path).path != BATCH_PATH
+            or not isinstance(numbers, list)
+            or not all(
+                isinstance(krs, (str, int)) and not isinstance(krs, bool)
+                for krs in numbers
+            )
+        ):
+            return self._send(400, {"error": "nieprawidłowe żądanie"})
+
+        numbers = [str(krs) for krs in numbers]
+        entries = self.server.service.get_many(numbers)
+        self._send(
+            200,
+            {"entries": {krs: entry_to_json(e) for krs, e in entries.items()}},
+        )
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            return None
+
+    def _send(self, status: int, payload=None):
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class KRSCacheServer(ThreadingHTTPServer):
+    """Threaded HTTP server exposing a KRSCacheService."""
+
+    daemon_threads = True
+
+    def __init__(self, address, service: KRSCacheService):
+        self.service = service
+        super().__init__(address, _Handler)
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to bind")
+@click.option("--port", default=8765, type=int, show_default=True, help="Port to bind")
+@click.option(
+    "--cache",
+    "cache_path",
+    required=True,
+    type=click.Path(dir_okay=False),
+    help="SQLite file backing the shared cache",
+)
+@click.option(
+    "--cache-ttl",
+    default=DEFAULT_TTL,
+    type=float,
+    show_default=True,
+    help="Seconds a found KRS entry is served before it is fetched again",
+)
+@click.option(
+    "--cache-negative-ttl",
+    default=DEFAULT_NEGATIVE_TTL,
+    type=float,
+    show_default=True,
+    help="Seconds a not-found KRS entry is served before it is fetched again",
+)
+@click.option(
+    "--upstream/--no-upstream",
+    default=True,
+    show_default=True,
+    help="Fetch missing entries from KRS; without it clients fetch and share them",
+)
+@click.option(
+    "--token",
+    envvar=TOKEN_ENVVAR,
+    default=None,
+    show_envvar=True,
+    help="Shared secret clients need to store entries; without it clients "
+    "can only read",
+)
+@click.option(
+    "--krs-concurrency",
+    default=KRSClientConfig.concurrency,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Maximum number of upstream KRS fetches at the same time",
+)
+@click.option(
+    "--krs-rate-limit",
+    default=KRSClientConfig.rate_limit,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Maximum upstream KRS requests per second (0 disables the limit)",
+)
+def main(
+    host: str,
+    port: int,
+    cache_path: str,
+    cache_ttl: float,
+    cache_negative_ttl: float,
+    upstream: bool,
+    token: Optional[str],
+    krs_concurrency: int,
+    krs_rate_limit: float,
+):
+    """Serve a shared KRS cache to validator runs over HTTP."""
+    if not upstream and not token:
+        print(
+            f"⚠️  --no-upstream bez tokenu ({TOKEN_ENVVAR}): walidatory nie mogą "
+            "zapisywać wpisów, usługa serwuje tylko zawartość --cache"
+        )
+    client = None
+    if upstream:
+        client = RealKRSClient(
+            KRSClientConfig(
+                cache_path=cache_path,
+                cache_ttl=cache_ttl,
+                cache_negative_ttl=cache_negative_ttl,
+                concurrency=krs_concurrency,
+                rate_limit=krs_rate_limit,
+            )
+        )
+    cache = KRSCache(cache_path, ttl=cache_ttl, negative_ttl=cache_negative_ttl)
+    server = KRSCacheServer((host, port), KRSCacheService(cache, client, token))
+
+    print(f"🗄️  Wspólna pamięć podręczna KRS: http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if client is not None:
+            client.close()
+        for line in server.service.stats.summary_lines():
+            print(f"   {line}")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
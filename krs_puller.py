@@ -3,42 +3,238 @@ KRS data puller for organization validation.
 Adapted from the main CLI KRS validation logic.
 """
 
+import hashlib
+import json
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+
 import requests
-from typing import Optional
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+from krs_stream import JSONStreamError, ResponseTooLargeError, project_stream
+
+KRS_API_URL = "https://api-krs.ms.gov.pl/api/krs/OdpisAktualny/"
+
+# Associations and foundations (S) and entrepreneurs (P)
+REGISTRIES = ("S", "P")
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 10.0
+DEFAULT_MAX_RESPONSE_BYTES = 8 * 1024 * 1024
+
+# Fields kept from the OdpisAktualny document; the rest is discarded while streaming
+PROJECTED_FIELDS = [
+    ("odpis", "dane", "dzial1", "danePodmiotu", "nazwa"),
+]
+
+# Statuses worth retrying: the same GET may succeed a moment later
+TRANSIENT_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+_CHUNK_SIZE = 16 * 1024
+_DIAGNOSTIC_BYTES = 64 * 1024
+
+
+def odpis_url(krs: str, registry: str = "S", base_url: Optional[str] = None) -> str:
+    """OdpisAktualny URL for a KRS number and registry, on the public API by default."""
+    return f"{base_url or KRS_API_URL}{krs}?rejestr={registry}&format=json"
+
+
+def default_endpoints() -> Tuple[str, ...]:
+    """Endpoints used when none are configured: just the public KRS API."""
+    return (KRS_API_URL,)
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that remembers the connection counts of evicted host pools."""
+
+    def __init__(self, *args, **kwargs):
+        self._evicted_lock = threading.Lock()
+        self.evicted_connections = 0
+        self.evicted_requests = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pools.dispose_func = self._dispose_pool
+
+    def _dispose_pool(self, pool):
+        with self._evicted_lock:
+            self.evicted_connections += pool.num_connections
+            self.evicted_requests += pool.num_requests
+        pool.close()
+
+
+def create_krs_session(
+    pool_size: int = DEFAULT_POOL_SIZE, hosts: int = 1
+) -> requests.Session:
+    """
+    Create a keep-alive HTTP session for KRS requests.
+
+    The underlying urllib3 pool is thread-safe, so one session can be shared
+    by every lookup of a run. The pool blocks when exhausted instead of
+    opening throwaway connections, so pool_size also bounds concurrency.
+    One pool is kept per host; `hosts` must cover every host the session
+    talks to (e.g. all failover endpoints), or switching between them
+    evicts pools and reconnects.
+    """
+    session = requests.Session()
+    adapter = _CountingAdapter(
+        pool_connections=max(1, hosts),
+        pool_maxsize=pool_size,
+        pool_block=True,
+        max_retries=0,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def session_pool_stats(session: requests.Session) -> Tuple[int, int]:
+    """
+    Report connection reuse for a session, including evicted host pools.
+
+    Returns:
+        Tuple of (connections_opened, requests_sent)
+    """
+    connections = 0
+    sent = 0
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        connections += getattr(adapter, "evicted_connections", 0)
+        sent += getattr(adapter, "evicted_requests", 0)
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                sent += pool.num_requests
+    return connections, sent
 
 
 class KRSDataPuller:
     """Pulls and validates organization data from Polish KRS registry."""
 
-    def __init__(self, krs: str):
+    def __init__(
+        self,
+        krs: str,
+        registry: str = "S",
+        session: Optional[requests.Session] = None,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_READ_TIMEOUT,
+        max_response_bytes: int = DEFAULT_MAX_RESPONSE_BYTES,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        cancel: Optional[threading.Event] = None,
+        base_url: Optional[str] = None,
+    ):
+        """
+        Fetch the entry right away.
+
+        With `etag` or `last_modified` from an earlier response the request is
+        conditional: if the registry entry is unchanged, `not_modified` is set
+        and `data` stays None instead of downloading the document again.
+        Setting `cancel` from another thread abandons the download.
+        `base_url` points the request at a mirror of the OdpisAktualny API.
+        """
         self.krs = krs
+        self.registry = registry
+        self.session = session
+        self.timeout = timeout
+        self.max_response_bytes = max_response_bytes
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = False
+        self.cancel = cancel
+        self.base_url = base_url
         self.data = self._pull_data()
 
+    @property
+    def url(self) -> str:
+        """OdpisAktualny URL for this KRS number and registry."""
+        return odpis_url(self.krs, self.registry, self.base_url)
+
     def _pull_data(self) -> Optional[dict]:
-        """Pull organization data from KRS API."""
+        """Pull organization data from KRS API, keeping only PROJECTED_FIELDS."""
+        self._check_cancelled()
         try:
-            response = requests.get(
-                f"https://api-krs.ms.gov.pl/api/krs/OdpisAktualny/{self.krs}?rejestr=S&format=json",
-                timeout=10,
+            http = self.session if self.session is not None else requests
+            headers = {}
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+            response = http.get(
+                self.url, headers=headers, timeout=self.timeout, stream=True
             )
 
-            if response.status_code == 200:
-                try:
-                    return response.json()
-                except requests.exceptions.JSONDecodeError:
-                    if "Przerwa techniczna" in response.text:
-                        raise KRSMaintenanceError(
-                            f"Przerwa techniczna serwisu weryfikującego KRS. "
-                            f"Proszę zweryfikować KRS ręcznie: "
-                            f"https://api-krs.ms.gov.pl/api/krs/OdpisAktualny/{self.krs}?rejestr=S&format=json"
-                        )
-                    raise
-            else:
-                raise requests.HTTPError(f"Failed to fetch data for KRS {self.krs}")
+            with response:
+                if response.status_code == 304 and headers:
+                    self.not_modified = True
+                    return None
+                elif response.status_code == 200:
+                    self.etag = response.headers.get("ETag")
+                    self.last_modified = response.headers.get("Last-Modified")
+                    return self._project(response)
+                elif response.status_code == 404:
+                    raise KRSNotFoundError(f"Failed to fetch data for KRS {self.krs}")
+                elif response.status_code in TRANSIENT_STATUS_CODES:
+                    raise KRSTransientError(
+                        f"KRS {self.krs}: HTTP {response.status_code}, try again later"
+                    )
+                else:
+                    raise requests.HTTPError(f"Failed to fetch data for KRS {self.krs}")
 
+        except (KRSNotFoundError, KRSResponseTooLargeError, KRSTransientError):
+            raise
+        except requests.exceptions.Timeout as e:
+            raise KRSTimeoutError(f"Timeout fetching KRS {self.krs}: {e}")
+        except requests.exceptions.ConnectionError as e:
+            raise KRSTransientError(f"Network error fetching KRS {self.krs}: {e}")
         except requests.exceptions.RequestException as e:
             raise requests.HTTPError(f"Network error fetching KRS {self.krs}: {e}")
 
+    def _project(self, response: requests.Response) -> dict:
+        """Stream the response body and extract the projected fields."""
+        content_length = response.headers.get("Content-Length", "")
+        if content_length.isdigit() and int(content_length) > self.max_response_bytes:
+            raise KRSResponseTooLargeError(
+                f"KRS {self.krs} response of {content_length} bytes exceeds "
+                f"the {self.max_response_bytes} byte limit"
+            )
+
+        # Keep the beginning of the body to recognise the maintenance page
+        head = bytearray()
+
+        def recorded_chunks():
+            for chunk in response.iter_content(_CHUNK_SIZE):
+                self._check_cancelled()
+                if len(head) < _DIAGNOSTIC_BYTES:
+                    head.extend(chunk[: _DIAGNOSTIC_BYTES - len(head)])
+                yield chunk
+
+        chunks = recorded_chunks()
+        try:
+            values = project_stream(chunks, PROJECTED_FIELDS, self.max_response_bytes)
+        except ResponseTooLargeError as e:
+            raise KRSResponseTooLargeError(f"KRS {self.krs}: {e}")
+        except JSONStreamError:
+            for _ in chunks:
+                if len(head) >= _DIAGNOSTIC_BYTES:
+                    break
+            if "Przerwa techniczna" in head.decode("utf-8", errors="replace"):
+                raise KRSMaintenanceError(
+                    f"Przerwa techniczna serwisu weryfikującego KRS. "
+                    f"Proszę zweryfikować KRS ręcznie: "
+                    f"{odpis_url(self.krs, self.registry)}"
+                )
+            raise requests.HTTPError(f"Invalid JSON response for KRS {self.krs}")
+
+        return _nest(values)
+
     @property
     def name(self) -> Optional[str]:
         """Get organization name from KRS data."""
@@ -53,6 +249,43 @@ class KRSDataPuller:
             .get("nazwa")
         )
 
+    def _check_cancelled(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise KRSCancelledError(f"Lookup of KRS {self.krs} was cancelled")
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        """Digest of the projected fields, to tell whether an entry changed."""
+        if self.data is None:
+            return None
+        canonical = json.dumps(self.data, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def from_projection(
+        cls,
+        krs: str,
+        registry: str,
+        data: Optional[dict],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        not_modified: bool = False,
+    ) -> "KRSDataPuller":
+        """Rebuild a puller from already projected data, without any request."""
+        puller = cls.__new__(cls)
+        puller.krs = krs
+        puller.registry = registry
+        puller.session = None
+        puller.timeout = None
+        puller.max_response_bytes = DEFAULT_MAX_RESPONSE_BYTES
+        puller.etag = etag
+        puller.last_modified = last_modified
+        puller.not_modified = not_modified
+        puller.cancel = None
+        puller.base_url = None
+        puller.data = data
+        return puller
+
     @classmethod
     def get_organization_data(cls, krs: str) -> Optional["KRSDataPuller"]:
         """
@@ -67,7 +300,103 @@ class KRSDataPuller:
             return None
 
 
+def pull_any_registry(
+    krs: str,
+    registries: Sequence[str] = REGISTRIES,
+    executor: Optional[Executor] = None,
+    **kwargs,
+) -> KRSDataPuller:
+    """
+    Query several registers at once and return the first that has the entry.
+
+    The remaining requests are cancelled as soon as one register answers.
+    Extra keyword arguments are passed to KRSDataPuller.
+
+    Raises:
+        KRSNotFoundError: if no register has the entry
+        KRSMaintenanceError, requests.RequestException: the failure of the
+            first register (in `registries` order) if no register answered
+    """
+    if len(registries) == 1:
+        return KRSDataPuller(krs, registries[0], **kwargs)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=len(registries))
+    cancel = threading.Event()
+    futures = [
+        executor.submit(KRSDataPuller, krs, registry, cancel=cancel, **kwargs)
+        for registry in registries
+    ]
+
+    not_found: Optional[KRSNotFoundError] = None
+    failures: Dict[int, BaseException] = {}
+    try:
+        for future in as_completed(futures):
+            try:
+                puller = future.result()
+            except KRSNotFoundError as e:
+                not_found = not_found or e
+                continue
+            except (KRSMaintenanceError, requests.RequestException) as e:
+                failures[futures.index(future)] = e
+                continue
+            cancel.set()
+            return puller
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+
+    if failures:
+        # Report in register order, not completion order, so results are stable
+        raise failures[min(failures)]
+    raise KRSNotFoundError(
+        f"KRS {krs} not found in registers {', '.join(registries)}"
+    ) from not_found
+
+
+def _nest(values: Dict[Tuple[str, ...], object]) -> dict:
+    """Turn {("a", "b"): value} into {"a": {"b": value}}."""
+    data: dict = {}
+    for path, value in values.items():
+        node = data
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+    return data
+
+
 class KRSMaintenanceError(Exception):
     """Raised when KRS API is in maintenance mode."""
 
     pass
+
+
+class KRSNotFoundError(requests.HTTPError):
+    """Raised when the registry has no entry for the requested KRS number."""
+
+    pass
+
+
+class KRSTimeoutError(requests.HTTPError):
+    """Raised when the KRS API does not answer within the timeout."""
+
+    pass
+
+
+class KRSResponseTooLargeError(requests.HTTPError):
+    """Raised when a KRS response exceeds the configured size cap."""
+
+    pass
+
+
+class KRSTransientError(requests.HTTPError):
+    """Raised for failures that may succeed on retry (reset connections, 5xx)."""
+
+    pass
+
+
+class KRSCancelledError(Exception):
+    """Raised inside a lookup abandoned because another register answered first."""
+
+    pass
@@ -0,0 +1,195 @@
+"""
+Record and replay of KRS traffic, for reproducible network-free reruns.
+
+A recording directory holds:
+    objects/<sha256>.json   projected outcomes (document or error), stored
+                            once per distinct content
+    index.jsonl             one line per request, in the order they finished:
+                            the request, the outcome's digest and its latency
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, Optional, Sequence, Tuple
+
+import requests
+
+from krs_puller import (
+    KRSDataPuller,
+    KRSMaintenanceError,
+    KRSNotFoundError,
+    KRSResponseTooLargeError,
+    KRSTimeoutError,
+    KRSTransientError,
+)
+from krs_stats import KRSStats
+
+INDEX_FILE = "index.jsonl"
+OBJECTS_DIR = "objects"
+
+# Outcomes that are recorded; anything else (e.g. a bug) is not replayable
+RECORDED_ERRORS = {
+    cls.__name__: cls
+    for cls in (
+        KRSMaintenanceError,
+        KRSNotFoundError,
+        KRSResponseTooLargeError,
+        KRSTimeoutError,
+        KRSTransientError,
+        requests.HTTPError,
+    )
+}
+
+RequestKey = Tuple[str, Tuple[str, ...], Optional[str], Optional[str]]
+
+
+class KRSReplayMissError(requests.HTTPError):
+    """Raised when a replayed run makes a request that was never recorded."""
+
+    pass
+
+
+def request_key(
+    krs: str,
+    registries: Sequence[str],
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> RequestKey:
+    """Identify a KRS request; conditional requests are distinct requests."""
+    return krs, tuple(registries), etag, last_modified
+
+
+def _outcome(result: Optional[KRSDataPuller], error: Optional[Exception]) -> dict:
+    if error is not None:
+        return {"error": type(error).__name__, "message": str(error)}
+    return {
+        "registry": result.registry,
+        "data": result.data,
+        "etag": result.etag,
+        "last_modified": result.last_modified,
+        "not_modified": result.not_modified,
+    }
+
+
+class KRSRecorder:
+    """Stores the outcome and latency of every KRS request in a directory."""
+
+    def __init__(self, directory: str, clock: Callable[[], float] = time.monotonic):
+        self.directory = Path(directory)
+        self.clock = clock
+        self._lock = threading.Lock()
+        (self.directory / OBJECTS_DIR).mkdir(parents=True, exist_ok=True)
+        self._index = open(self.directory / INDEX_FILE, "a", encoding="utf-8")
+
+    def call(self, key: RequestKey, func: Callable[[], KRSDataPuller]) -> KRSDataPuller:
+        """Run func(), record its outcome, and return or re-raise it."""
+        started = self.clock()
+        try:
+            result = func()
+        except tuple(RECORDED_ERRORS.values()) as e:
+            if type(e).__name__ not in RECORDED_ERRORS:
+                raise
+            self._record(key, _outcome(None, e), self.clock() - started)
+            raise
+        self._record(key, _outcome(result, None), self.clock() - started)
+        return result
+
+    def _record(self, key: RequestKey, outcome: dict, latency: float):
+        body = json.dumps(outcome, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.directory / OBJECTS_DIR / f"{digest}.json"
+        if not path.exists():
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+
+        krs, registries, etag, last_modified = key
+        line = {
+            "krs": krs,
+            "registries": list(registries),
+            "etag": etag,
+            "last_modified": last_modified,
+            "object": digest,
+            "latency": round(latency, 6),
+        }
+        with self._lock:
+            self._index.write(json.dumps(line, ensure_ascii=False) + "\n")
+            self._index.flush()
+
+    def close(self):
+        with self._lock:
+            self._index.close()
+
+
+class KRSReplayer:
+    """
+    Serves recorded outcomes back without touching the network.
+
+    Repeated requests get the recorded outcomes in their original order, so
+    a retried timeout replays as timeout-then-success; once the recorded
+    outcomes run out, the last one is repeated. With `latency` each reply is
+    delayed by the time the original request took.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        latency: bool = False,
+        stats: Optional[KRSStats] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.directory = Path(directory)
+        self.latency = latency
+        self.stats = stats or KRSStats()
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._queues: Dict[RequestKey, Deque[Tuple[str, float]]] = defaultdict(deque)
+
+        with open(self.directory / INDEX_FILE, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                key = request_key(
+                    item["krs"],
+                    item["registries"],
+                    item.get("etag"),
+                    item.get("last_modified"),
+                )
+                self._queues[key].append((item["object"], item.get("latency", 0.0)))
+
+    def replay(self, key: RequestKey) -> KRSDataPuller:
+        """Return or raise the next recorded outcome for a request."""
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                self.stats.incr("replay_misses")
+                raise KRSReplayMissError(
+                    f"Brak nagranej odpowiedzi KRS dla {key[0]} "
+                    f"(rejestry: {', '.join(key[1])})"
+                )
+            digest, latency = queue.popleft() if len(queue) > 1 else queue[0]
+
+        if self.latency and latency > 0:
+            self.sleep(latency)
+        self.stats.incr("replayed_responses")
+
+        with open(self.directory / OBJECTS_DIR / f"{digest}.json", "rb") as f:
+            outcome = json.loads(f.read())
+        if "error" in outcome:
+            raise RECORDED_ERRORS[outcome["error"]](outcome["message"])
+        return KRSDataPuller.from_projection(
+            key[0],
+            outcome["registry"],
+            outcome["data"],
+            etag=outcome["etag"],
+            last_modified=outcome["last_modified"],
+            not_modified=outcome["not_modified"],
+        )
@@ -0,0 +1,170 @@
+"""
+Client for the shared KRS cache service (see krs_cache_service.py).
+Lets validator runs on different machines share KRS lookups over HTTP/JSON.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import requests
+
+from krs_cache import CachedKRSEntry
+from krs_puller import DEFAULT_POOL_SIZE, create_krs_session
+
+# Entry fields sent over the wire; the freshness state is always recomputed
+ENTRY_FIELDS = (
+    "krs",
+    "registry",
+    "found",
+    "name",
+    "fetched_at",
+    "etag",
+    "last_modified",
+    "content_hash",
+)
+
+Timeout = Union[float, Tuple[float, float]]
+
+# Shared secret that lets clients store entries in the service
+TOKEN_ENVVAR = "KRS_CACHE_SERVICE_TOKEN"
+
+
+class CacheServiceReplyError(requests.RequestException):
+    """Raised when the cache service answers with something other than entries."""
+
+    pass
+
+
+def entry_to_json(entry: CachedKRSEntry) -> dict:
+    """Serialize a cache entry for the service protocol."""
+    return {field: getattr(entry, field) for field in ENTRY_FIELDS}
+
+
+def entry_from_json(data: dict) -> CachedKRSEntry:
+    """
+    Deserialize a cache entry received from the service.
+
+    Raises:
+        ValueError: If the data is not a well-formed entry
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Wpis nie jest obiektem JSON")
+    entry = CachedKRSEntry(**{field: data.get(field) for field in ENTRY_FIELDS})
+    if (
+        not isinstance(entry.krs, str)
+        or not isinstance(entry.registry, str)
+        or not isinstance(entry.found, bool)
+        or isinstance(entry.fetched_at, bool)
+        or not isinstance(entry.fetched_at, (int, float))
+        or not all(
+            isinstance(value, (str, type(None)))
+            for value in (
+                entry.name,
+                entry.etag,
+                entry.last_modified,
+                entry.content_hash,
+            )
+        )
+    ):
+        raise ValueError("Nieprawidłowy wpis pamięci podręcznej KRS")
+    return entry
+
+
+def _reply_json(response: requests.Response):
+    try:
+        return response.json()
+    except ValueError as e:
+        raise CacheServiceReplyError(f"Invalid JSON from the cache service: {e}") from e
+
+
+class RemoteKRSCache:
+    """HTTP client for the shared KRS cache service."""
+
+    def __init__(
+        self,
+        base_url: str,
+        session: Optional[requests.Session] = None,
+        timeout: Timeout = 30.0,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        token: Optional[str] = None,
+    ):
+        """
+        Without `session` the client keeps its own keep-alive pool, so that
+        sharing a session with KRS lookups does not make them evict each
+        other's connections. Without `token` the client can only read.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.token = token or None
+        self._owns_session = session is None
+        self.session = session or create_krs_session(pool_size)
+        self.timeout = timeout
+
+    def _timeout(self, timeout: Optional[Timeout]) -> Timeout:
+        """The timeout for one request; a deliberate 0 means no time is left."""
+        timeout = self.timeout if timeout is None else timeout
+        if min(timeout if isinstance(timeout, tuple) else (timeout,)) <= 0:
+            raise requests.Timeout("No time left for the cache service")
+        return timeout
+
+    def get(
+        self, krs: str, fetch: bool = True, timeout: Optional[Timeout] = None
+    ) -> Optional[CachedKRSEntry]:
+        """
+        Look up a KRS number in the shared cache.
+
+        Args:
+            fetch: Let the service fetch a missing entry from KRS; concurrent
+                requests for the same number share one upstream fetch
+
+        Returns:
+            The entry, or None if the service has no answer for the number
+
+        Raises:
+            requests.RequestException: If the service is unreachable, failed
+                or sent a malformed reply (CacheServiceReplyError)
+        """
+        response = self.session.get(
+            f"{self.base_url}/krs/{krs}",
+            params=None if fetch else {"fetch": "0"},
+            timeout=self._timeout(timeout),
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        try:
+            return entry_from_json(_reply_json(response))
+        except ValueError as e:
+            raise CacheServiceReplyError(str(e)) from e
+
+    def get_many(
+        self, numbers: Iterable[str], timeout: Optional[Timeout] = None
+    ) -> Dict[str, CachedKRSEntry]:
+        """Return the entries the service already holds for several KRS numbers."""
+        response = self.session.post(
+            f"{self.base_url}/krs/_batch",
+            json={"krs": list(numbers)},
+            timeout=self._timeout(timeout),
+        )
+        response.raise_for_status()
+        reply = _reply_json(response)
+        entries = reply.get("entries") if isinstance(reply, dict) else None
+        if not isinstance(entries, dict):
+            raise CacheServiceReplyError("Cache service reply has no entries")
+        try:
+            return {krs: entry_from_json(data) for krs, data in entries.items()}
+        except ValueError as e:
+            raise CacheServiceReplyError(str(e)) from e
+
+    def put(self, entry: CachedKRSEntry, timeout: Optional[Timeout] = None):
+        """Share a lookup result fetched by this client; requires the token."""
+        response = self.session.put(
+            f"{self.base_url}/krs/{entry.krs}",
+            json=entry_to_json(entry),
+            headers={"Authorization": f"Bearer {self.token}"} if self.token else None,
+            timeout=self._timeout(timeout),
+        )
+        response.raise_for_status()
+
+    def close(self):
+        """Release the session, if the client created it."""
+        if self._owns_session:
+            self.session.close()
@@ -0,0 +1,620 @@
+"""
+Resilience policies for talking to the KRS API.
+Shared, thread-safe run-wide state that sits between RealKRSClient and KRSDataPuller.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from krs_stats import KRSStats
+
+T = TypeVar("T")
+
+CLOSED = "zamknięty"
+OPEN = "otwarty"
+HALF_OPEN = "półotwarty"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited by an open breaker."""
+
+    pass
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a run-wide deadline leaves no time for another attempt."""
+
+    pass
+
+
+class Deadline:
+    """A fixed point in time shared by every KRS lookup of a run."""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative."""
+        return max(self.expires_at - self.clock(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cap(self, timeout: float) -> float:
+        """Shorten a timeout so it does not outlive the deadline."""
+        return min(timeout, self.remaining())
+
+
+class CircuitBreaker:
+    """
+    Run-wide circuit breaker for KRS maintenance windows.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects calls immediately. Once `reset_timeout` seconds have passed it
+    lets a single probe through (half-open); a successful probe closes it
+    again, a failed one re-opens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        failure_types: Tuple[Type[BaseException], ...],
+        success_types: Tuple[Type[BaseException], ...] = (),
+        stats: Optional[KRSStats] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_types = failure_types
+        self.success_types = success_types
+        self.stats = stats or KRSStats()
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def call(self, func: Callable[[], T]) -> T:
+        """
+        Run func under the breaker.
+
+        Raises:
+            CircuitOpenError: if the breaker is open and no probe is allowed
+        """
+        if not self.enabled:
+            return func()
+
+        probe = self._acquire()
+        try:
+            result = func()
+        except self.success_types:
+            self._on_success(probe)
+            raise
+        except self.failure_types:
+            self._on_failure(probe)
+            raise
+        except BaseException:
+            self._on_neutral(probe)
+            raise
+
+        self._on_success(probe)
+        return result
+
+    def _acquire(self) -> bool:
+        """Admit a call; returns True if the call is a half-open probe."""
+        with self._lock:
+            if self._state == OPEN:
+                if self.clock() - self._opened_at < self.reset_timeout:
+                    self.stats.incr("breaker_short_circuits")
+                    raise CircuitOpenError()
+                self._transition(HALF_OPEN, "upłynął czas oczekiwania")
+
+            if self._state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self.stats.incr("breaker_short_circuits")
+                    raise CircuitOpenError()
+                self._probe_in_flight = True
+                return True
+
+            return False
+
+    def _on_success(self, probe: bool):
+        with self._lock:
+            self._failures = 0
+            if probe:
+                self._probe_in_flight = False
+                self._transition(CLOSED, "próba zakończona sukcesem")
+
+    def _on_failure(self, probe: bool):
+        with self._lock:
+            self._failures += 1
+            if probe:
+                self._probe_in_flight = False
+                self._open("próba nie powiodła się")
+            elif self._state == CLOSED and self._failures >= self.failure_threshold:
+                self._open(f"{self._failures} kolejne błędy")
+
+    def _on_neutral(self, probe: bool):
+        with self._lock:
+            if probe:
+                self._probe_in_flight = False
+                self._open("próba nie powiodła się")
+
+    def _open(self, reason: str):
+        self._opened_at = self.clock()
+        self._transition(OPEN, reason)
+
+    def _transition(self, state: str, reason: str):
+        if state == self._state:
+            return
+        self.stats.record_event(f"wyłącznik KRS: {self._state} → {state} ({reason})")
+        self._state = state
+
+
+class RetryPolicy:
+    """
+    Retry idempotent calls with exponential backoff and full jitter.
+
+    The n-th retry sleeps a random time between 0 and
+    min(max_delay, base_delay * 2 ** (n - 1)), so concurrent lookups that
+    failed together do not retry in lockstep.
+    """
+
+    def __init__(
+        self,
+        attempts: int,
+        base_delay: float,
+        max_delay: float,
+        retry_types: Tuple[Type[BaseException], ...],
+        stats: Optional[KRSStats] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[], float] = random.random,
+    ):
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_types = retry_types
+        self.stats = stats or KRSStats()
+        self.sleep = sleep
+        self.jitter = jitter
+
+    def delay(self, retry: int) -> float:
+        """Backoff before the given retry (1 for the first retry)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (retry - 1))
+        return ceiling * self.jitter()
+
+    def call(self, func: Callable[[], T], deadline: Optional[Deadline] = None) -> T:
+        """
+        Run func, retrying on retry_types until attempts are exhausted.
+
+        Raises:
+            DeadlineExceededError: if the next retry would start after the deadline
+        """
+        for attempt in range(1, self.attempts + 1):
+            try:
+                return func()
+            except self.retry_types as e:
+                if attempt == self.attempts:
+                    raise
+                delay = self.delay(attempt)
+                if deadline is not None and deadline.remaining() <= delay:
+                    raise DeadlineExceededError(f"No time left to retry: {e}") from e
+            self.stats.incr("retries")
+            self.sleep(delay)
+        raise AssertionError("unreachable")
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies."""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Return the given percentile (0..1) of the window, or None if empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(int(fraction * len(samples)), len(samples) - 1)
+        return samples[index]
+
+
+class Hedger:
+    """
+    Hedged requests for tail latency.
+
+    If a call has not finished after the p95 latency of recent successful
+    calls, a second, identical call is started and whichever finishes first
+    wins. Until `min_samples` latencies have been observed `initial_delay`
+    is used instead of the percentile. The losing call is left to finish in
+    the background and its outcome is discarded.
+    """
+
+    def __init__(
+        self,
+        initial_delay: float,
+        transient_types: Tuple[Type[BaseException], ...] = (),
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        max_workers: int = 8,
+        stats: Optional[KRSStats] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.initial_delay = initial_delay
+        self.transient_types = transient_types
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.stats = stats or KRSStats()
+        self.clock = clock
+        self.latencies = LatencyTracker()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="krs-hedge"
+        )
+
+    @property
+    def delay(self) -> float:
+        """Time to wait for the first attempt before hedging."""
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        return self.latencies.percentile(self.percentile)
+
+    def call(self, func: Callable[[], T]) -> T:
+        """Run func, hedging with a second call if the first one is slow."""
+        primary = self._executor.submit(self._timed, func)
+        done, _ = wait([primary], timeout=self.delay)
+        if done:
+            return primary.result()
+
+        self.stats.incr("hedged_requests")
+        hedge = self._executor.submit(self._timed, func)
+        pending = {primary, hedge}
+        failed = primary
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                # A transient failure of one call should not beat the other
+                if isinstance(future.exception(), self.transient_types):
+                    failed = future
+                    continue
+                if future is hedge:
+                    self.stats.incr("hedge_wins")
+                return future.result()
+        return failed.result()
+
+    def _timed(self, func: Callable[[], T]) -> T:
+        started = self.clock()
+        result = func()
+        self.latencies.record(self.clock() - started)
+        return result
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+class TokenBucket:
+    """
+    Token bucket capping the request rate.
+
+    `rate` tokens are added per second up to `burst`; each request takes
+    one. A rate of 0 disables the limit.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[int] = None,
+        stats: Optional[KRSStats] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.burst = burst or max(int(rate), 1)
+        self.stats = stats or KRSStats()
+        self.clock = clock
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    def acquire(self, deadline: Optional[Deadline] = None):
+        """
+        Take a token, sleeping until one is available.
+
+        Raises:
+            DeadlineExceededError: if the token would only be available after the deadline
+        """
+        if self.rate <= 0:
+            return
+
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(
+                self._tokens + (now - self._updated) * self.rate, self.burst
+            )
+            self._updated = now
+            wait_time = max(-self._tokens + 1, 0) / self.rate
+            if deadline is not None and wait_time > deadline.remaining():
+                raise DeadlineExceededError("Rate limit leaves no time before deadline")
+            # Reserve the token now so concurrent callers queue up behind us
+            self._tokens -= 1
+
+        if wait_time > 0:
+            self.stats.incr("rate_limit_waits")
+            self.sleep(wait_time)
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency window (additive increase, multiplicative decrease).
+
+    Every call that succeeds within `latency_target` grows the window by
+    about one slot per window's worth of calls. An overload signal (one of
+    `overload_types`) multiplies it by `decrease`, at most once per
+    `latency_target` so a burst of failures counts as one signal.
+    """
+
+    def __init__(
+        self,
+        maximum: int,
+        overload_types: Tuple[Type[BaseException], ...],
+        minimum: int = 1,
+        initial: Optional[int] = None,
+        latency_target: float = 2.0,
+        decrease: float = 0.5,
+        stats: Optional[KRSStats] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maximum = maximum
+        self.minimum = min(minimum, maximum)
+        self.overload_types = overload_types
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.stats = stats or KRSStats()
+        self.clock = clock
+
+        self._condition = threading.Condition()
+        self._limit = float(initial or maximum)
+        self._in_flight = 0
+        self._last_decrease = None
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed in flight."""
+        with self._condition:
+            return int(self._limit)
+
+    def call(self, func: Callable[[], T], deadline: Optional[Deadline] = None) -> T:
+        """
+        Run func once a slot in the window is free.
+
+        Raises:
+            DeadlineExceededError: if no slot frees up before the deadline
+        """
+        self._acquire(deadline)
+        started = self.clock()
+        try:
+            result = func()
+        except self.overload_types:
+            self._release(overloaded=True, latency=self.clock() - started)
+            raise
+        except BaseException:
+            self._release(overloaded=False, latency=None)
+            raise
+        self._release(overloaded=False, latency=self.clock() - started)
+        return result
+
+    def _acquire(self, deadline: Optional[Deadline]):
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                timeout = deadline.remaining() if deadline is not None else None
+                if timeout == 0 or not self._condition.wait(timeout):
+                    raise DeadlineExceededError("No KRS slot free before deadline")
+            self._in_flight += 1
+
+    def _release(self, overloaded: bool, latency: Optional[float]):
+        with self._condition:
+            self._in_flight -= 1
+            now = self.clock()
+            if overloaded:
+                recent = (
+                    self._last_decrease is not None
+                    and now - self._last_decrease < self.latency_target
+                )
+                if not recent:
+                    self._last_decrease = now
+                    self._limit = max(self._limit * self.decrease, self.minimum)
+                    self.stats.incr("concurrency_decreases")
+            elif latency is not None and latency <= self.latency_target:
+                self._limit = min(self._limit + 1 / self._limit, self.maximum)
+            self._condition.notify_all()
+
+
+class Endpoint:
+    """Health and latency bookkeeping for one KRS API endpoint."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.total_latency = 0.0
+        self.disabled_until = 0.0
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        completed = self.requests - self.in_flight
+        return self.total_latency / completed if completed else None
+
+
+class EndpointPool:
+    """
+    Ordered list of equivalent KRS API endpoints with failover.
+
+    Each call goes to the healthy endpoint with the fewest calls in flight,
+    ties going to the earlier endpoint, so a preferred mirror takes all
+    traffic under light load and shares it under heavy load. A call failing
+    with one of `failure_types` is retried on the next endpoint; after
+    `failure_threshold` consecutive failures an endpoint is taken out of
+    rotation for `cooldown` seconds.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        failure_types: Tuple[Type[BaseException], ...],
+        failure_threshold: int = 3,
+        cooldown: float = 60.0,
+        stats: Optional[KRSStats] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.endpoints = [Endpoint(url) for url in dict.fromkeys(urls)]
+        self.failure_types = failure_types
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.stats = stats or KRSStats()
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable[[str], T]) -> T:
+        """Run func(url), failing over to the next endpoint on failure."""
+        tried = set()
+        while True:
+            endpoint = self._choose(tried)
+            started = self.clock()
+            try:
+                result = func(endpoint.url)
+            except self.failure_types:
+                self._release(endpoint, self.clock() - started, failed=True)
+                tried.add(endpoint.url)
+                if len(tried) == len(self.endpoints):
+                    raise
+                self.stats.incr("endpoint_failovers")
+                continue
+            except BaseException:
+                self._release(endpoint, self.clock() - started, failed=False)
+                raise
+            self._release(endpoint, self.clock() - started, failed=False)
+            return result
+
+    def _choose(self, exclude) -> Endpoint:
+        with self._lock:
+            now = self.clock()
+            candidates = [e for e in self.endpoints if e.url not in exclude]
+            healthy = [e for e in candidates if e.disabled_until <= now]
+            if not healthy:
+                # Everything is cooling down: use whichever comes back first
+                healthy = [min(candidates, key=lambda e: e.disabled_until)]
+            endpoint = min(healthy, key=lambda e: e.in_flight)
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _release(self, endpoint: Endpoint, latency: float, failed: bool):
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.total_latency += latency
+            if not failed:
+                endpoint.consecutive_failures = 0
+                return
+
+            endpoint.errors += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures >= self.failure_threshold:
+                endpoint.consecutive_failures = 0
+                endpoint.disabled_until = self.clock() + self.cooldown
+                self.stats.record_event(
+                    f"punkt końcowy KRS {endpoint.url} wyłączony na "
+                    f"{self.cooldown:.0f} s po {self.failure_threshold} błędach"
+                )
+
+    def summary_lines(self) -> List[str]:
+        """Per-endpoint request, error and latency statistics."""
+        with self._lock:
+            lines = []
+            for endpoint in self.endpoints:
+                latency = endpoint.mean_latency
+                average = f"{latency * 1000:.0f} ms" if latency is not None else "-"
+                lines.append(
+                    f"punkt końcowy {endpoint.url}: {endpoint.requests} zapytań, "
+                    f"{endpoint.errors} błędów, średni czas {average}"
+                )
+            return lines
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for and share its result (or exception). Once the call
+    finishes the key is forgotten, so later calls run the function again.
+    """
+
+    def __init__(self, stats: Optional[KRSStats] = None):
+        self.stats = stats or KRSStats()
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """Run func() once for all concurrent callers with the same key."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            self.stats.incr("coalesced_lookups")
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
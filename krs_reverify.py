@@ -0,0 +1,200 @@
+"""
+Rolling re-verification of the whole organization catalogue against KRS.
+
+Each run checks the entries that have gone longest without verification,
+up to a budget, and remembers when every entry was last verified in a
+JSON state file. Run nightly, it sweeps the catalogue every
+ceil(entries / budget) days and reports entries that drifted from KRS.
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from krs_stamps import KRSStamps
+from repository import FileSystemRepository
+from validators import KRSClient
+
+STATE_VERSION = 1
+
+OK = "ok"
+DRIFT = "drift"
+UNVERIFIED = "unverified"
+
+
+@dataclass
+class CatalogueEntry:
+    """KRS data of one organization file."""
+
+    file: str
+    krs: str
+    name: Optional[str]
+
+
+@dataclass
+class ReverificationResult:
+    """Outcome of one re-verification run."""
+
+    checked: List[Tuple[CatalogueEntry, str, str]] = field(default_factory=list)
+    total: int = 0
+
+    def with_status(self, status: str) -> List[Tuple[CatalogueEntry, str]]:
+        return [(entry, message) for entry, s, message in self.checked if s == status]
+
+
+def collect_entries(repository: FileSystemRepository) -> List[CatalogueEntry]:
+    """Return the KRS number and expected name of every organization file."""
+    entries = []
+    for organization, _ in repository.iter_organizations():
+        data = organization.data
+        if not isinstance(data, dict) or "krs" not in data:
+            continue
+        krs = str(data["krs"])
+        if re.fullmatch(r"\d{10}", krs):
+            name = Path(organization.path).name
+            entries.append(CatalogueEntry(name, krs, data.get("nazwa_w_krs")))
+    return sorted(entries, key=lambda entry: entry.file)
+
+
+def load_state(path: str) -> Dict[str, dict]:
+    """Load per-file verification records; a missing or foreign file starts afresh."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return {}
+    return state.get("entries", {})
+
+
+def save_state(path: str, records: Dict[str, dict]):
+    """Write the verification records atomically."""
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=output.parent, prefix=f".{output.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": STATE_VERSION, "entries": records},
+                f,
+                ensure_ascii=False,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, output)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def last_verified(entry: CatalogueEntry, records: Dict[str, dict]) -> float:
+    """When the entry, as it is now, was last verified (0 if never)."""
+    record = records.get(entry.file)
+    if record is None or (record.get("krs"), record.get("name")) != (
+        entry.krs,
+        entry.name,
+    ):
+        # New file, or its KRS data was edited since the last check
+        return 0.0
+    return record.get("verified_at") or 0.0
+
+
+def schedule(
+    entries: List[CatalogueEntry], records: Dict[str, dict], budget: int
+) -> List[CatalogueEntry]:
+    """Pick up to `budget` entries, least recently verified first."""
+    ordered = sorted(entries, key=lambda e: (last_verified(e, records), e.file))
+    return ordered[:budget]
+
+
+def reverify(
+    entries: List[CatalogueEntry],
+    records: Dict[str, dict],
+    client: KRSClient,
+    budget: int,
+    now: Optional[float] = None,
+    stamps: Optional[KRSStamps] = None,
+) -> ReverificationResult:
+    """
+    Check the most overdue entries against KRS and update `records` in place.
+
+    Names are compared by the client, exactly as during validation. Entries
+    that could not be checked (maintenance, timeouts) keep their previous
+    verification time, so they stay at the front of the queue. With `stamps`
+    the verification stamps of checked entries are refreshed or removed.
+    """
+    now = now if now is not None else time.time()
+    batch = schedule(entries, records, budget)
+    results = client.validate_many([(entry.krs, entry.name) for entry in batch])
+
+    current = {entry.file for entry in entries}
+    for file in list(records):
+        if file not in current:
+            del records[file]
+
+    result = ReverificationResult(total=len(entries))
+    for entry, (is_valid, message) in zip(batch, results):
+        if not is_valid:
+            status = DRIFT
+        elif message:
+            status = UNVERIFIED
+        else:
+            status = OK
+        result.checked.append((entry, status, message))
+        if status == UNVERIFIED:
+            continue
+        if stamps is not None:
+            if status == OK:
+                stamps.stamp(
+                    entry.krs, entry.name, datetime.fromtimestamp(now, timezone.utc)
+                )
+            else:
+                stamps.remove(entry.krs)
+        records[entry.file] = {
+            "krs": entry.krs,
+            "name": entry.name,
+            "verified_at": now,
+            "status": status,
+            "message": message,
+        }
+    return result
+
+
+def drift_report(result: ReverificationResult, records: Dict[str, dict]) -> dict:
+    """
+    Build the JSON drift report.
+
+    Lists the entries that failed this run and every entry still recorded
+    as drifted from an earlier run, so a report is complete on its own.
+    """
+    checked_now = {entry.file for entry, _, _ in result.checked}
+    drift = [
+        {"file": entry.file, "krs": entry.krs, "name": entry.name, "message": message}
+        for entry, message in result.with_status(DRIFT)
+    ]
+    drift.extend(
+        {
+            "file": file,
+            "krs": record["krs"],
+            "name": record["name"],
+            "message": record.get("message", ""),
+        }
+        for file, record in sorted(records.items())
+        if record.get("status") == DRIFT and file not in checked_now
+    )
+    return {
+        "total": result.total,
+        "checked": len(result.checked),
+        "drift": drift,
+        "unverified": [
+            {"file": entry.file, "krs": entry.krs, "message": message}
+            for entry, message in result.with_status(UNVERIFIED)
+        ],
+    }
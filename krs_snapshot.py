@@ -0,0 +1,119 @@
+"""
+Offline KRS snapshots: a compact, sorted binary KRS -> name index.
+Snapshots are memory-mapped and binary-searched, so opening one costs the
+same no matter how many entries it holds.
+
+File layout (little-endian):
+    header:  magic (8 bytes) | entry count (uint32)
+    index:   count x (krs as uint64 | name offset uint32 | name length uint32)
+    names:   UTF-8 encoded names, referenced by the index
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+MAGIC = b"KRSSNAP1"
+HEADER = struct.Struct("<8sI")
+RECORD = struct.Struct("<QII")
+
+
+class KRSSnapshotError(Exception):
+    """Raised when a snapshot or its source dump is malformed."""
+
+    pass
+
+
+def build_snapshot(lines: Iterable[str], output_path: str) -> int:
+    """
+    Build a snapshot file from a JSON-lines dump.
+
+    Each line must be an object with a "krs" key and a "nazwa" (or "name")
+    key. Later lines win over earlier ones for the same KRS number.
+
+    Returns:
+        Number of entries written
+    """
+    names: Dict[int, str] = {}
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            krs = str(record["krs"]).strip()
+            name = record.get("nazwa", record.get("name"))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise KRSSnapshotError(f"Nieprawidłowy wiersz {line_no}: {e}")
+        if not krs.isdigit() or len(krs) > 10 or name is None:
+            raise KRSSnapshotError(f"Nieprawidłowy wiersz {line_no}: {line}")
+        names[int(krs)] = str(name)
+
+    blob = bytearray()
+    index = bytearray()
+    for krs in sorted(names):
+        encoded = names[krs].encode("utf-8")
+        index += RECORD.pack(krs, len(blob), len(encoded))
+        blob += encoded
+
+    output = Path(output_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=output.parent, prefix=f".{output.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(names)))
+            f.write(index)
+            f.write(blob)
+        os.replace(tmp_path, output)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return len(names)
+
+
+class KRSSnapshot:
+    """Read-only, memory-mapped view of a snapshot file."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            raise KRSSnapshotError(f"Plik migawki KRS jest uszkodzony: {path}")
+        magic, self._count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise KRSSnapshotError(f"Nieznany format migawki KRS: {path}")
+        self._names_offset = HEADER.size + self._count * RECORD.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def lookup(self, krs: str) -> Optional[str]:
+        """Return the registry name for a KRS number, or None if not in the snapshot."""
+        if not krs.isdigit():
+            return None
+        target = int(krs)
+
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            key, offset, length = RECORD.unpack_from(
+                self._mmap, HEADER.size + middle * RECORD.size
+            )
+            if key < target:
+                low = middle + 1
+            elif key > target:
+                high = middle
+            else:
+                start = self._names_offset + offset
+                return self._mmap[start : start + length].decode("utf-8")
+        return None
+
+    def close(self):
+        self._mmap.close()
@@ -0,0 +1,145 @@
+"""
+KRS verification stamps: a machine-managed sidecar manifest, committed with
+the organization files, recording when each `krs`/`nazwa_w_krs` pair was
+last confirmed against the registry.
+
+A fresh stamp whose hash still matches the file's values lets validation
+skip the KRS lookup entirely, so changes that do not touch those fields
+need no network access.
+
+The manifest travels with the pull request being validated, so stamps are
+signed with an HMAC key kept out of reach of pull requests (a CI secret).
+Without the key a contributor cannot produce a stamp that validates, and
+stamps signed with another key are simply ignored. The signature covers the
+verification time too, so a stamp cannot be made fresh again by editing it.
+
+File layout (JSON, sorted for readable diffs):
+    {"version": 2,
+     "stamps": {"<krs>": {"hash": "<HMAC-SHA256>", "verified_at": "<ISO 8601 UTC>"}}}
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+STAMPS_VERSION = 3  # version 1 stamps were unkeyed, version 2 left the time unsigned
+DEFAULT_MAX_AGE_DAYS = 30
+KEY_ENVVAR = "KRS_STAMPS_KEY"
+
+
+def values_hash(krs: str, name: Optional[str], verified_at: str, key: bytes) -> str:
+    """Signed digest of a stamp; any edit to its values or time invalidates it."""
+    canonical = json.dumps([krs, name, verified_at], ensure_ascii=False)
+    return hmac.new(key, canonical.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class KRSStamps:
+    """Verification stamps loaded from (and saved to) a manifest file."""
+
+    def __init__(self, path: str, key: str, max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        if not key:
+            raise ValueError("A key is required to sign verification stamps")
+        self.path = Path(path)
+        self._key = key.encode("utf-8")
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.changed = False
+        self._lock = threading.Lock()
+        self._stamps: Dict[str, dict] = {}
+
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                try:
+                    manifest = json.load(f)
+                except ValueError:
+                    manifest = None  # a broken manifest only means no stamps
+            if isinstance(manifest, dict) and manifest.get("version") == STAMPS_VERSION:
+                stamps = manifest.get("stamps")
+                if isinstance(stamps, dict):
+                    self._stamps = stamps
+
+    def is_fresh(
+        self, krs: str, name: Optional[str], now: Optional[datetime] = None
+    ) -> bool:
+        """True if the pair was verified recently and has not been edited since."""
+        with self._lock:
+            stamp = self._stamps.get(krs)
+        if not isinstance(stamp, dict) or not isinstance(stamp.get("hash"), str):
+            return False
+        signed_at = stamp.get("verified_at")
+        if not isinstance(signed_at, str):
+            return False
+        expected = values_hash(krs, name, signed_at, self._key)
+        if not hmac.compare_digest(stamp["hash"], expected):
+            return False
+        try:
+            verified_at = datetime.fromisoformat(signed_at)
+            if verified_at.tzinfo is None:
+                raise ValueError("verification time without a timezone")
+        except ValueError:
+            return False
+        age = (now or _now()) - verified_at
+        # A stamp from the future is never fresh, however it got there
+        return 0 <= age.total_seconds() <= self.max_age_days * 86400
+
+    def skip(self, krs: str, name: Optional[str]) -> bool:
+        """Like is_fresh(), but counts the lookups saved for the run summary."""
+        if not self.is_fresh(krs, name):
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def stamp(self, krs: str, name: Optional[str], now: Optional[datetime] = None):
+        """Record that the pair has just been verified."""
+        verified_at = (now or _now()).isoformat(timespec="seconds")
+        with self._lock:
+            self._stamps[krs] = {
+                "hash": values_hash(krs, name, verified_at, self._key),
+                "verified_at": verified_at,
+            }
+            self.changed = True
+
+    def remove(self, krs: str):
+        """Forget the stamp of a pair that no longer verifies."""
+        with self._lock:
+            if self._stamps.pop(krs, None) is not None:
+                self.changed = True
+
+    def prune(self, keep: Iterable[str]):
+        """Drop the stamps of KRS numbers no longer used by any organization."""
+        keep = set(keep)
+        with self._lock:
+            for krs in [krs for krs in self._stamps if krs not in keep]:
+                del self._stamps[krs]
+                self.changed = True
+
+    def save(self):
+        """Write the manifest atomically, if anything changed."""
+        with self._lock:
+            if not self.changed:
+                return
+            manifest = {"version": STAMPS_VERSION, "stamps": self._stamps}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.path.parent, prefix=f".{self.path.name}."
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+                    f.write("\n")
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self.changed = False
@@ -0,0 +1,96 @@
+"""
+Run statistics for KRS lookups.
+Thread-safe counters shared by all KRS client components during a run.
+"""
+
+import threading
+from collections import Counter
+from typing import Dict, List
+
+# Human readable labels for counters, in display order
+COUNTER_LABELS = {
+    "lookups": "zapytania KRS",
+    "run_memo_hits": "powtórzone numery KRS obsłużone bez ponownego pobierania",
+    "snapshot_hits": "trafienia w migawce KRS",
+    "snapshot_misses": "numery KRS spoza migawki",
+    "cache_hits": "trafienia w pamięci podręcznej",
+    "cache_stale_hits": "przeterminowane wpisy odświeżane w tle",
+    "cache_misses": "chybienia pamięci podręcznej",
+    "cache_revalidated": "wpisy potwierdzone jako niezmienione (304)",
+    "cache_unchanged": "wpisy pobrane ponownie bez zmian (zgodny skrót treści)",
+    "cache_service_hits": "odpowiedzi ze wspólnej pamięci podręcznej KRS",
+    "cache_service_misses": "numery KRS nieznane wspólnej pamięci podręcznej",
+    "cache_service_errors": "błędy wspólnej pamięci podręcznej KRS",
+    "attempts": "próby pobrania z API KRS",
+    "replayed_responses": "odpowiedzi KRS odtworzone z nagrania",
+    "replay_misses": "zapytania KRS bez nagranej odpowiedzi",
+    "answers_registry_S": "odpowiedzi z rejestru stowarzyszeń (S)",
+    "answers_registry_P": "odpowiedzi z rejestru przedsiębiorców (P)",
+    "retries": "ponowione próby po błędach przejściowych",
+    "hedged_requests": "zapytania zdublowane z powodu wolnej odpowiedzi",
+    "hedge_wins": "zdublowane zapytania, które odpowiedziały pierwsze",
+    "rate_limit_waits": "zapytania wstrzymane przez limit żądań na sekundę",
+    "concurrency_decreases": "zmniejszenia okna współbieżności po przeciążeniu KRS",
+    "concurrency_window": "końcowe okno współbieżności KRS",
+    "deadline_exceeded": "numery KRS niesprawdzone przed upływem limitu czasu",
+    "endpoint_failovers": "przełączenia na zapasowy punkt końcowy KRS",
+    "http_requests": "żądania HTTP",
+    "http_connections": "nowe połączenia HTTP",
+    "http_connections_reused": "ponownie użyte połączenia HTTP",
+    "breaker_short_circuits": "zapytania pominięte przez wyłącznik KRS",
+}
+
+
+class KRSStats:
+    """Thread-safe counters and events collected while talking to KRS."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Counter = Counter()
+        self._events: List[str] = []
+
+    def incr(self, name: str, amount: int = 1):
+        """Increase a counter."""
+        with self._lock:
+            self._counters[name] += amount
+
+    def set(self, name: str, value: int):
+        """Overwrite a counter with an externally measured value."""
+        with self._lock:
+            self._counters[name] = value
+
+    def get(self, name: str) -> int:
+        """Return the current value of a counter."""
+        with self._lock:
+            return self._counters[name]
+
+    def record_event(self, message: str):
+        """Remember a noteworthy event to report in the summary."""
+        with self._lock:
+            self._events.append(message)
+
+    @property
+    def events(self) -> List[str]:
+        with self._lock:
+            return list(self._events)
+
+    def as_dict(self) -> Dict[str, int]:
+        """Return a snapshot of all counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def summary_lines(self) -> List[str]:
+        """Format non-zero counters and events for the run summary."""
+        counters = self.as_dict()
+        lines = [
+            f"{label}: {counters[name]}"
+            for name, label in COUNTER_LABELS.items()
+            if counters.get(name)
+        ]
+        lines.extend(
+            f"{name}: {value}"
+            for name, value in sorted(counters.items())
+            if name not in COUNTER_LABELS and value
+        )
+        lines.extend(self.events)
+        return lines
@@ -0,0 +1,250 @@
+"""
+Incremental extraction of selected fields from a streamed JSON document.
+Only the requested scalar values are kept; everything else is skipped and
+discarded, so memory use does not grow with the size of the document.
+"""
+
+import codecs
+import json
+import re
+from typing import Dict, Iterable, Sequence, Tuple
+
+Path = Tuple[str, ...]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_LITERAL = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null")
+_SKIPPABLE = re.compile(r'(?:[^"\[\]{}]+|"(?:[^"\\]|\\.)*")+', re.DOTALL)
+_DELIMITER = re.compile(r"[ \t\n\r,\]\}]")
+_ARRAY_ITEM = "[]"
+
+# Parser states
+_VALUE = "value"
+_KEY_OR_END = "key_or_end"
+_KEY = "key"
+_COLON = "colon"
+_COMMA_OR_END = "comma_or_end"
+_VALUE_OR_END = "value_or_end"
+_DONE = "done"
+
+
+class JSONStreamError(ValueError):
+    """Raised when the streamed document is not valid JSON."""
+
+    pass
+
+
+class ResponseTooLargeError(Exception):
+    """Raised when a streamed document exceeds the configured size cap."""
+
+    pass
+
+
+class _Frame:
+    __slots__ = ("is_object", "path", "key", "state")
+
+    def __init__(self, is_object: bool, path: Path):
+        self.is_object = is_object
+        self.path = path
+        self.key = _ARRAY_ITEM
+        self.state = _KEY_OR_END if is_object else _VALUE_OR_END
+
+
+class JSONProjector:
+    """
+    Push parser that records the scalar values found at the given paths.
+
+    Paths are tuples of object keys; array elements are matched by "[]".
+    Containers that cannot hold a requested path are skipped by bracket
+    matching alone, which is much cheaper than tokenizing them.
+    """
+
+    def __init__(self, paths: Iterable[Path]):
+        self.targets = set(paths)
+        self.values: Dict[Path, object] = {}
+        self._prefixes = {path[:i] for path in self.targets for i in range(len(path))}
+        self._prefixes.add(())
+        self._stack = []
+        self._state = _VALUE
+        self._skip_depth = 0
+        self._buffer = ""
+        self._position = 0
+
+    @property
+    def complete(self) -> bool:
+        """True once every target has been found or the document has ended."""
+        return self._state == _DONE or len(self.values) == len(self.targets)
+
+    def feed(self, text: str):
+        """Parse as much of the document as the buffered text allows."""
+        self._buffer = self._buffer[self._position :] + text
+        self._position = 0
+        self._parse(final=False)
+
+    def close(self):
+        """Signal the end of the document."""
+        self._parse(final=True)
+        if self._state != _DONE:
+            raise JSONStreamError("Niekompletny dokument JSON")
+
+    def _parse(self, final: bool):
+        buffer = self._buffer
+        while self._state != _DONE:
+            if self._skip_depth:
+                if not self._skip(buffer, final):
+                    return
+                self._value_done()
+                continue
+
+            self._position = _WHITESPACE.match(buffer, self._position).end()
+            if self._position >= len(buffer):
+                return
+
+            char = buffer[self._position]
+            frame = self._stack[-1] if self._stack else None
+            state = frame.state if frame else self._state
+
+            if state in (_KEY_OR_END, _VALUE_OR_END, _COMMA_OR_END) and char in "}]":
+                if char != ("}" if frame.is_object else "]"):
+                    raise JSONStreamError(f"Nieoczekiwany znak {char!r}")
+                self._position += 1
+                self._stack.pop()
+                self._value_done()
+                continue
+
+            if state == _COMMA_OR_END:
+                if char != ",":
+                    raise JSONStreamError(f"Oczekiwano ',' zamiast {char!r}")
+                self._position += 1
+                frame.state = _KEY if frame.is_object else _VALUE
+                continue
+
+            if state in (_KEY_OR_END, _KEY):
+                token = self._string_token(buffer, final)
+                if token is None:
+                    return
+                frame.key = json.loads(token) if "\\" in token else token[1:-1]
+                frame.state = _COLON
+                continue
+
+            if state == _COLON:
+                if char != ":":
+                    raise JSONStreamError(f"Oczekiwano ':' zamiast {char!r}")
+                self._position += 1
+                frame.state = _VALUE
+                continue
+
+            # Any value position
+            path = frame.path + (frame.key,) if frame else ()
+            if char == "{" or char == "[":
+                self._position += 1
+                if path in self._prefixes:
+                    self._stack.append(_Frame(char == "{", path))
+                else:
+                    self._skip_depth = 1
+                continue
+
+            if char == '"':
+                token = self._string_token(buffer, final)
+            else:
+                token = self._literal_token(buffer, final)
+            if token is None:
+                return
+
+            if path in self.targets:
+                self.values[path] = json.loads(token)
+            self._value_done()
+
+    def _skip(self, buffer: str, final: bool) -> bool:
+        """Skip the rest of an uninteresting container; False if more data is needed."""
+        while self._skip_depth:
+            match = _SKIPPABLE.match(buffer, self._position)
+            if match:
+                self._position = match.end()
+            if self._position >= len(buffer):
+                if final:
+                    raise JSONStreamError("Niekompletny dokument JSON")
+                return False
+
+            char = buffer[self._position]
+            if char == '"':
+                # String split across chunks
+                if final:
+                    raise JSONStreamError("Niezakończony ciąg znaków")
+                return False
+            self._skip_depth += 1 if char in "{[" else -1
+            self._position += 1
+        return True
+
+    def _string_token(self, buffer: str, final: bool):
+        if buffer[self._position] != '"':
+            raise JSONStreamError(f"Oczekiwano '\"' zamiast {buffer[self._position]!r}")
+        match = _STRING.match(buffer, self._position)
+        if match is None:
+            if final:
+                raise JSONStreamError("Niezakończony ciąg znaków")
+            return None
+        self._position = match.end()
+        return match.group()
+
+    def _literal_token(self, buffer: str, final: bool):
+        # A literal runs until the next delimiter, which may be in a later chunk
+        delimiter = _DELIMITER.search(buffer, self._position)
+        if delimiter is None and not final:
+            return None
+        end = delimiter.start() if delimiter else len(buffer)
+
+        match = _LITERAL.match(buffer, self._position)
+        if match is None or match.end() != end:
+            raise JSONStreamError(
+                f"Nieprawidłowa wartość {buffer[self._position : end][:20]!r}"
+            )
+        self._position = end
+        return match.group()
+
+    def _value_done(self):
+        if self._stack:
+            self._stack[-1].state = _COMMA_OR_END
+        else:
+            self._state = _DONE
+
+
+def project_stream(
+    chunks: Iterable[bytes], paths: Sequence[Path], max_bytes: int
+) -> Dict[Path, object]:
+    """
+    Extract the scalar values at `paths` from a streamed JSON document.
+
+    Parsing stops as soon as every path has been found; the remaining
+    chunks are drained without parsing so the connection can be reused.
+
+    Args:
+        chunks: Raw response body chunks
+        paths: Paths of the values to keep
+        max_bytes: Maximum number of body bytes to accept
+
+    Returns:
+        Mapping of path to value for every path found in the document
+
+    Raises:
+        JSONStreamError: if the document is not valid JSON
+        ResponseTooLargeError: if the body exceeds max_bytes
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    projector = JSONProjector(paths)
+    received = 0
+
+    for chunk in chunks:
+        received += len(chunk)
+        if received > max_bytes:
+            raise ResponseTooLargeError(
+                f"Odpowiedź przekracza limit {max_bytes} bajtów"
+            )
+        if not projector.complete:
+            projector.feed(decoder.decode(chunk))
+
+    if not projector.complete:
+        projector.feed(decoder.decode(b"", final=True))
+        projector.close()
+
+    return projector.values
@@ -0,0 +1,154 @@
+"""
+Bulk synchronisation of `nazwa_w_krs` with the names in the KRS registry.
+
+Files are edited as text, touching only the `nazwa_w_krs` line, so the rest
+of each file (comments, key order, quoting) is left exactly as it was. Every
+edit is checked by re-parsing the YAML before the file is replaced.
+"""
+
+import json
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import yaml
+
+FIELD = "nazwa_w_krs"
+
+# A top-level `key: value  # comment` line; quoted values may contain '#'
+_FIELD_LINE = re.compile(
+    rf"^(?P<key>{FIELD}:[ \t]*)"
+    r"(?P<value>\"(?:[^\"\\]|\\.)*\"|'(?:[^']|'')*'|[^#\r\n]*?)"
+    r"(?P<comment>[ \t]+#.*)?(?P<eol>\r?\n|$)"
+)
+_KRS_LINE = re.compile(r"^krs:[^\r\n]*(?P<eol>\r?\n|$)")
+
+
+@dataclass
+class NameChange:
+    """A `nazwa_w_krs` value to bring in line with the registry."""
+
+    path: Path
+    old: Optional[str]
+    new: str
+
+
+def names_match(current: Optional[str], registry: str) -> bool:
+    """Compare names the way validation does: trimmed and case-insensitive."""
+    return current is not None and current.strip().lower() == registry.strip().lower()
+
+
+def yaml_scalar(value: str, style: str = "") -> str:
+    """
+    Format a string as a one-line YAML scalar.
+
+    The original quoting style is kept when possible; plain scalars fall
+    back to double quotes if the value would not read back unchanged.
+    """
+    if style == "'":
+        return "'" + value.replace("'", "''") + "'"
+    if style == "" and value == value.strip() and "#" not in value:
+        try:
+            if yaml.safe_load(f"v: {value}") == {"v": value}:
+                return value
+        except yaml.YAMLError:
+            pass
+    # A JSON string is also a valid double-quoted YAML scalar
+    return json.dumps(value, ensure_ascii=False)
+
+
+def replace_name(text: str, name: str, add_missing: bool = False) -> Optional[str]:
+    """
+    Return `text` with the `nazwa_w_krs` value replaced by `name`.
+
+    With `add_missing` a `nazwa_w_krs` line is added after the `krs` line
+    of files that lack one. Returns None if the file cannot be edited
+    safely (e.g. a multi-line value), so it can be left for a human.
+    """
+    lines = text.splitlines(keepends=True)
+    for i, line in enumerate(lines):
+        match = _FIELD_LINE.match(line)
+        if not match:
+            continue
+        value = match.group("value")
+        following = lines[i + 1] if i + 1 < len(lines) else ""
+        if value.startswith(("|", ">")) or following[:1] in (" ", "\t"):
+            return None  # block scalar or a plain value continued on the next line
+        style = value[:1] if value[:1] in ("'", '"') else ""
+        lines[i] = (
+            match.group("key")
+            + yaml_scalar(name, style)
+            + (match.group("comment") or "")
+            + match.group("eol")
+        )
+        return "".join(lines)
+
+    if not add_missing:
+        return None
+    for i, line in enumerate(lines):
+        match = _KRS_LINE.match(line)
+        if match:
+            eol = match.group("eol") or "\n"
+            if not match.group("eol"):
+                lines[i] += eol
+            lines.insert(i + 1, f"{FIELD}: {yaml_scalar(name)}{eol}")
+            return "".join(lines)
+    return None
+
+
+def apply_change(change: NameChange, add_missing: bool = False) -> bool:
+    """
+    Rewrite one file atomically.
+
+    Returns:
+        False if the file was left untouched because it could not be
+        edited without risking other content
+    """
+    with open(change.path, encoding="utf-8", newline="") as f:
+        text = f.read()
+    updated = replace_name(text, change.new, add_missing)
+    if updated is None:
+        return False
+
+    # The edit must change exactly one value and nothing else
+    expected = yaml.safe_load(text)
+    expected[FIELD] = change.new
+    if yaml.safe_load(updated) != expected:
+        return False
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=change.path.parent, prefix=f".{change.path.name}."
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(updated)
+        os.chmod(tmp_path, os.stat(change.path).st_mode & 0o777)
+        os.replace(tmp_path, change.path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+
+def plan_changes(
+    documents: List[tuple], names: dict, add_missing: bool = False
+) -> List[NameChange]:
+    """
+    Work out which files need a new `nazwa_w_krs`.
+
+    Args:
+        documents: (path, krs, current nazwa_w_krs) for every organization
+        names: Result of RealKRSClient.lookup_names for their KRS numbers
+    """
+    changes = []
+    for path, krs, current in documents:
+        registry_name, _ = names.get(krs, (None, ""))
+        if registry_name is None or names_match(current, registry_name):
+            continue
+        if current is None and not add_missing:
+            continue
+        changes.append(NameChange(path, current, registry_name.strip()))
+    return changes
@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for KRS data used by the organization validator.
+"""
+
+import json
+import math
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import click
+import krs_reverify
+import krs_sync
+from krs_cache import KRSCache, DEFAULT_TTL
+from krs_resilience import Deadline
+from krs_snapshot import KRSSnapshotError, build_snapshot
+from krs_stamps import KEY_ENVVAR, KRSStamps
+from repository import FileSystemRepository
+from validators import KRSClientConfig, RealKRSClient
+
+
+@click.group()
+def cli():
+    """KRS maintenance tools."""
+
+
+@cli.command("build-snapshot")
+@click.argument("dump", type=click.File("r", encoding="utf-8"))
+@click.argument("output", type=click.Path(dir_okay=False))
+def build_snapshot_command(dump, output: str):
+    """Build an offline KRS snapshot from a JSON-lines DUMP of {"krs", "nazwa"}."""
+    started = time.monotonic()
+    try:
+        count = build_snapshot(dump, output)
+    except KRSSnapshotError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(
+        f"✅ Zapisano migawkę KRS: {output} "
+        f"({count} wpisów, {time.monotonic() - started:.2f} s)"
+    )
+
+
+def collect_krs_numbers(repository: FileSystemRepository) -> Tuple[List[str], int]:
+    """
+    Collect the distinct, well-formed KRS numbers of every organization file.
+
+    Returns:
+        Tuple of (sorted KRS numbers, number of files scanned)
+    """
+    numbers = set()
+    file_count = 0
+    for organization, _ in repository.iter_organizations():
+        file_count += 1
+        data = organization.data
+        if isinstance(data, dict) and "krs" in data:
+            krs = str(data["krs"])
+            if re.fullmatch(r"\d{10}", krs):
+                numbers.add(krs)
+    return sorted(numbers), file_count
+
+
+@cli.command("warm-krs")
+@click.option(
+    "--organizations-dir",
+    default="organizations",
+    show_default=True,
+    help="Directory containing organization YAML files",
+)
+@click.option(
+    "--krs-cache",
+    required=True,
+    type=click.Path(dir_okay=False),
+    help="SQLite file to fill with KRS lookups",
+)
+@click.option(
+    "--krs-cache-ttl",
+    default=DEFAULT_TTL,
+    type=float,
+    show_default=True,
+    help="Seconds an entry counts as fresh; fresh entries are not fetched again",
+)
+@click.option(
+    "--krs-concurrency",
+    default=KRSClientConfig.concurrency,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Maximum number of KRS lookups fetched at the same time",
+)
+@click.option(
+    "--krs-rate-limit",
+    default=KRSClientConfig.rate_limit,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Maximum KRS requests per second (0 disables the limit)",
+)
+def warm_krs_command(
+    organizations_dir: str,
+    krs_cache: str,
+    krs_cache_ttl: float,
+    krs_concurrency: int,
+    krs_rate_limit: float,
+):
+    """
+    Pre-populate the KRS cache with every KRS number in the organizations directory.
+
+    Results are written to the cache as they arrive, so an interrupted run
+    resumes where it stopped: numbers already cached are not fetched again.
+    """
+    numbers, file_count = collect_krs_numbers(FileSystemRepository(organizations_dir))
+    print(
+        f"🔥 Rozgrzewanie pamięci podręcznej KRS: {len(numbers)} numerów "
+        f"z {file_count} plików"
+    )
+
+    config = KRSClientConfig(
+        cache_path=krs_cache,
+        cache_ttl=krs_cache_ttl,
+        concurrency=krs_concurrency,
+        pool_size=max(krs_concurrency, KRSClientConfig.pool_size),
+        rate_limit=krs_rate_limit,
+    )
+    client = RealKRSClient(config)
+    started = time.monotonic()
+    try:
+        results = client.validate_many([(krs, None) for krs in numbers])
+    except KeyboardInterrupt:
+        print("⏹️  Przerwano – ponowne uruchomienie pobierze tylko brakujące numery")
+        sys.exit(130)
+    finally:
+        client.close()
+    elapsed = time.monotonic() - started
+
+    # A number is covered once the cache holds an answer for it, found or not,
+    # in whichever register it was found
+    cache = KRSCache(krs_cache, ttl=krs_cache_ttl)
+    failures = [
+        (krs, message)
+        for krs, (_, message) in zip(numbers, results)
+        if cache.find(krs) is None
+    ]
+    cache.close()
+
+    covered = len(numbers) - len(failures)
+    coverage = covered / len(numbers) * 100 if numbers else 100.0
+    already_cached = client.stats.get("cache_hits")
+    fetched = client.stats.get("lookups") - already_cached
+    print(
+        f"Pokrycie: {covered}/{len(numbers)} ({coverage:.1f}%), "
+        f"już w pamięci: {already_cached}, zapytania do API: {fetched}, "
+        f"błędy: {len(failures)}"
+    )
+    print(
+        f"Przepustowość: {fetched / elapsed if elapsed else 0:.1f} zapytań/s "
+        f"({fetched} w {elapsed:.2f} s)"
+    )
+
+    if failures:
+        print("❌ Nie udało się pobrać:")
+        for krs, message in failures:
+            print(f"     - {krs}: {message}")
+        sys.exit(1)
+    print("✅ Pamięć podręczna KRS jest rozgrzana")
+
+
+def parse_krs_line(line: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Parse "KRS" or "KRS<separator>expected name" from a spreadsheet export.
+
+    The separator is the first tab, semicolon or comma; the rest of the line
+    is the name. Leading zeros dropped by spreadsheets are restored.
+
+    Returns:
+        (krs, expected_name), or None for blank and comment lines
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    parts = re.split(r"[\t;,]", line, maxsplit=1)
+    krs = parts[0].strip().strip('"')
+    name = parts[1].strip().strip('"') if len(parts) > 1 else ""
+    if re.fullmatch(r"\d{1,10}", krs):
+        krs = krs.zfill(10)
+    return krs, name or None
+
+
+@cli.command("krs-check")
+@click.argument("input_file", default="-", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "--output",
+    default="-",
+    type=click.File("w", encoding="utf-8"),
+    show_default=True,
+    help="Where to write one JSON result per line",
+)
+@click.option(
+    "--krs-cache",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="SQLite file used to cache KRS lookups between runs",
+)
+@click.option(
+    "--krs-cache-ttl",
+    default=DEFAULT_TTL,
+    type=float,
+    show_default=True,
+    help="Seconds a cached KRS entry is considered fresh",
+)
+@click.option(
+    "--krs-concurrency",
+    default=KRSClientConfig.concurrency,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Maximum number of KRS lookups fetched at the same time",
+)
+@click.option(
+    "--krs-rate-limit",
+    default=KRSClientConfig.rate_limit,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Maximum KRS requests per second (0 disables the limit)",
+)
+@click.option(
+    "--deadline",
+    default=None,
+    type=click.FloatRange(min=0),
+    help="Total seconds allowed; numbers not checked in time are reported as warnings",
+)
+def krs_check_command(
+    input_file,
+    output,
+    krs_cache: Optional[str],
+    krs_cache_ttl: float,
+    krs_concurrency: int,
+    krs_rate_limit: float,
+    deadline: Optional[float],
+):
+    """
+    Check a list of KRS numbers, optionally with expected names.
+
+    Reads INPUT_FILE (default: stdin), one "KRS" or "KRS;name" per line, and
+    streams one JSON object per number as soon as it is checked. The summary
+    goes to stderr. Exits with status 1 if any number failed the check.
+    """
+    items = []
+    lines = []
+    invalid = 0
+    for line_no, line in enumerate(input_file, start=1):
+        parsed = parse_krs_line(line)
+        if parsed is None:
+            continue
+        krs, name = parsed
+        if not items and not invalid and not re.search(r"\d", krs):
+            continue  # header row of a spreadsheet export
+        if not re.fullmatch(r"\d{10}", krs):
+            invalid += 1
+            write_ndjson(
+                output,
+                {
+                    "line": line_no,
+                    "krs": krs,
+                    "name": name,
+                    "valid": False,
+                    "message": f"Nieprawidłowy format KRS: {krs} (oczekiwano 10 cyfr)",
+                },
+            )
+            continue
+        items.append(parsed)
+        lines.append(line_no)
+
+    config = KRSClientConfig(
+        cache_path=krs_cache,
+        cache_ttl=krs_cache_ttl,
+        concurrency=krs_concurrency,
+        pool_size=max(krs_concurrency, KRSClientConfig.pool_size),
+        rate_limit=krs_rate_limit,
+    )
+    client = RealKRSClient(config)
+    run_deadline = Deadline(deadline) if deadline is not None else None
+    counts = {"ok": 0, "warning": 0, "failed": invalid}
+    started = time.monotonic()
+    try:
+        for index, (is_valid, message) in client.validate_as_completed(
+            items, run_deadline
+        ):
+            status = "failed" if not is_valid else "warning" if message else "ok"
+            counts[status] += 1
+            krs, name = items[index]
+            write_ndjson(
+                output,
+                {
+                    "line": lines[index],
+                    "krs": krs,
+                    "name": name,
+                    "valid": is_valid,
+                    "message": message,
+                },
+            )
+    except KeyboardInterrupt:
+        click.echo("⏹️  Przerwano", err=True)
+        sys.exit(130)
+    finally:
+        client.close()
+    elapsed = time.monotonic() - started
+
+    checked = sum(counts.values())
+    click.echo(
+        f"Sprawdzono {checked} numerów KRS w {elapsed:.2f} s "
+        f"({len(items) / elapsed if elapsed else 0:.1f} numerów/s): "
+        f"zgodne {counts['ok']}, ostrzeżenia {counts['warning']}, "
+        f"błędy {counts['failed']}",
+        err=True,
+    )
+    for line in client.summary_lines():
+        click.echo(f"  - {line}", err=True)
+    if counts["failed"]:
+        sys.exit(1)
+
+
+def write_ndjson(output, record: dict):
+    """Write one JSON record per line and flush, so consumers see it right away."""
+    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    output.flush()
+
+
+@cli.command("sync-krs-names")
+@click.option(
+    "--organizations-dir",
+    default="organizations",
+    show_default=True,
+    help="Directory containing organization YAML files",
+)
+@click.option(
+    "--krs-cache",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="SQLite file used to cache KRS lookups between runs",
+)
+@click.option(
+    "--krs-cache-ttl",
+    default=DEFAULT_TTL,
+    type=float,
+    show_default=True,
+    help="Seconds a cached KRS entry is considered fresh",
+)
+@click.option(
+    "--krs-concurrency",
+    default=KRSClientConfig.concurrency,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Maximum number of KRS lookups fetched at the same time",
+)
+@click.option(
+    "--krs-rate-limit",
+    default=KRSClientConfig.rate_limit,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Maximum KRS requests per second (0 disables the limit)",
+)
+@click.option(
+    "--add-missing/--no-add-missing",
+    default=False,
+    show_default=True,
+    help="Also add nazwa_w_krs to files that do not have it",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Only print the changes, without writing any file",
+)
+def sync_krs_names_command(
+    organizations_dir: str,
+    krs_cache: Optional[str],
+    krs_cache_ttl: float,
+    krs_concurrency: int,
+    krs_rate_limit: float,
+    add_missing: bool,
+    dry_run: bool,
+):
+    """
+    Set nazwa_w_krs of every organization to its current name in KRS.
+
+    Only names that validation would reject are rewritten, and only the
+    nazwa_w_krs line of each file changes. Exits with status 1 if some
+    names could not be fetched or some files could not be edited safely.
+    """
+    repository = FileSystemRepository(organizations_dir)
+    documents = []
+    for organization, _ in repository.iter_organizations():
+        data = organization.data
+        if isinstance(data, dict) and re.fullmatch(r"\d{10}", str(data.get("krs"))):
+            documents.append(
+                (Path(organization.path), str(data["krs"]), data.get(krs_sync.FIELD))
+            )
+    documents.sort(key=lambda document: document[0])
+    print(f"🔄 Synchronizacja nazw z KRS: {len(documents)} plików")
+
+    config = KRSClientConfig(
+        cache_path=krs_cache,
+        cache_ttl=krs_cache_ttl,
+        concurrency=krs_concurrency,
+        pool_size=max(krs_concurrency, KRSClientConfig.pool_size),
+        rate_limit=krs_rate_limit,
+    )
+    client = RealKRSClient(config)
+    try:
+        names = client.lookup_names([krs for _, krs, _ in documents])
+    finally:
+        client.close()
+
+    changes = krs_sync.plan_changes(documents, names, add_missing)
+    applied, skipped = [], []
+    for change in changes:
+        if dry_run or krs_sync.apply_change(change, add_missing):
+            applied.append(change)
+        else:
+            skipped.append(change)
+    failures = [(krs, message) for krs, (name, message) in names.items() if not name]
+
+    found = sum(1 for _, krs, _ in documents if names[krs][0] is not None)
+    verb = "Do zmiany" if dry_run else "Zmieniono"
+    print(
+        f"{verb}: {len(applied)}, bez zmian: {found - len(changes)}, "
+        f"pominięte: {len(skipped)}, błędy KRS: {len(failures)}"
+    )
+    for change in applied:
+        old = f"'{change.old}'" if change.old is not None else "(brak)"
+        print(f"  ✏️  {change.path.name}: {old} → '{change.new}'")
+    for change in skipped:
+        print(
+            f"  ⚠️  {change.path.name}: nie można bezpiecznie zmienić "
+            f"{krs_sync.FIELD} – popraw ręcznie na '{change.new}'"
+        )
+    for krs, message in failures:
+        print(f"  ❌ {krs}: {message}")
+    if skipped or failures:
+        sys.exit(1)
+
+
+@cli.command("reverify-krs")
+@click.option(
+    "--organizations-dir",
+    default="organizations",
+    show_default=True,
+    help="Directory containing organization YAML files",
+)
+@click.option(
+    "--state",
+    "state_path",
+    required=True,
+    type=click.Path(dir_okay=False),
+    help="JSON file remembering when each entry was last verified",
+)
+@click.option(
+    "--budget",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Maximum number of entries checked in this run "
+    "[default: enough to cover the catalogue in --cycle-days runs]",
+)
+@click.option(
+    "--cycle-days",
+    default=30,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Number of daily runs in which the whole catalogue should be covered",
+)
+@click.option(
+    "--stamps",
+    "stamps_path",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Verification stamp manifest to refresh for the entries checked",
+)
+@click.option(
+    "--stamps-key",
+    envvar=KEY_ENVVAR,
+    default=None,
+    show_envvar=True,
+    help="Secret key the stamps are signed with (required with --stamps)",
+)
+@click.option(
+    "--report",
+    "report_path",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Write the drift report as JSON to this file",
+)
+@click.option(
+    "--krs-cache",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="SQLite KRS cache; its validators make unchanged entries cost a 304",
+)
+@click.option(
+    "--krs-concurrency",
+    default=KRSClientConfig.concurrency,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Maximum number of KRS lookups fetched at the same time",
+)
+@click.option(
+    "--krs-rate-limit",
+    default=KRSClientConfig.rate_limit,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Maximum KRS requests per second (0 disables the limit)",
+)
+def reverify_krs_command(
+    organizations_dir: str,
+    state_path: str,
+    budget: Optional[int],
+    cycle_days: int,
+    stamps_path: Optional[str],
+    stamps_key: Optional[str],
+    report_path: Optional[str],
+    krs_cache: Optional[str],
+    krs_concurrency: int,
+    krs_rate_limit: float,
+):
+    """
+    Re-check the KRS data of the entries verified longest ago.
+
+    Progress is saved in the state file, so repeated runs walk the whole
+    catalogue. Exits with status 1 while any entry has drifted from KRS.
+    """
+    if stamps_path and not stamps_key:
+        raise click.UsageError(f"--stamps wymaga klucza znaczników ({KEY_ENVVAR})")
+    entries = krs_reverify.collect_entries(FileSystemRepository(organizations_dir))
+    records = krs_reverify.load_state(state_path)
+    if budget is None:
+        budget = max(1, math.ceil(len(entries) / cycle_days))
+    print(
+        f"🔁 Ponowna weryfikacja KRS: {min(budget, len(entries))} z "
+        f"{len(entries)} wpisów (pełny obieg co ~"
+        f"{math.ceil(len(entries) / budget) if entries else 0} uruchomień)"
+    )
+
+    # Every check must reach the registry; a cache only adds conditional requests
+    config = KRSClientConfig(
+        cache_path=krs_cache,
+        cache_ttl=0,
+        cache_negative_ttl=0,
+        concurrency=krs_concurrency,
+        pool_size=max(krs_concurrency, KRSClientConfig.pool_size),
+        rate_limit=krs_rate_limit,
+    )
+    stamps = KRSStamps(stamps_path, stamps_key) if stamps_path else None
+    client = RealKRSClient(config)
+    try:
+        result = krs_reverify.reverify(entries, records, client, budget, stamps=stamps)
+    finally:
+        client.close()
+    krs_reverify.save_state(state_path, records)
+    if stamps is not None:
+        stamps.prune(entry.krs for entry in entries)
+        stamps.save()
+
+    report = krs_reverify.drift_report(result, records)
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    now = time.time()
+    verified = [r["verified_at"] for r in records.values() if r.get("verified_at")]
+    oldest = (now - min(verified)) / 86400 if verified else 0
+    print(
+        f"Sprawdzono: {report['checked']}, zgodne: "
+        f"{len(result.with_status(krs_reverify.OK))}, "
+        f"niezweryfikowane: {len(report['unverified'])}"
+    )
+    print(
+        f"Zweryfikowane kiedykolwiek: {len(verified)}/{len(entries)}, "
+        f"najstarsza weryfikacja: {oldest:.1f} dni temu"
+    )
+    for item in report["unverified"]:
+        print(f"  ⚠️  {item['file']}: {item['message']}")
+
+    if report["drift"]:
+        print(f"❌ Rozbieżności z KRS ({len(report['drift'])}):")
+        for item in report["drift"]:
+            print(f"     - {item['file']} (KRS {item['krs']}): {item['message']}")
+        sys.exit(1)
+    print("✅ Brak rozbieżności z KRS")
+
+
+if __name__ == "__main__":
+    cli()
@@ -3,11 +3,298 @@ Repository pattern for organization data access.
 Separates file I/O from validation logic for better testability.
 """
 
+import math
+import os
+import re
+import sys
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Sequence, Tuple, Optional
 import yaml
 
+from slug_index import IndexEntry, SlugIndex, content_hash
+
+# Longer strings (descriptions, URLs) are rarely repeated between files
+INTERN_MAX_LENGTH = 64
+
+
+def intern_strings(value):
+    """
+    Return `value` with dict keys and short strings interned.
+
+    Keys and values such as city names repeat across thousands of files;
+    interning stores each of them once instead of once per file.
+    """
+    if type(value) is str:
+        return sys.intern(value) if len(value) <= INTERN_MAX_LENGTH else value
+    if isinstance(value, dict):
+        return {intern_strings(k): intern_strings(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [intern_strings(item) for item in value]
+    return value
+
+
+# Plain `key:` lines at the start of a line; quoted or complex keys, merge
+# keys, directives and flow collections are left to the full parser
+_KEY = re.compile(r"[A-Za-z_][\w-]*:(?=[ \t]|$)")
+# A value that cannot continue on a following line: empty, a plain scalar
+# (only its first character decides how it is read), a closed quoted scalar
+# or a block indicator
+_ONE_LINE_VALUE = re.compile(
+    r"""(?:[^\s"'\[\]{}&*!|>#%@`?:-][^#]*?"""
+    r"""|"(?:[^"\\]|\\.)*"|'(?:[^']|'')*'|[|>][-+0-9]*)?"""
+    r"""(?:[ \t]+#.*|[ \t]*)"""
+)
+_PLAIN_SLUG = re.compile(r"([a-z0-9][a-z0-9-]*)(?:[ \t]+#.*|[ \t]*)")
+# Characters PyYAML also treats as line breaks; a lone \r is checked per line
+_OTHER_BREAKS = ("\x85", "\u2028", "\u2029")
+_RESOLVER = yaml.resolver.Resolver()
+
+
+def _one_line(content: str) -> bool:
+    """Check that a line cannot open a scalar continued on later lines."""
+    while content[:2] == "- " or content == "-":
+        content = content[2:].lstrip(" ")
+    key = _KEY.match(content)
+    if key:
+        content = content[key.end() :].lstrip(" \t")
+    value = content.rstrip(" \t")
+    if value.endswith(":") or ": " in value:
+        return False  # a nested mapping on one line
+    return _ONE_LINE_VALUE.fullmatch(content) is not None
+
+
+def _fit_line(
+    blocks: List[Tuple[int, bool]], indent: int, item: bool, opens: bool
+) -> bool:
+    """
+    Place a key (`item` False) or `- ` line among the open block collections.
+
+    `blocks` holds the (indentation, is a sequence) of each open collection,
+    innermost last; `opens` tells whether the previous line may own a nested
+    collection. Returns False for indentation the full parser would reject.
+    """
+    top_indent, top_item = blocks[-1]
+    if opens and (
+        indent > top_indent or (indent == top_indent and item and not top_item)
+    ):
+        blocks.append((indent, item))
+        return True
+    while len(blocks) > 1 and (
+        blocks[-1][0] > indent
+        or (blocks[-1] == (indent, not item) and blocks[-2][0] == indent)
+    ):
+        blocks.pop()
+    return blocks[-1] == (indent, item)
+
+
+def scan_slug(text: str, slug_field: str) -> Optional[dict]:
+    """
+    Read only the slug field of an organization document.
+
+    Lines are scanned up to the top-level slug key, whose value (a scalar or
+    a flow or block list) is then parsed on its own. Returns `{slug_field:
+    value}`, `{}` if the field is absent, or None whenever the document uses
+    anything the scanner cannot read safely (anchors, tags, multi-line or
+    flow values before the slug, tabs or uneven indentation before it,
+    repeated keys, several documents); the caller must then parse the whole
+    file.
+
+    Syntax errors after the slug are not detected.
+    """
+    if any(char in text for char in _OTHER_BREAKS):
+        return None
+    lines = text.split("\n")
+    started = False  # a document start marker may only come first
+    seen_key = False
+    blocks = [(0, False)]  # open block collections, see _fit_line
+    opens = False  # the previous line may own a more indented collection
+    scalar: Optional[Tuple[int, int]] = None  # (parent, text) indent of a block scalar
+    prefix = slug_field + ":"
+    for number, line in enumerate(lines):
+        line = line.removesuffix("\r")
+        if "\r" in line:
+            return None
+        content = line.lstrip(" \t")
+        indent = len(line) - len(content)
+        if "\t" in line[:indent]:
+            return None  # tabs cannot indent YAML
+        if scalar is not None:
+            parent, text_indent = scalar
+            if not content:
+                if indent and not text_indent:
+                    return None  # may be wider than the text that follows
+                continue
+            if indent > parent and indent >= text_indent:
+                scalar = (parent, text_indent or indent)
+                continue
+            scalar = None
+        if not content or content.startswith("#"):
+            continue
+        if indent and not seen_key:
+            return None  # the whole document is indented
+        if line == "---" and not started:
+            started = True
+            continue
+        started = seen_key = True
+        if not indent and line.startswith(prefix) and _KEY.match(line):
+            return _read_slug_value(lines, number, slug_field)
+
+        item = content[:2] == "- " or content == "-"
+        if not _one_line(content) or not _fit_line(blocks, indent, item, opens):
+            return None
+        parent = indent
+        if item:
+            rest = content[1:].lstrip(" ")
+            if rest.startswith("-"):
+                return None  # nested sequences on one line
+            indent += len(content) - len(rest)
+            content = rest
+        key = _KEY.match(content)
+        if key:
+            if item:
+                blocks.append((indent, False))  # a mapping inside the item
+            value = content[key.end() :].strip(" \t")
+        elif item:
+            value = content
+        else:
+            return None  # plain scalars may continue on later lines
+        opens = not value or value.startswith("#")
+        if value[:1] in ("|", ">"):
+            if any(char.isdigit() for char in value.split("#")[0]):
+                return None  # an explicit indentation indicator
+            scalar = (indent if key else parent, 0)
+    return {}
+
+
+def _read_slug_value(lines: List[str], number: int, slug_field: str) -> Optional[dict]:
+    """Parse the slug key found on line `number` together with its value."""
+    value = lines[number].removesuffix("\r")[len(slug_field) + 1 :].strip(" \t")
+    block_list = not value or value.startswith("#")
+    end = number + 1
+    indented = False
+    while end < len(lines):
+        line = lines[end].removesuffix("\r")
+        if line[:1] in (" ", "\t"):
+            indented = indented or bool(line.strip(" \t"))
+        elif line and not line.startswith("#"):
+            if not (block_list and (line[:2] == "- " or line == "-")):
+                break
+            indented = True
+        end += 1
+
+    rest = "\n".join(lines[end:])
+    repeated = re.compile(
+        rf"^(?:[\"']?{re.escape(slug_field)}[\"']?[ \t]*:|---|\.\.\.|%|\?)", re.M
+    )
+    if repeated.search(rest):
+        return None  # a later value would win, or several documents
+
+    plain = _PLAIN_SLUG.fullmatch(value)
+    if plain and not indented:
+        slug = plain.group(1)
+        if _RESOLVER.resolve(yaml.ScalarNode, slug, (True, False)) == (
+            "tag:yaml.org,2002:str"
+        ):
+            return {slug_field: slug}
+
+    # The exact source text of the key and its value, final line break included
+    snippet = "\n".join(lines[number:end]) + ("\n" if end < len(lines) else "")
+    if "*" in snippet or "!" in snippet:
+        return None  # aliases and tags may depend on the rest of the document
+    try:
+        data = yaml.safe_load(snippet)
+    except yaml.YAMLError:
+        return None
+    if not isinstance(data, dict) or list(data) != [slug_field]:
+        return None
+    return data
+
+
+class Organization:
+    """One parsed organization file, kept compact for large catalogues."""
+
+    __slots__ = ("path", "slugs", "data")
+
+    def __init__(
+        self, path: str, slugs: Tuple = (), data: Optional[dict] = None
+    ) -> None:
+        self.path = path
+        self.slugs = slugs
+        self.data = data
+
+    @classmethod
+    def from_data(
+        cls, path: str, data, slug_field: Optional[str], keep_data: bool = True
+    ) -> "Organization":
+        """
+        Build a record from a parsed YAML document.
+
+        Args:
+            slug_field: YAML field holding the slugs; None leaves them empty
+            keep_data: Keep the whole document; otherwise only the slugs are
+                kept, which is all the slug index needs
+        """
+        slugs: Tuple = ()
+        if data and slug_field is not None and slug_field in data:
+            slug_data = data[slug_field]
+            slugs = tuple(
+                intern_strings(slug)
+                for slug in (slug_data if isinstance(slug_data, list) else [slug_data])
+            )
+        return cls(path, slugs, intern_strings(data) if keep_data else None)
+
+    def __repr__(self) -> str:
+        return f"Organization({self.path!r}, slugs={self.slugs!r})"
+
+
+def _load_file(
+    yaml_file: Path,
+    path: str,
+    slug_field: Optional[str],
+    keep_data: bool,
+    scan_slugs: bool,
+    known: Optional[IndexEntry] = None,
+) -> Tuple[Organization, Optional[str], Optional[str]]:
+    """
+    Read one file for FileSystemRepository.load_organizations.
+
+    Module-level so that it can run in a worker process as well. If the
+    content hash equals that of the `known` index entry, its slugs are
+    reused without parsing.
+
+    Returns:
+        Tuple of (record, loading error message or None, content hash)
+    """
+    try:
+        with open(yaml_file, "rb") as f:
+            raw = f.read()
+        digest = content_hash(raw)
+        if known is not None and known.hash == digest and not keep_data:
+            return (
+                Organization(path, tuple(map(intern_strings, known.slugs))),
+                None,
+                digest,
+            )
+
+        # Newlines are translated as when reading the file in text mode
+        text = raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        data = scan_slug(text, slug_field) if not keep_data and scan_slugs else None
+        if data is None:
+            data = yaml.safe_load(text)
+        return Organization.from_data(path, data, slug_field, keep_data), None, digest
+    except Exception as e:
+        error = f"Błąd wczytywania pliku {yaml_file.name}: {e}"
+        return Organization(path), error, None
+
+
+def _stat(path: Path) -> Optional[os.stat_result]:
+    try:
+        return path.stat()
+    except OSError:
+        return None  # reported when the file is read
+
 
 class OrganizationRepository(ABC):
     """Abstract repository for organization data access."""
@@ -40,49 +327,242 @@ class OrganizationRepository(ABC):
         """
         pass
 
+    @abstractmethod
+    def iter_organizations(
+        self, slug_field: Optional[str] = None
+    ) -> Iterator[Tuple[Organization, Optional[str]]]:
+        """
+        Yield every organization one at a time, for audits of the whole catalogue.
+
+        Only the organization being processed is held in memory, however
+        large the catalogue is.
+
+        Args:
+            slug_field: YAML field name for organization slug; without it
+                the records carry no slugs
+
+        Yields:
+            Tuple of (record with the whole document, load error message or
+            None); records of files that failed to load have no data
+        """
+        pass
+
+    def load_organizations(
+        self, slug_field: str, files: Sequence[str]
+    ) -> Tuple[Dict[str, str], List[str], List[Organization]]:
+        """
+        Build the slug index and load the given files for validation.
+
+        Args:
+            slug_field: YAML field name for organization slug
+            files: Files whose full data is needed
+
+        Returns:
+            Tuple of (slug_to_filename_mapping, errors, records for `files`)
+        """
+        slug_to_file, errors = self.load_all_organizations(slug_field)
+        records = [
+            Organization.from_data(path, self.load_organization_data(path), slug_field)
+            for path in files
+        ]
+        return slug_to_file, errors, records
+
 
 class FileSystemRepository(OrganizationRepository):
     """File system implementation of organization repository."""
 
-    def __init__(self, organizations_dir: str):
+    def __init__(
+        self,
+        organizations_dir: str,
+        scan_slugs: bool = True,
+        processes: int = 1,
+        chunk_size: Optional[int] = None,
+        index_path: Optional[str] = None,
+    ):
         self.organizations_dir = Path(organizations_dir)
+        # Read only the slug of files whose documents are not needed
+        self.scan_slugs = scan_slugs
+        # Files are parsed on a process pool when processes > 1, sent to the
+        # workers in chunks of chunk_size (by default 4 chunks per process)
+        self.processes = processes
+        self.chunk_size = chunk_size
+        # Persistent slug index; the one used by the last load is kept for stats
+        self.index_path = index_path
+        self.slug_index: Optional[SlugIndex] = None
         self.reserved_slugs = {"info", "organizacje", "404"}
 
+    def organization_files(self) -> List[Path]:
+        """List the organization YAML files in the organizations directory."""
+        if not self.organizations_dir.exists():
+            return []
+
+        # One directory scan, in the order of glob("*.yaml") + glob("*.yml")
+        with os.scandir(self.organizations_dir) as entries:
+            names = [entry.name for entry in entries]
+        return [
+            self.organizations_dir / name
+            for suffix in (".yaml", ".yml")
+            for name in names
+            if name.endswith(suffix)
+        ]
+
+    def iter_organization_files(self) -> Iterator[Path]:
+        """Yield the organization files lazily, in the order of organization_files."""
+        if not self.organizations_dir.exists():
+            return
+
+        for suffix in (".yaml", ".yml"):
+            with os.scandir(self.organizations_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(suffix):
+                        yield self.organizations_dir / entry.name
+
+    def iter_organizations(
+        self, slug_field: Optional[str] = None
+    ) -> Iterator[Tuple[Organization, Optional[str]]]:
+        """Parse and yield the organization files one at a time."""
+        for yaml_file in self.iter_organization_files():
+            path = str(self.organizations_dir / yaml_file.name)
+            organization, error, _ = _load_file(
+                yaml_file, path, slug_field, keep_data=True, scan_slugs=False
+            )
+            yield organization, error
+
     def load_all_organizations(
         self, slug_field: str
     ) -> Tuple[Dict[str, str], List[str]]:
         """Load all organization files and return slug to filename mapping with errors."""
+        slug_to_file, errors, _ = self.load_organizations(slug_field, [])
+        return slug_to_file, errors
+
+    def load_organizations(
+        self, slug_field: str, files: Sequence[str]
+    ) -> Tuple[Dict[str, str], List[str], List[Organization]]:
+        """
+        Parse every organization file once.
+
+        The same pass builds the slug index and keeps the documents of
+        `files`; of the other files only the slugs are read, with scan_slug
+        where possible. Files outside the organizations directory are loaded
+        separately.
+        """
         slug_to_file = {}
         errors = []
+        wanted = {os.path.abspath(path): i for i, path in enumerate(files)}
+        records: List[Optional[Organization]] = [None] * len(files)
 
-        if not self.organizations_dir.exists():
-            return slug_to_file, errors
+        yaml_files = self.organization_files()
+        indexes = [wanted.get(os.path.abspath(f)) for f in yaml_files]
+        slug_index = stats = None
+        if self.index_path is not None:
+            slug_index = self.slug_index = SlugIndex(self.index_path, slug_field)
+            stats = [_stat(yaml_file) for yaml_file in yaml_files]
 
-        yaml_files = list(self.organizations_dir.glob("*.yaml")) + list(
-            self.organizations_dir.glob("*.yml")
+        # Files untouched since they were indexed are not opened at all
+        loaded: List[Optional[Tuple]] = [None] * len(yaml_files)
+        pending = []
+        known: List[Optional[IndexEntry]] = []
+        for i, yaml_file in enumerate(yaml_files):
+            entry = slug_index.get(yaml_file.name) if slug_index else None
+            if indexes[i] is not None:
+                entry = None  # the whole document is needed anyway
+            stat = stats[i] if stats else None
+            if entry is not None and stat is not None:
+                if entry.matches(stat):
+                    path = str(self.organizations_dir / yaml_file.name)
+                    slugs = tuple(map(intern_strings, entry.slugs))
+                    loaded[i] = (Organization(path, slugs), None, entry.hash)
+                    continue
+                if entry.size != stat.st_size:
+                    entry = None  # changed for sure; no point comparing hashes
+            pending.append(i)
+            known.append(entry)
+        results = self._load_files(
+            [yaml_files[i] for i in pending],
+            slug_field,
+            [indexes[i] is not None for i in pending],
+            known,
         )
-        for yaml_file in yaml_files:
+        for i, result in zip(pending, results):
+            loaded[i] = result
+
+        # Merged in directory order, so messages match however files were read
+        for i, (yaml_file, index, (organization, error, digest)) in enumerate(
+            zip(yaml_files, indexes, loaded)
+        ):
+            path = organization.path
+            if error is not None:
+                errors.append(error)
             try:
-                with open(yaml_file, "r", encoding="utf-8") as f:
-                    data = yaml.safe_load(f)
-                    if data and slug_field in data:
-                        slug_data = data[slug_field]
-                        slugs = (
-                            slug_data if isinstance(slug_data, list) else [slug_data]
+                for slug in organization.slugs:
+                    if slug in slug_to_file:
+                        errors.append(
+                            f"Duplikat {slug_field} '{slug}' znaleziony w {yaml_file.name} i {slug_to_file[slug]}"
                         )
-                        for slug in slugs:
-                            if slug in slug_to_file:
-                                errors.append(
-                                    f"Duplikat {slug_field} '{slug}' znaleziony w {yaml_file.name} i {slug_to_file[slug]}"
-                                )
-                            else:
-                                slug_to_file[slug] = str(
-                                    self.organizations_dir / yaml_file.name
-                                )
+                    else:
+                        slug_to_file[slug] = path
             except Exception as e:
                 errors.append(f"Błąd wczytywania pliku {yaml_file.name}: {e}")
+                organization = Organization(path)
+                error = str(e)
+            if slug_index is not None:
+                if error is None and stats[i] is not None:
+                    slug_index.update(
+                        yaml_file.name, stats[i], digest, organization.slugs
+                    )
+                else:
+                    slug_index.remove(yaml_file.name)
+            if index is not None:
+                organization.path = files[index]
+                records[index] = organization
 
-        return slug_to_file, errors
+        if slug_index is not None:
+            rehashed = sum(
+                entry is not None and entry.hash == digest
+                for entry, (_, _, digest) in zip(known, results)
+            )
+            slug_index.reused = len(yaml_files) - len(pending) + rehashed
+            slug_index.parsed = len(pending) - rehashed
+            slug_index.retain(yaml_file.name for yaml_file in yaml_files)
+            slug_index.save()
+
+        for i, path in enumerate(files):
+            if records[i] is None:
+                records[i] = Organization.from_data(
+                    path, self.load_organization_data(path), slug_field
+                )
+
+        return slug_to_file, errors, records
+
+    def _load_files(
+        self,
+        yaml_files: List[Path],
+        slug_field: str,
+        keep: List[bool],
+        known: List[Optional[IndexEntry]],
+    ) -> List[Tuple[Organization, Optional[str], Optional[str]]]:
+        """Read files in order, in this process or on a process pool."""
+        arguments = (
+            yaml_files,
+            [str(self.organizations_dir / f.name) for f in yaml_files],
+            [slug_field] * len(yaml_files),
+            keep,
+            [self.scan_slugs] * len(yaml_files),
+            known,
+        )
+        if self.processes <= 1 or len(yaml_files) < 2:
+            return list(map(_load_file, *arguments))
+
+        chunk_size = self.chunk_size or max(
+            1, math.ceil(len(yaml_files) / (self.processes * 4))
+        )
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            loaded = list(executor.map(_load_file, *arguments, chunksize=chunk_size))
+        # Strings unpickled from workers are separate copies; share them again
+        for organization, _, _ in loaded:
+            organization.slugs = tuple(map(intern_strings, organization.slugs))
+            organization.data = intern_strings(organization.data)
+        return loaded
 
     def load_organization_data(self, file_path: str) -> Optional[dict]:
         """Load organization data from a specific file."""
@@ -0,0 +1,128 @@
+"""
+Persistent slug index: the slugs of every organization file, kept between
+runs so that unchanged files need not be read again.
+
+A file whose mtime and size match its entry is trusted without being opened.
+If only the mtime changed (e.g. after a fresh checkout) the file is read and
+hashed, and parsed only if the hash differs too.
+
+File layout (JSON; a cache, safe to delete):
+    {"version": 1, "slug_field": "adres",
+     "files": {"<file name>": {"mtime_ns": 0, "size": 0,
+                               "hash": "<sha256>", "slugs": ["..."]}}}
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+INDEX_VERSION = 1
+
+
+def content_hash(raw: bytes) -> str:
+    """Digest of a file's bytes, compared when only its mtime changed."""
+    return hashlib.sha256(raw).hexdigest()
+
+
+@dataclass
+class IndexEntry:
+    """What the index remembers about one organization file."""
+
+    mtime_ns: int
+    size: int
+    hash: str
+    slugs: List[str]
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """True if the file looks untouched since the entry was written."""
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+
+class SlugIndex:
+    """Slug index loaded from (and saved to) a JSON file."""
+
+    def __init__(self, path: str, slug_field: str):
+        self.path = Path(path)
+        self.slug_field = slug_field
+        self.changed = False
+        self.reused = 0  # files answered from the index without parsing
+        self.parsed = 0
+        self._entries: Dict[str, IndexEntry] = {}
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if not isinstance(manifest, dict):
+                raise ValueError("the index is not a JSON object")
+            if (
+                manifest.get("version") == INDEX_VERSION
+                and manifest.get("slug_field") == slug_field
+            ):
+                files = manifest.get("files", {})
+                if not isinstance(files, dict) or not all(
+                    isinstance(entry, dict) for entry in files.values()
+                ):
+                    raise ValueError("malformed index entries")
+                self._entries = {
+                    name: IndexEntry(**entry) for name, entry in files.items()
+                }
+        except (OSError, ValueError, TypeError):
+            # A missing or unreadable index only means a full rebuild
+            self.changed = True
+
+    def get(self, name: str) -> Optional[IndexEntry]:
+        """Return the entry for a file name, if any."""
+        return self._entries.get(name)
+
+    def update(self, name: str, stat: os.stat_result, digest: str, slugs) -> None:
+        """
+        Remember the slugs read from a file.
+
+        Only string slugs are stored; files with other slug values (or that
+        failed to load) are left out so they are read and reported every run.
+        """
+        if not all(isinstance(slug, str) for slug in slugs):
+            self.remove(name)
+            return
+        entry = IndexEntry(stat.st_mtime_ns, stat.st_size, digest, list(slugs))
+        if self._entries.get(name) != entry:
+            self._entries[name] = entry
+            self.changed = True
+
+    def remove(self, name: str) -> None:
+        """Forget a file."""
+        if self._entries.pop(name, None) is not None:
+            self.changed = True
+
+    def retain(self, names: Iterable[str]) -> None:
+        """Drop the entries of files that no longer exist."""
+        keep = set(names)
+        for name in [name for name in self._entries if name not in keep]:
+            del self._entries[name]
+            self.changed = True
+
+    def save(self) -> None:
+        """Write the index atomically, if anything changed."""
+        if not self.changed:
+            return
+        manifest = {
+            "version": INDEX_VERSION,
+            "slug_field": self.slug_field,
+            "files": {name: asdict(entry) for name, entry in self._entries.items()},
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{self.path.name}."
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.changed = False
@@ -2,8 +2,11 @@
 Pytest configuration and shared fixtures for organization validation tests.
 """
 
+import json
+import threading
 import pytest
-from typing import Dict, List, Tuple, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Tuple, Optional, Sequence
 from pathlib import Path
 
 # Import the modules we're testing
@@ -11,7 +14,10 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from repository import OrganizationRepository
+import krs_puller
+from repository import Organization, OrganizationRepository
+
+KRS_API = "https://api-krs.ms.gov.pl/api/krs/OdpisAktualny/"
 
 
 class MockRepository(OrganizationRepository):
@@ -46,6 +52,15 @@ class MockRepository(OrganizationRepository):
         filename = Path(file_path).name
         return self.file_data.get(filename)
 
+    def iter_organizations(
+        self, slug_field: Optional[str] = None
+    ) -> Iterator[Tuple[Organization, Optional[str]]]:
+        """Yield mock file data, then mock loading errors."""
+        for filename, data in self.file_data.items():
+            yield Organization.from_data(filename, data, slug_field), None
+        for error in self.load_errors:
+            yield Organization(""), error
+
 
 class MockKRSClient:
     """Mock KRS client for testing."""
@@ -53,6 +68,8 @@ class MockKRSClient:
     def __init__(self):
         self.responses = {}  # krs -> (is_valid, message) mapping
         self.default_response = (True, "")
+        self.batches = []  # recorded validate_many calls
+        self.deadlines = []  # deadline passed with each batch
 
     def set_response(self, krs: str, is_valid: bool, message: str = ""):
         """Set mock response for specific KRS number."""
@@ -63,10 +80,136 @@ class MockKRSClient:
         self.default_response = (is_valid, message)
 
     def validate_krs(
-        self, krs: str, expected_name: Optional[str] = None
+        self, krs: str, expected_name: Optional[str] = None, deadline=None
     ) -> Tuple[bool, str]:
         """Return mock KRS validation response."""
-        return self.responses.get(krs, self.default_response)
+        return self.validate_many([(krs, expected_name)], deadline)[0]
+
+    def validate_many(
+        self, items: Sequence[Tuple[str, Optional[str]]], deadline=None
+    ) -> List[Tuple[bool, str]]:
+        """Return mock KRS validation responses in input order."""
+        self.batches.append(list(items))
+        self.deadlines.append(deadline)
+        return [self.responses.get(krs, self.default_response) for krs, _ in items]
+
+
+def krs_url(krs: str, registry: str = "S") -> str:
+    """URL of a lookup in the real KRS API, as mocked with responses."""
+    return f"{KRS_API}{krs}?rejestr={registry}&format=json"
+
+
+def krs_payload(name: str) -> dict:
+    """Minimal OdpisAktualny document naming the organization."""
+    return {"odpis": {"dane": {"dzial1": {"danePodmiotu": {"nazwa": name}}}}}
+
+
+def krs_document(name: str) -> bytes:
+    """krs_payload() encoded as a response body."""
+    return json.dumps(krs_payload(name)).encode()
+
+
+class FakeClock:
+    """Manual clock for time-based logic; sleep() only moves it forward."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class StubKRSServer:
+    """Local stand-in for the KRS HTTP API, served from a background thread."""
+
+    def __init__(self):
+        self.routes: Dict[str, Callable] = {}
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        self.default_handler: Optional[Callable] = None
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests.append((self.path, dict(self.headers)))
+                handler = stub.routes.get(self.path.split("?")[0])
+                handler = handler or stub.default_handler
+                if handler is None:
+                    status, body, headers = 404, b"", {}
+                else:
+                    status, body, headers = handler(self)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def add_krs(self, krs: str, name: str, prefix: str = "/api/krs/OdpisAktualny/"):
+        """Serve an OdpisAktualny document with the given organization name."""
+        body = krs_document(name)
+        self.routes[f"{prefix}{krs}"] = lambda request: (
+            200,
+            body,
+            {"Content-Type": "application/json"},
+        )
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def krs_server():
+    """Provide a running local stand-in for the KRS API."""
+    server = StubKRSServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def registry(krs_server, monkeypatch):
+    """Point KRS lookups at the local stand-in server."""
+    monkeypatch.setattr(
+        krs_puller, "KRS_API_URL", f"{krs_server.base_url}/api/krs/OdpisAktualny/"
+    )
+    return krs_server
+
+
+@pytest.fixture
+def krs_server_factory():
+    """Start any number of local KRS stand-ins, e.g. a mirror and an origin."""
+    servers = []
+
+    def start() -> StubKRSServer:
+        server = StubKRSServer()
+        server.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
 
 
 @pytest.fixture
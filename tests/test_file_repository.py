@@ -3,7 +3,10 @@ Tests for FileSystemRepository.
 """
 
 import tempfile
+import tracemalloc
 from pathlib import Path
+
+import pytest
 import yaml
 
 from repository import FileSystemRepository
@@ -315,3 +318,210 @@ class TestFileSystemRepositoryWithListSlugs:
 
             assert len(errors) == 0
             assert len(organizations) == 0
+
+
+class TestSinglePassLoading:
+    """Test building the slug index and loading documents in one pass."""
+
+    def write_organizations(self, temp_dir, count):
+        for i in range(count):
+            with open(Path(temp_dir) / f"org{i}.yaml", "w") as f:
+                yaml.dump(
+                    {
+                        "nazwa": f"Org {i}",
+                        "adres": f"org-{i}",
+                        "dostawa": {"miasto": "Wrocław"},
+                    },
+                    f,
+                    allow_unicode=True,
+                )
+
+    @pytest.mark.parametrize("scan_slugs, parses", [(False, 5), (True, 2)])
+    def test_each_file_is_parsed_once(self, monkeypatch, scan_slugs, parses):
+        """Test that no file is parsed twice and others may be only scanned."""
+        parsed = []
+        safe_load = yaml.safe_load
+        monkeypatch.setattr(
+            yaml, "safe_load", lambda stream: parsed.append(stream) or safe_load(stream)
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.write_organizations(temp_dir, 5)
+            files = [f"{temp_dir}/org1.yaml", f"{temp_dir}/org3.yaml"]
+
+            repository = FileSystemRepository(temp_dir, scan_slugs=scan_slugs)
+            organizations, errors, records = repository.load_organizations(
+                "adres", files
+            )
+
+            assert len(parsed) == parses
+            assert errors == []
+            assert len(organizations) == 5
+            assert [record.path for record in records] == files
+            assert [record.data["nazwa"] for record in records] == ["Org 1", "Org 3"]
+
+    def test_only_requested_documents_are_kept(self):
+        """Test that other files contribute slugs but no documents."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.write_organizations(temp_dir, 2)
+            outside = Path(temp_dir) / "nested"
+            outside.mkdir()
+            with open(outside / "extra.yaml", "w") as f:
+                yaml.dump({"nazwa": "Extra", "adres": "extra"}, f)
+
+            repository = FileSystemRepository(temp_dir)
+            _, _, records = repository.load_organizations(
+                "adres", [f"{temp_dir}/org0.yaml", str(outside / "extra.yaml")]
+            )
+
+            assert records[0].slugs == ("org-0",)
+            assert records[1].data == {"nazwa": "Extra", "adres": "extra"}
+            assert not hasattr(records[0], "__dict__")
+
+    def test_repeated_strings_are_shared(self):
+        """Test that equal short strings from different files are one object."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.write_organizations(temp_dir, 2)
+            files = [f"{temp_dir}/org0.yaml", f"{temp_dir}/org1.yaml"]
+
+            repository = FileSystemRepository(temp_dir)
+            _, _, (first, second) = repository.load_organizations("adres", files)
+
+            assert first.data["dostawa"]["miasto"] is second.data["dostawa"]["miasto"]
+
+
+class TestProcessPoolLoading:
+    """Test parsing files on a process pool."""
+
+    def write_catalogue(self, directory):
+        for i in range(40):
+            (directory / f"org{i:02d}.yaml").write_text(
+                f"nazwa: Org {i}\nadres: [org-{i}, wspolny-{i % 7}]\n"
+                "dostawa:\n  miasto: Wrocław\n",
+                encoding="utf-8",
+            )
+        (directory / "broken.yaml").write_text("adres: [\n", encoding="utf-8")
+        (directory / "nested.yaml").write_text("adres: [[a]]\n", encoding="utf-8")
+
+    def test_same_result_as_serial(self, tmp_path):
+        """Test that slugs, duplicate messages and records match a serial run."""
+        self.write_catalogue(tmp_path)
+        files = [str(tmp_path / "org03.yaml"), str(tmp_path / "org17.yaml")]
+
+        serial = FileSystemRepository(tmp_path).load_organizations("adres", files)
+        parallel = FileSystemRepository(
+            tmp_path, processes=2, chunk_size=3
+        ).load_organizations("adres", files)
+
+        assert parallel[0] == serial[0]
+        assert parallel[1] == serial[1]
+        assert len(serial[1]) == 35  # 33 duplicates and 2 unreadable files
+        assert [r.data for r in parallel[2]] == [r.data for r in serial[2]]
+        assert parallel[2][0].path == files[0]
+
+    def test_worker_strings_are_interned(self, tmp_path):
+        """Test that records from different workers share repeated strings."""
+        self.write_catalogue(tmp_path)
+        files = [str(tmp_path / "org00.yaml"), str(tmp_path / "org39.yaml")]
+
+        repository = FileSystemRepository(tmp_path, processes=2, chunk_size=1)
+        _, _, (first, last) = repository.load_organizations("adres", files)
+
+        assert first.data["dostawa"]["miasto"] is last.data["dostawa"]["miasto"]
+
+
+class TestStreamingOrganizations:
+    """Test iterating over the whole catalogue one document at a time."""
+
+    def write_catalogue(self, directory, count, products=1):
+        for i in range(count):
+            document = {
+                "nazwa": f"Org {i}",
+                "adres": f"org-{i}",
+                "produkty": [
+                    {"nazwa": f"Produkt {i}-{j}", "link": f"https://sklep.pl/{i}/{j}"}
+                    for j in range(products)
+                ],
+            }
+            with open(directory / f"org{i:02d}.yaml", "w") as f:
+                yaml.dump(document, f, allow_unicode=True)
+
+    def test_yields_every_file_in_directory_order(self, tmp_path):
+        """Test that records come in the order of organization_files."""
+        self.write_catalogue(tmp_path, 3)
+        (tmp_path / "broken.yml").write_text("adres: [\n", encoding="utf-8")
+        repository = FileSystemRepository(tmp_path)
+
+        results = list(repository.iter_organizations("adres"))
+
+        assert [org.path for org, _ in results] == [
+            str(path) for path in repository.organization_files()
+        ]
+        slugs = {Path(org.path).name: org.slugs for org, _ in results[:3]}
+        assert slugs == {f"org0{i}.yaml": (f"org-{i}",) for i in range(3)}
+        assert all(org.data["produkty"] for org, _ in results[:3])
+        assert [error is None for _, error in results] == [True, True, True, False]
+        assert "broken.yml" in results[3][1] and results[3][0].data is None
+
+    def test_without_slug_field(self, tmp_path, mock_repository):
+        """Test that records carry no slugs when no slug field is given."""
+        self.write_catalogue(tmp_path, 2)
+        mock_repository.set_file_data("a.yaml", {"adres": "a"})
+
+        for repository in (FileSystemRepository(tmp_path), mock_repository):
+            results = list(repository.iter_organizations())
+
+            assert results and all(error is None for _, error in results)
+            assert all(org.slugs == () and org.data for org, _ in results)
+
+    def test_is_lazy(self, tmp_path, monkeypatch):
+        """Test that a file is parsed only when its record is requested."""
+        self.write_catalogue(tmp_path, 3)
+        parsed = []
+        safe_load = yaml.safe_load
+        monkeypatch.setattr(
+            yaml, "safe_load", lambda stream: parsed.append(stream) or safe_load(stream)
+        )
+
+        organizations = FileSystemRepository(tmp_path).iter_organizations("adres")
+        assert parsed == []
+        next(organizations)
+        assert len(parsed) == 1
+
+    def test_mock_repository(self, mock_repository):
+        """Test the in-memory implementation used by the other tests."""
+        mock_repository.set_file_data("a.yaml", {"adres": "a"})
+        mock_repository.set_load_errors(["Błąd wczytywania b.yaml"])
+
+        results = list(mock_repository.iter_organizations("adres"))
+
+        assert [(org.path, org.data, error) for org, error in results] == [
+            ("a.yaml", {"adres": "a"}, None),
+            ("", None, "Błąd wczytywania b.yaml"),
+        ]
+
+    def test_peak_memory_does_not_grow_with_catalogue(self, tmp_path):
+        """Test that only one document at a time is held while iterating."""
+        self.write_catalogue(tmp_path, 40, products=20)
+        repository = FileSystemRepository(tmp_path)
+        for _ in repository.iter_organizations("adres"):
+            pass  # warm up caches and the intern table outside the measurement
+
+        tracemalloc.start()
+        try:
+            first = repository.iter_organizations("adres")
+            for _ in zip(range(2), first):
+                pass
+            _, peak_two = tracemalloc.get_traced_memory()
+            for _ in first:
+                pass
+            _, peak_all = tracemalloc.get_traced_memory()
+
+            tracemalloc.reset_peak()
+            documents = list(repository.iter_organizations("adres"))
+            _, peak_materialized = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert len(documents) == 40
+        assert peak_all < 1.5 * peak_two
+        assert peak_all * 4 < peak_materialized
@@ -394,3 +394,38 @@ class TestIntegrationWithListSlugs:
 
         finally:
             sys.stdout = sys.__stdout__
+
+
+class TestParallelValidation:
+    """Integration tests for validating files on a worker pool."""
+
+    def _run(self, mock_repository, krs_client, files, jobs, capsys):
+        validator = OrganizationValidator(mock_repository, "adres", jobs=jobs)
+        validator.schema_validator.krs_client = krs_client
+        result = validator.validate_files(files)
+        validator.close()
+        return result, capsys.readouterr().out
+
+    def test_parallel_output_matches_serial(
+        self, mock_repository, mock_krs_client, valid_organization_data, capsys
+    ):
+        """Test that --jobs N prints the same report, in file order, as a serial run."""
+        files = []
+        for i in range(12):
+            data = dict(valid_organization_data, adres=f"org-{i}", krs=f"{i:010d}")
+            if i % 3 == 0:
+                data["dostawa"] = {}
+            filename = f"org{i}.yaml"
+            mock_repository.set_file_data(filename, data)
+            files.append(filename)
+        files.append("missing.yaml")
+        mock_krs_client.set_response(f"{4:010d}", True, "⚠️ Maintenance mode")
+        mock_krs_client.set_response(f"{5:010d}", False, "KRS not found")
+
+        serial = self._run(mock_repository, mock_krs_client, files, 1, capsys)
+        parallel = self._run(mock_repository, mock_krs_client, files, 4, capsys)
+
+        assert serial[0] is False
+        assert parallel == serial
+        positions = [parallel[1].index(f"Walidacja {name}...") for name in files]
+        assert positions == sorted(positions)
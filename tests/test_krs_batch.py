@@ -0,0 +1,147 @@
+"""
+Tests for the batch KRS client API.
+"""
+
+import json
+import threading
+import time
+
+import responses
+
+from conftest import krs_payload, krs_url
+from validators import RealKRSClient, KRSClientConfig, OrganizationSchemaValidator
+from validate import OrganizationValidator
+
+
+def add_krs(krs, name, delay=0.0, tracker=None):
+    """Register a mocked KRS response, optionally slow and concurrency-tracked."""
+
+    def callback(request):
+        if tracker is not None:
+            tracker.enter()
+        time.sleep(delay)
+        if tracker is not None:
+            tracker.leave()
+        body = krs_payload(name)
+        return 200, {}, json.dumps(body)
+
+    responses.add_callback(responses.GET, krs_url(krs), callback=callback)
+
+
+class InFlightTracker:
+    """Track the maximum number of simultaneous requests."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def enter(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def leave(self):
+        with self.lock:
+            self.current -= 1
+
+
+class TestValidateMany:
+    """Test RealKRSClient.validate_many."""
+
+    @responses.activate
+    def test_results_follow_input_order(self):
+        """Test that results line up with the input pairs."""
+        add_krs("1111111111", "First Foundation", delay=0.05)
+        add_krs("2222222222", "Second Foundation")
+        client = RealKRSClient(KRSClientConfig(registries=("S",)))
+
+        results = client.validate_many(
+            [
+                ("1111111111", "First Foundation"),
+                ("2222222222", "Wrong Name"),
+                ("1111111111", None),
+            ]
+        )
+
+        assert results[0] == (True, "")
+        assert not results[1][0]
+        assert "Wrong Name" in results[1][1]
+        assert results[2] == (True, "")
+
+    @responses.activate
+    def test_each_krs_is_fetched_once_per_run(self):
+        """Test in-run deduplication across and within batches."""
+        add_krs("1234567890", "Test Foundation")
+        client = RealKRSClient(KRSClientConfig(registries=("S",)))
+
+        client.validate_many([("1234567890", None), ("1234567890", "Test Foundation")])
+        client.validate_krs("1234567890", "Test Foundation")
+
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_distinct_lookups_run_concurrently(self):
+        """Test that distinct KRS numbers are fetched in parallel, within the bound."""
+        tracker = InFlightTracker()
+        numbers = [f"{i:010d}" for i in range(1, 9)]
+        for krs in numbers:
+            add_krs(krs, f"Org {krs}", delay=0.05, tracker=tracker)
+        client = RealKRSClient(KRSClientConfig(concurrency=3, registries=("S",)))
+
+        results = client.validate_many([(krs, f"Org {krs}") for krs in numbers])
+        client.close()
+
+        assert results == [(True, "")] * len(numbers)
+        assert 1 < tracker.peak <= 3
+
+    @responses.activate
+    def test_single_item_wraps_batch(self):
+        """Test that validate_krs returns the same result as a one-item batch."""
+        add_krs("1234567890", "Test Foundation")
+        client = RealKRSClient(KRSClientConfig(registries=("S",)))
+
+        assert (
+            client.validate_krs("1234567890", "Other")
+            == client.validate_many([("1234567890", "Other")])[0]
+        )
+
+
+class TestBatchOrchestration:
+    """Test that the orchestrator batches lookups."""
+
+    def test_schema_validator_builds_lookup_pairs(self, mock_krs_client):
+        """Test that only well-formed KRS numbers are prefetched."""
+        validator = OrganizationSchemaValidator("adres", mock_krs_client)
+
+        validator.prefetch_krs(
+            [
+                {"krs": "1234567890", "nazwa_w_krs": "Foundation"},
+                {"krs": "123"},
+                None,
+                {"krs": 987654321},
+                {"krs": 1111111111},
+            ]
+        )
+
+        assert mock_krs_client.batches[0] == [
+            ("1234567890", "Foundation"),
+            ("1111111111", None),
+        ]
+
+    def test_validate_files_prefetches_in_one_batch(
+        self, mock_repository, mock_krs_client, valid_organization_data, capsys
+    ):
+        """Test that all files' KRS numbers are sent as a single batch first."""
+        org2 = dict(valid_organization_data, krs="0987654321")
+        mock_repository.set_file_data("org1.yaml", valid_organization_data)
+        mock_repository.set_file_data("org2.yaml", org2)
+
+        validator = OrganizationValidator(mock_repository, "adres")
+        validator.schema_validator.krs_client = mock_krs_client
+
+        assert validator.validate_files(["org1.yaml", "org2.yaml"])
+        assert mock_krs_client.batches[0] == [
+            ("1234567890", None),
+            ("0987654321", None),
+        ]
@@ -0,0 +1,142 @@
+"""
+Tests for the KRS maintenance circuit breaker.
+"""
+
+import pytest
+import requests
+import responses
+
+from conftest import FakeClock, krs_url
+from krs_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CLOSED,
+    OPEN,
+    HALF_OPEN,
+)
+from validators import RealKRSClient, KRSClientConfig
+
+
+class Boom(Exception):
+    pass
+
+
+def fail():
+    raise Boom()
+
+
+def make_breaker(clock, threshold=2, reset_timeout=10):
+    return CircuitBreaker(threshold, reset_timeout, failure_types=(Boom,), clock=clock)
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the breaker opens once the threshold is reached."""
+        breaker = make_breaker(FakeClock())
+
+        for _ in range(2):
+            with pytest.raises(Boom):
+                breaker.call(fail)
+
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: "never called")
+
+    def test_success_resets_failure_count(self):
+        """Test that failures must be consecutive to open the breaker."""
+        breaker = make_breaker(FakeClock())
+
+        with pytest.raises(Boom):
+            breaker.call(fail)
+        breaker.call(lambda: None)
+        with pytest.raises(Boom):
+            breaker.call(fail)
+
+        assert breaker.state == CLOSED
+
+    def test_half_open_probe_closes_breaker(self):
+        """Test that a successful probe after the reset timeout closes the breaker."""
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(2):
+            with pytest.raises(Boom):
+                breaker.call(fail)
+
+        clock.now = 11
+        assert breaker.call(lambda: "ok") == "ok"
+        assert breaker.state == CLOSED
+        assert [event.split(" (")[0] for event in breaker.stats.events] == [
+            f"wyłącznik KRS: {CLOSED} → {OPEN}",
+            f"wyłącznik KRS: {OPEN} → {HALF_OPEN}",
+            f"wyłącznik KRS: {HALF_OPEN} → {CLOSED}",
+        ]
+
+    def test_failed_probe_reopens_breaker(self):
+        """Test that a failed probe opens the breaker for another period."""
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(2):
+            with pytest.raises(Boom):
+                breaker.call(fail)
+
+        clock.now = 11
+        with pytest.raises(Boom):
+            breaker.call(fail)
+
+        assert breaker.state == OPEN
+        clock.now = 15
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: None)
+
+    def test_disabled_breaker_never_opens(self):
+        """Test that a zero threshold disables the breaker."""
+        breaker = make_breaker(FakeClock(), threshold=0)
+
+        for _ in range(5):
+            with pytest.raises(Boom):
+                breaker.call(fail)
+
+        assert breaker.state == CLOSED
+
+
+class TestBreakerInKRSClient:
+    """Test the breaker wired into RealKRSClient."""
+
+    @responses.activate
+    def test_maintenance_window_short_circuits_remaining_lookups(self):
+        """Test that lookups after the threshold skip HTTP and return warnings."""
+        numbers = [f"{i:010d}" for i in range(1, 7)]
+        for krs in numbers:
+            responses.add(responses.GET, krs_url(krs), body="Przerwa techniczna")
+        client = RealKRSClient(
+            KRSClientConfig(breaker_threshold=2, concurrency=1, registries=("S",))
+        )
+
+        results = client.validate_many([(krs, None) for krs in numbers])
+
+        assert len(responses.calls) == 2
+        assert all(is_valid for is_valid, _ in results)
+        assert all("Przerwa techniczna" in message for _, message in results)
+        assert any("wyłącznik KRS" in line for line in client.summary_lines())
+
+    @responses.activate
+    def test_timeouts_count_towards_threshold(self):
+        """Test that timeouts open the breaker while still failing their own lookup."""
+        numbers = [f"{i:010d}" for i in range(1, 4)]
+        for krs in numbers:
+            responses.add(
+                responses.GET,
+                krs_url(krs),
+                body=requests.exceptions.ReadTimeout(),
+            )
+        client = RealKRSClient(
+            KRSClientConfig(breaker_threshold=2, concurrency=1, registries=("S",))
+        )
+
+        results = client.validate_many([(krs, None) for krs in numbers])
+
+        assert [is_valid for is_valid, _ in results] == [False, False, True]
+        assert "⚠️" in results[2][1]
+        assert client.breaker.state == OPEN
@@ -0,0 +1,168 @@
+"""
+Tests for the persistent KRS lookup cache.
+"""
+
+import multiprocessing
+
+import responses
+
+from conftest import krs_payload, krs_url
+from krs_cache import KRSCache
+from validators import RealKRSClient, KRSClientConfig
+
+
+def _write_entries(args):
+    path, worker = args
+    cache = KRSCache(path)
+    for i in range(50):
+        cache.put(f"{worker:02d}{i:08d}", found=True, name=f"Org {worker}-{i}")
+    return worker
+
+
+class TestKRSCache:
+    """Test the SQLite cache in isolation."""
+
+    def test_put_and_get_fresh_entry(self, tmp_path):
+        """Test that a stored entry is returned while fresh."""
+        cache = KRSCache(str(tmp_path / "krs.sqlite"), ttl=100)
+        cache.put("1234567890", found=True, name="Test Foundation", fetched_at=1000)
+
+        entry = cache.get("1234567890", now=1050)
+
+        assert entry is not None
+        assert entry.found
+        assert entry.name == "Test Foundation"
+        assert not entry.is_stale
+
+    def test_entries_are_keyed_by_registry(self, tmp_path):
+        """Test that the same KRS in another registry is a separate entry."""
+        cache = KRSCache(str(tmp_path / "krs.sqlite"))
+        cache.put("1234567890", found=True, name="Foundation", registry="S")
+
+        assert cache.get("1234567890", registry="S") is not None
+        assert cache.get("1234567890", registry="P") is None
+
+    def test_expired_entry_is_ignored(self, tmp_path):
+        """Test that entries older than the TTL are not returned."""
+        cache = KRSCache(str(tmp_path / "krs.sqlite"), ttl=100)
+        cache.put("1234567890", found=True, name="Foundation", fetched_at=1000)
+
+        assert cache.get("1234567890", now=1101) is None
+
+    def test_negative_entries_use_shorter_ttl(self, tmp_path):
+        """Test that not-found results expire after the negative TTL."""
+        cache = KRSCache(str(tmp_path / "krs.sqlite"), ttl=100, negative_ttl=10)
+        cache.put("1111111111", found=False, fetched_at=1000)
+        cache.put("2222222222", found=True, name="Foundation", fetched_at=1000)
+
+        assert cache.get("1111111111", now=1011) is None
+        assert cache.get("2222222222", now=1011) is not None
+
+    def test_stale_window(self, tmp_path):
+        """Test that expired entries are served as stale within the window."""
+        cache = KRSCache(str(tmp_path / "krs.sqlite"), ttl=100, stale_ttl=50)
+        cache.put("1234567890", found=True, name="Foundation", fetched_at=1000)
+
+        assert cache.get("1234567890", now=1120).is_stale
+        assert cache.get("1234567890", now=1151) is None
+
+    def test_cache_persists_between_instances(self, tmp_path):
+        """Test that a second cache instance sees entries written by the first."""
+        path = str(tmp_path / "krs.sqlite")
+        KRSCache(path).put("1234567890", found=True, name="Foundation")
+
+        entry = KRSCache(path).get("1234567890")
+
+        assert entry is not None
+        assert entry.name == "Foundation"
+
+    def test_concurrent_processes_share_cache(self, tmp_path):
+        """Test that parallel writer processes do not corrupt the cache."""
+        path = str(tmp_path / "krs.sqlite")
+        KRSCache(path)
+
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            pool.map(_write_entries, [(path, worker) for worker in range(4)])
+
+        cache = KRSCache(path)
+        for worker in range(4):
+            for i in range(50):
+                entry = cache.get(f"{worker:02d}{i:08d}")
+                assert entry is not None
+                assert entry.name == f"Org {worker}-{i}"
+
+
+class TestRealKRSClientWithCache:
+    """Test RealKRSClient backed by the cache."""
+
+    @responses.activate
+    def test_second_lookup_is_served_from_cache(self, tmp_path):
+        """Test that a cached KRS is not fetched again."""
+        krs = "1234567890"
+        responses.add(
+            responses.GET,
+            krs_url(krs),
+            json=krs_payload("Test Foundation"),
+            status=200,
+        )
+        config = KRSClientConfig(
+            cache_path=str(tmp_path / "krs.sqlite"), registries=("S",)
+        )
+
+        assert RealKRSClient(config).validate_krs(krs, "Test Foundation") == (True, "")
+        assert RealKRSClient(config).validate_krs(krs, "Test Foundation") == (True, "")
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_not_found_is_cached(self, tmp_path):
+        """Test that not-found results are cached as negative entries."""
+        krs = "9999999999"
+        responses.add(responses.GET, krs_url(krs), status=404)
+        config = KRSClientConfig(
+            cache_path=str(tmp_path / "c.sqlite"), registries=("S",)
+        )
+
+        first = RealKRSClient(config).validate_krs(krs)
+        second = RealKRSClient(config).validate_krs(krs)
+
+        assert not first[0]
+        assert second == first
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_network_errors_are_not_cached(self, tmp_path):
+        """Test that transient failures are retried on the next lookup."""
+        krs = "1234567890"
+        responses.add(responses.GET, krs_url(krs), status=500)
+        responses.add(
+            responses.GET,
+            krs_url(krs),
+            json=krs_payload("Test Foundation"),
+            status=200,
+        )
+        config = KRSClientConfig(
+            cache_path=str(tmp_path / "c.sqlite"), retry_attempts=1
+        )
+
+        assert not RealKRSClient(config).validate_krs(krs)[0]
+        assert RealKRSClient(config).validate_krs(krs) == (True, "")
+
+    @responses.activate
+    def test_stale_entry_is_served_and_refreshed(self, tmp_path):
+        """Test stale-while-revalidate serves the old value and refreshes it."""
+        krs = "1234567890"
+        path = str(tmp_path / "krs.sqlite")
+        KRSCache(path).put(krs, found=True, name="Old Name", fetched_at=0)
+        responses.add(
+            responses.GET,
+            krs_url(krs),
+            json=krs_payload("New Name"),
+            status=200,
+        )
+        config = KRSClientConfig(cache_path=path, cache_ttl=1, cache_stale_ttl=1e12)
+        client = RealKRSClient(config)
+
+        assert client.validate_krs(krs, "Old Name") == (True, "")
+        client.close()
+
+        assert KRSCache(path).get(krs).name == "New Name"
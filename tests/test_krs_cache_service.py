@@ -0,0 +1,284 @@
+"""
+Tests for the shared KRS cache service and its client tier.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+import responses
+
+from krs_cache import KRSCache, CachedKRSEntry
+from krs_cache_service import KRSCacheServer, KRSCacheService
+from krs_remote_cache import CacheServiceReplyError, RemoteKRSCache
+from krs_resilience import SingleFlight
+from validators import RealKRSClient, KRSClientConfig
+
+KRS = "1234567890"
+OTHER = "0000000001"
+TOKEN = "sekret"
+
+
+@pytest.fixture
+def start_service(tmp_path):
+    """Start cache services on free local ports."""
+    started = []
+
+    def start(upstream=False, token=TOKEN):
+        cache_path = str(tmp_path / f"shared-{len(started)}.sqlite")
+        client = None
+        if upstream:
+            config = KRSClientConfig(
+                cache_path=cache_path, registries=("S",), rate_limit=0
+            )
+            client = RealKRSClient(config)
+        service = KRSCacheService(KRSCache(cache_path), client, token)
+        server = KRSCacheServer(("127.0.0.1", 0), service)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        started.append(server)
+        return server, f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in started:
+        server.shutdown()
+        server.server_close()
+        if server.service.upstream is not None:
+            server.service.upstream.close()
+
+
+class TestSingleFlight:
+    """Test coalescing of concurrent calls."""
+
+    def test_concurrent_calls_run_once(self):
+        """Test that callers arriving during a call share its result."""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return "wynik"
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(flight.do, "k", slow) for _ in range(4)]
+            time.sleep(0.1)
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert results == ["wynik"] * 4
+        assert calls == [1]
+        assert flight.stats.get("coalesced_lookups") == 3
+
+    def test_exception_is_shared_and_key_forgotten(self):
+        """Test that a failure reaches every waiter and is not remembered."""
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            flight.do("k", fail)
+        assert flight.do("k", lambda: 1) == 1
+
+
+class TestCacheServiceProtocol:
+    """Test the HTTP/JSON protocol of the cache service."""
+
+    def test_put_get_and_batch_get(self, start_service):
+        """Test storing an entry and reading it back singly and in a batch."""
+        _, url = start_service()
+        remote = RemoteKRSCache(url, token=TOKEN)
+        remote.put(CachedKRSEntry(KRS, "P", True, "Fundacja", time.time(), etag='"1"'))
+
+        entry = remote.get(KRS)
+        assert (entry.registry, entry.name, entry.etag) == ("P", "Fundacja", '"1"')
+        assert remote.get(OTHER) is None
+        assert list(remote.get_many([KRS, OTHER])) == [KRS]
+
+    def test_concurrent_misses_fetch_upstream_once(self, registry, start_service):
+        """Test that simultaneous misses for one number share one KRS request."""
+        registry.add_krs(KRS, "Fundacja")
+        handler = registry.routes[f"/api/krs/OdpisAktualny/{KRS}"]
+        registry.routes[f"/api/krs/OdpisAktualny/{KRS}"] = lambda request: (
+            time.sleep(0.3) or handler(request)
+        )
+        server, url = start_service(upstream=True)
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            entries = list(pool.map(lambda _: RemoteKRSCache(url).get(KRS), range(5)))
+
+        assert [e.name for e in entries] == ["Fundacja"] * 5
+        assert len(registry.requests) == 1
+        assert server.service.stats.get("upstream_fetches") == 1
+
+    def test_upstream_not_found_is_an_answer(self, registry, start_service):
+        """Test that a number missing from KRS is served as not found."""
+        _, url = start_service(upstream=True)
+
+        assert RemoteKRSCache(url).get(KRS).found is False
+
+    def test_upstream_failure(self, registry, start_service):
+        """Test that a failing KRS is reported as a gateway error."""
+        registry.default_handler = lambda request: (503, b"", {})
+        _, url = start_service(upstream=True)
+
+        with pytest.raises(requests.HTTPError):
+            RemoteKRSCache(url).get(KRS)
+
+    @responses.activate
+    @pytest.mark.parametrize(
+        "body",
+        [
+            "<html>",
+            "[]",
+            '{"entries": null}',
+            '{"wpisy": {}}',
+            '{"entries": {"1234567890": {"krs": "1234567890", "found": "tak"}}}',
+        ],
+    )
+    def test_malformed_batch_reply(self, body):
+        """Test that a reply without proper entries is a service error."""
+        responses.add(responses.POST, "http://cache/krs/_batch", body=body)
+
+        with pytest.raises(CacheServiceReplyError):
+            RemoteKRSCache("http://cache").get_many([KRS, OTHER])
+
+    @pytest.mark.parametrize("timeout", [0, (0.0, 5.0)])
+    def test_zero_timeout_sends_nothing(self, krs_server, timeout):
+        """Test that a timeout of 0 is honoured rather than replaced by the default."""
+        remote = RemoteKRSCache(krs_server.base_url, timeout=30.0)
+
+        with pytest.raises(requests.Timeout):
+            remote.get(KRS, timeout=timeout)
+        with pytest.raises(requests.Timeout):
+            RemoteKRSCache(krs_server.base_url, timeout=0).get_many([KRS, OTHER])
+
+        assert krs_server.requests == []
+
+    @pytest.mark.parametrize(
+        "service_token, client_token", [(TOKEN, None), (TOKEN, "inny"), (None, TOKEN)]
+    )
+    def test_put_requires_token(self, start_service, service_token, client_token):
+        """Test that entries cannot be planted without the service token."""
+        _, url = start_service(token=service_token)
+        remote = RemoteKRSCache(url, token=client_token)
+
+        with pytest.raises(requests.HTTPError) as error:
+            remote.put(CachedKRSEntry(KRS, "S", True, "Podrobiona", time.time()))
+
+        assert error.value.response.status_code == 403
+        assert remote.get(KRS, fetch=False) is None
+
+    def test_put_of_malformed_entry_is_rejected(self, start_service):
+        """Test that the service refuses entries it could not serve back."""
+        _, url = start_service()
+
+        response = requests.put(
+            f"{url}/krs/{KRS}",
+            json={"found": None},
+            headers={"Authorization": f"Bearer {TOKEN}"},
+            timeout=5,
+        )
+
+        assert response.status_code == 400
+        assert RemoteKRSCache(url).get(KRS, fetch=False) is None
+
+    @pytest.mark.parametrize(
+        "body", [[KRS], {"krs": KRS}, {"krs": 5}, {"krs": None}, {"krs": [[KRS]]}]
+    )
+    def test_malformed_batch_request_is_rejected(self, start_service, body):
+        """Test that only a list of KRS numbers is accepted in a batch request."""
+        _, url = start_service()
+
+        response = requests.post(f"{url}/krs/_batch", json=body, timeout=5)
+
+        assert response.status_code == 400
+
+
+class TestCacheServiceTier:
+    """Test RealKRSClient with a shared cache service in front of KRS."""
+
+    def make_client(self, url, tmp_path=None, token=TOKEN):
+        config = KRSClientConfig(
+            cache_path=str(tmp_path / "local.sqlite") if tmp_path else None,
+            cache_service_url=url,
+            cache_service_token=token,
+            registries=("S",),
+        )
+        return RealKRSClient(config)
+
+    def test_batch_get_answers_without_krs(self, registry, start_service, tmp_path):
+        """Test that shared entries are fetched in one request and cached locally."""
+        server, url = start_service()
+        server.service.put(CachedKRSEntry(KRS, "S", True, "Fundacja", time.time()))
+        server.service.put(CachedKRSEntry(OTHER, "S", False, None, time.time()))
+        client = self.make_client(url, tmp_path)
+
+        results = client.validate_many([(KRS, "Fundacja"), (OTHER, None)])
+        client.close()
+
+        assert results[0] == (True, "")
+        assert results[1][0] is False
+        assert registry.requests == []
+        assert client.stats.get("cache_service_hits") == 2
+        assert KRSCache(str(tmp_path / "local.sqlite")).get(KRS).name == "Fundacja"
+
+    def test_live_results_are_shared(self, registry, start_service):
+        """Test that a number fetched by one runner is served to the next."""
+        registry.add_krs(KRS, "Fundacja")
+        _, url = start_service()
+
+        first = self.make_client(url)
+        assert first.validate_krs(KRS, "Fundacja") == (True, "")
+        first.close()
+        second = self.make_client(url)
+        assert second.validate_krs(KRS, "Fundacja") == (True, "")
+        second.close()
+
+        assert len(registry.requests) == 1
+        assert first.stats.get("cache_service_misses") == 1
+        assert second.stats.get("cache_service_hits") == 1
+
+    def test_client_without_token_only_reads(self, registry, start_service):
+        """Test that a validator without the token does not try to store results."""
+        registry.add_krs(KRS, "Fundacja")
+        server, url = start_service()
+
+        client = self.make_client(url, token=None)
+        assert client.validate_krs(KRS, "Fundacja") == (True, "")
+        client.close()
+
+        assert server.service.stats.get("client_puts") == 0
+        assert client.stats.get("cache_service_errors") == 0
+
+    def test_unreachable_service_falls_back_to_krs(self, registry):
+        """Test that a dead service is given up on and KRS is queried directly."""
+        registry.add_krs(KRS, "Fundacja")
+        registry.add_krs(OTHER, "Stowarzyszenie")
+        client = self.make_client("http://127.0.0.1:9")
+
+        results = client.validate_many([(KRS, "Fundacja"), (OTHER, "Stowarzyszenie")])
+        client.close()
+
+        assert results == [(True, ""), (True, "")]
+        assert client.stats.get("cache_service_errors") == 1
+        assert any("niedostępna" in event for event in client.stats.events)
+
+    def test_malformed_service_falls_back_to_krs(self, registry, krs_server_factory):
+        """Test that a service answering garbage is treated as unreachable."""
+        registry.add_krs(KRS, "Fundacja")
+        registry.add_krs(OTHER, "Stowarzyszenie")
+        broken = krs_server_factory()
+        broken.default_handler = lambda request: (200, b"<html>", {})
+        client = self.make_client(broken.base_url)
+
+        assert client.validate_krs(KRS, "Fundacja") == (True, "")
+        assert client.validate_krs(OTHER, "Stowarzyszenie") == (True, "")
+        client.close()
+
+        assert len(broken.requests) == 1
+        assert client.stats.get("cache_service_errors") == 1
+        assert any("niedostępna" in event for event in client.stats.events)
@@ -0,0 +1,93 @@
+"""
+Tests for the bulk krs-check command.
+"""
+
+import json
+import time
+
+import pytest
+import responses
+from click.testing import CliRunner
+
+from conftest import krs_payload, krs_url
+from krs_tools import cli, parse_krs_line
+from validators import RealKRSClient, KRSClientConfig
+
+
+class TestParseKRSLine:
+    """Test reading KRS numbers from spreadsheet exports."""
+
+    @pytest.mark.parametrize(
+        "line, expected",
+        [
+            ("0000123456\n", ("0000123456", None)),
+            ("123456;Fundacja A\n", ("0000123456", "Fundacja A")),
+            (
+                '0000123456,"Fundacja A, oddział"\n',
+                ("0000123456", "Fundacja A, oddział"),
+            ),
+            ("0000123456\tFundacja A\n", ("0000123456", "Fundacja A")),
+            ("krs;nazwa\n", ("krs", "nazwa")),
+            ("\n", None),
+            ("# komentarz\n", None),
+        ],
+    )
+    def test_formats(self, line, expected):
+        """Test the supported separators, zero padding and skipped lines."""
+        assert parse_krs_line(line) == expected
+
+
+class TestValidateAsCompleted:
+    """Test streaming results in completion order."""
+
+    def test_fast_lookup_is_yielded_first(self, registry):
+        """Test that a slow number does not hold back a fast one."""
+        registry.add_krs("0000000001", "Wolna")
+        registry.add_krs("0000000002", "Szybka")
+        slow = registry.routes["/api/krs/OdpisAktualny/0000000001"]
+        registry.routes["/api/krs/OdpisAktualny/0000000001"] = lambda request: (
+            time.sleep(0.3) or slow(request)
+        )
+        client = RealKRSClient(KRSClientConfig(registries=("S",), rate_limit=0))
+        items = [("0000000001", "Wolna"), ("0000000002", "Szybka")]
+
+        results = list(client.validate_as_completed(items))
+        client.close()
+
+        assert results == [(1, (True, "")), (0, (True, ""))]
+
+
+class TestKRSCheckCommand:
+    """Test the krs-check command end to end."""
+
+    @responses.activate
+    def test_streams_ndjson_and_summary(self):
+        """Test NDJSON output for matching, mismatching and malformed numbers."""
+        responses.add(
+            responses.GET,
+            krs_url("0000000001", "S"),
+            json=krs_payload("Fundacja A"),
+        )
+        responses.add(
+            responses.GET,
+            krs_url("0000000002", "S"),
+            json=krs_payload("Fundacja B"),
+        )
+        for krs in ("0000000001", "0000000002"):
+            responses.add(responses.GET, krs_url(krs, "P"), status=404)
+        stdin = "krs;nazwa\n1;Fundacja A\n0000000002;Inna nazwa\nabc\n"
+
+        result = CliRunner(mix_stderr=False).invoke(
+            cli, ["krs-check", "--krs-rate-limit", "0"], input=stdin
+        )
+
+        assert result.exit_code == 1, result.stderr
+        records = {r["line"]: r for r in map(json.loads, result.stdout.splitlines())}
+        assert sorted(records) == [2, 3, 4]
+        assert records[2]["valid"] is True
+        assert records[2]["krs"] == "0000000001"
+        assert records[3]["valid"] is False
+        assert "Niezgodność nazwy" in records[3]["message"]
+        assert records[4]["valid"] is False
+        assert "zgodne 1, ostrzeżenia 0, błędy 2" in result.stderr
+        assert "numerów/s" in result.stderr
@@ -0,0 +1,189 @@
+"""
+Tests for the run-wide KRS deadline.
+"""
+
+import json
+import time
+
+import pytest
+import responses
+
+from conftest import FakeClock
+from krs_cache import KRSCache
+from krs_resilience import Deadline, DeadlineExceededError, RetryPolicy
+from validators import OrganizationSchemaValidator, RealKRSClient, KRSClientConfig
+
+
+class Flaky(Exception):
+    pass
+
+
+class TestDeadline:
+    """Test the deadline itself."""
+
+    def test_remaining_and_cap(self):
+        """Test that the remaining time shrinks and caps timeouts."""
+        clock = FakeClock()
+        deadline = Deadline(10, clock=clock)
+
+        assert deadline.cap(5) == 5
+        clock.now = 8
+        assert deadline.remaining() == 2
+        assert deadline.cap(5) == 2
+        assert not deadline.expired
+
+        clock.now = 11
+        assert deadline.remaining() == 0
+        assert deadline.expired
+
+    def test_retry_does_not_sleep_past_deadline(self):
+        """Test that retries give up when the backoff would cross the deadline."""
+        sleeps = []
+        policy = RetryPolicy(
+            5, 1.0, 1.0, retry_types=(Flaky,), sleep=sleeps.append, jitter=lambda: 1
+        )
+
+        def fail():
+            raise Flaky()
+
+        with pytest.raises(DeadlineExceededError):
+            policy.call(fail, deadline=Deadline(0.5))
+        assert sleeps == []
+
+
+class TestDeadlineInKRSClient:
+    """Test RealKRSClient honouring the deadline."""
+
+    @responses.activate
+    def test_expired_deadline_warns_without_network(self):
+        """Test that lookups after the deadline become warnings."""
+        client = RealKRSClient()
+
+        is_valid, message = client.validate_krs("1234567890", deadline=Deadline(0))
+
+        assert is_valid
+        assert message.startswith("⚠️")
+        assert "limitu czasu" in message
+        assert len(responses.calls) == 0
+        assert client.stats.get("deadline_exceeded") == 1
+
+    def test_slow_lookup_is_cut_at_deadline(self, registry):
+        """Test that a hanging KRS API cannot hold the run past the deadline."""
+        body = json.dumps({"odpis": {}}).encode()
+
+        def handler(request):
+            time.sleep(2)
+            return 200, body, {}
+
+        registry.default_handler = handler
+        client = RealKRSClient(KRSClientConfig(read_timeout=30))
+
+        started = time.monotonic()
+        results = client.validate_many(
+            [("1234567890", None), ("0987654321", None)], deadline=Deadline(0.3)
+        )
+        client.close()
+
+        assert time.monotonic() - started < 1.5
+        assert all(is_valid and "⚠️" in message for is_valid, message in results)
+
+    @responses.activate
+    def test_deadline_passing_during_rate_limit_wait(self):
+        """Test that the timeout is capped after waiting, not before."""
+        clock = FakeClock()
+        deadline = Deadline(1, clock=clock)
+        client = RealKRSClient(KRSClientConfig(registries=("S",)))
+
+        def slow_acquire(deadline=None):
+            clock.now += 2  # the deadline passes while waiting for a token
+
+        client.rate_limiter.acquire = slow_acquire
+
+        is_valid, message = client.validate_krs("1234567890", deadline=deadline)
+        client.close()
+
+        assert is_valid and "limitu czasu" in message
+        assert len(responses.calls) == 0
+        assert client.stats.get("deadline_exceeded") == 1
+
+
+class TestDeadlineInBackgroundWork:
+    """Test that work off the lookup path is bound by the deadline too."""
+
+    def stale_cache(self, tmp_path):
+        path = str(tmp_path / "krs.sqlite")
+        KRSCache(path).put("1234567890", found=True, name="Fundacja", fetched_at=0)
+        return KRSClientConfig(
+            cache_path=path,
+            cache_ttl=1,
+            cache_stale_ttl=1e12,
+            registries=("S",),
+            read_timeout=30,
+        )
+
+    @responses.activate
+    def test_no_refresh_after_deadline(self, tmp_path):
+        """Test that a stale entry is served without a refresh once time is up."""
+        client = RealKRSClient(self.stale_cache(tmp_path))
+
+        name = client.fetch("1234567890", deadline=Deadline(0))
+        client.close()
+
+        assert name == "Fundacja"
+        assert len(responses.calls) == 0
+
+    def test_close_does_not_wait_past_deadline(self, registry, tmp_path):
+        """Test that a hanging refresh cannot hold the run open."""
+        registry.default_handler = lambda request: time.sleep(2) or (404, b"", {})
+        client = RealKRSClient(self.stale_cache(tmp_path))
+
+        started = time.monotonic()
+        result = client.validate_krs("1234567890", "Fundacja", deadline=Deadline(0.3))
+        client.close()
+
+        assert result == (True, "")
+        assert time.monotonic() - started < 1.5
+
+    def test_no_cache_service_batch_after_deadline(self, krs_server_factory):
+        """Test that the shared cache is not asked once time is up."""
+        service = krs_server_factory()
+        client = RealKRSClient(KRSClientConfig(cache_service_url=service.base_url))
+
+        results = client.validate_many(
+            [("1234567890", None), ("0987654321", None)], deadline=Deadline(0)
+        )
+        client.close()
+
+        assert all("limitu czasu" in message for _, message in results)
+        assert service.requests == []
+
+
+class TestDeadlinePropagation:
+    """Test that the schema validator hands its deadline to the KRS client."""
+
+    @responses.activate
+    def test_missed_number_is_counted_once(self):
+        """Test that the prefetch and the per-file check count a miss once."""
+        client = RealKRSClient()
+        validator = OrganizationSchemaValidator("adres", client, deadline=Deadline(0))
+        documents = [{"krs": "1234567890"}, {"krs": "0987654321"}]
+
+        validator.prefetch_krs(documents)
+        for document in documents:
+            validator.check_structure(document)
+        client.close()
+
+        assert client.stats.get("deadline_exceeded") == 2
+
+    def test_schema_validator_passes_deadline(self, mock_krs_client):
+        """Test both the prefetch batch and the per-file check."""
+        deadline = Deadline(60)
+        validator = OrganizationSchemaValidator(
+            "adres", mock_krs_client, deadline=deadline
+        )
+        document = {"krs": "1234567890", "nazwa_w_krs": "Fundacja"}
+
+        validator.prefetch_krs([document])
+        validator.check_structure(document)
+
+        assert mock_krs_client.deadlines == [deadline, deadline]
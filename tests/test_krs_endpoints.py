@@ -0,0 +1,145 @@
+"""
+Tests for KRS endpoint failover and load balancing.
+"""
+
+import threading
+
+import pytest
+
+from conftest import FakeClock
+from krs_resilience import EndpointPool
+from validators import RealKRSClient, KRSClientConfig
+
+PREFIX = "/api/krs/OdpisAktualny/"
+
+
+class Down(Exception):
+    pass
+
+
+def make_pool(clock, threshold=2, cooldown=30):
+    return EndpointPool(
+        ["http://mirror/", "http://origin/"],
+        failure_types=(Down,),
+        failure_threshold=threshold,
+        cooldown=cooldown,
+        clock=clock,
+    )
+
+
+def failing_on(*urls):
+    def func(url):
+        if url in urls:
+            raise Down()
+        return url
+
+    return func
+
+
+class TestEndpointPool:
+    """Test endpoint selection, failover and cool-down."""
+
+    def test_prefers_first_endpoint_when_idle(self):
+        """Test that the first endpoint takes all traffic under light load."""
+        pool = make_pool(FakeClock())
+
+        assert [pool.call(lambda url: url) for _ in range(3)] == ["http://mirror/"] * 3
+
+    def test_spreads_concurrent_calls(self):
+        """Test that calls in flight are spread across endpoints."""
+        pool = make_pool(FakeClock())
+        inside = threading.Barrier(2)
+        used = []
+
+        def func(url):
+            used.append(url)
+            inside.wait(5)
+
+        threads = [threading.Thread(target=pool.call, args=(func,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(used) == ["http://mirror/", "http://origin/"]
+
+    def test_fails_over_to_next_endpoint(self):
+        """Test that a failing endpoint is skipped within the same call."""
+        pool = make_pool(FakeClock())
+
+        assert pool.call(failing_on("http://mirror/")) == "http://origin/"
+        assert pool.stats.get("endpoint_failovers") == 1
+
+    def test_all_endpoints_failing_raises(self):
+        """Test that the last error is raised once every endpoint failed."""
+        pool = make_pool(FakeClock())
+
+        with pytest.raises(Down):
+            pool.call(failing_on("http://mirror/", "http://origin/"))
+
+    def test_cooldown_after_repeated_failures(self):
+        """Test that an endpoint is rested after consecutive failures, then returns."""
+        clock = FakeClock()
+        pool = make_pool(clock, threshold=2, cooldown=30)
+        for _ in range(2):
+            pool.call(failing_on("http://mirror/"))
+
+        assert pool.call(lambda url: url) == "http://origin/"
+        assert any("wyłączony na 30 s" in event for event in pool.stats.events)
+
+        clock.now = 31
+        assert pool.call(lambda url: url) == "http://mirror/"
+
+    def test_summary_lines(self):
+        """Test that per-endpoint statistics are reported."""
+        pool = make_pool(FakeClock())
+        pool.call(failing_on("http://mirror/"))
+
+        lines = pool.summary_lines()
+
+        assert lines[0].startswith("punkt końcowy http://mirror/: 1 zapytań, 1 błędów")
+        assert lines[1].startswith("punkt końcowy http://origin/: 1 zapytań, 0 błędów")
+
+
+class TestEndpointsInKRSClient:
+    """Test RealKRSClient against a local mirror and origin."""
+
+    def test_mirror_is_used_first(self, krs_server_factory):
+        """Test that a healthy mirror answers every lookup."""
+        mirror, origin = krs_server_factory(), krs_server_factory()
+        mirror.add_krs("1234567890", "Fundacja")
+        config = KRSClientConfig(
+            endpoints=(mirror.base_url + PREFIX, origin.base_url + PREFIX),
+            registries=("S",),
+        )
+        client = RealKRSClient(config)
+
+        assert client.validate_krs("1234567890", "Fundacja") == (True, "")
+        assert len(mirror.requests) == 1
+        assert origin.requests == []
+        client.close()
+
+    def test_failing_mirror_fails_over_and_cools_down(self, krs_server_factory):
+        """Test failover to the origin and removal of a broken mirror."""
+        mirror, origin = krs_server_factory(), krs_server_factory()
+        mirror.default_handler = lambda request: (503, b"", {})
+        numbers = [f"{i:010d}" for i in range(1, 6)]
+        for krs in numbers:
+            origin.add_krs(krs, f"Org {krs}")
+        config = KRSClientConfig(
+            endpoints=(mirror.base_url + PREFIX, origin.base_url + PREFIX),
+            registries=("S",),
+            concurrency=1,
+            endpoint_failure_threshold=2,
+        )
+        client = RealKRSClient(config)
+
+        results = client.validate_many([(krs, f"Org {krs}") for krs in numbers])
+        lines = client.summary_lines()
+        client.close()
+
+        assert results == [(True, "")] * len(numbers)
+        assert len(mirror.requests) == 2
+        assert client.stats.get("endpoint_failovers") == 2
+        assert any(f"{mirror.base_url}{PREFIX}" in line for line in lines)
+        assert any("wyłączony" in line for line in lines)
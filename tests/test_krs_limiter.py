@@ -0,0 +1,169 @@
+"""
+Tests for KRS rate limiting and the adaptive concurrency window.
+"""
+
+import threading
+import time
+
+import pytest
+import responses
+
+from conftest import FakeClock, krs_url
+from krs_resilience import AIMDLimiter, Deadline, DeadlineExceededError, TokenBucket
+from validators import RealKRSClient, KRSClientConfig
+
+
+class Overloaded(Exception):
+    pass
+
+
+def overload():
+    raise Overloaded()
+
+
+class TestTokenBucket:
+    """Test the request rate cap."""
+
+    def test_burst_then_steady_rate(self):
+        """Test that a full bucket allows a burst, then paces requests."""
+        clock = FakeClock()
+        bucket = TokenBucket(5, burst=2, clock=clock, sleep=clock.sleep)
+
+        for _ in range(2):
+            bucket.acquire()
+        assert clock.now == 0
+
+        bucket.acquire()
+        bucket.acquire()
+        assert clock.now == pytest.approx(0.4)
+        assert bucket.stats.get("rate_limit_waits") == 2
+
+    def test_zero_rate_disables_limit(self):
+        """Test that a rate of 0 never waits."""
+        bucket = TokenBucket(0, sleep=lambda _: pytest.fail("slept"))
+
+        for _ in range(100):
+            bucket.acquire()
+
+    def test_wait_beyond_deadline_raises(self):
+        """Test that a token available only after the deadline is refused."""
+        clock = FakeClock()
+        bucket = TokenBucket(1, burst=1, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+
+        with pytest.raises(DeadlineExceededError):
+            bucket.acquire(Deadline(0.5, clock=clock))
+
+
+class TestAIMDLimiter:
+    """Test the adaptive concurrency window."""
+
+    def test_overload_halves_window_once_per_burst(self):
+        """Test multiplicative decrease, ignoring repeats within the latency target."""
+        clock = FakeClock()
+        limiter = AIMDLimiter(
+            8, overload_types=(Overloaded,), latency_target=1.0, clock=clock
+        )
+
+        for _ in range(3):
+            with pytest.raises(Overloaded):
+                limiter.call(overload)
+        assert limiter.limit == 4
+
+        clock.now = 5
+        with pytest.raises(Overloaded):
+            limiter.call(overload)
+        assert limiter.limit == 2
+        assert limiter.stats.get("concurrency_decreases") == 2
+
+    def test_window_never_drops_below_minimum(self):
+        """Test that the window keeps at least `minimum` slots."""
+        clock = FakeClock()
+        limiter = AIMDLimiter(4, overload_types=(Overloaded,), minimum=1, clock=clock)
+
+        for i in range(10):
+            clock.now = i * 10
+            with pytest.raises(Overloaded):
+                limiter.call(overload)
+
+        assert limiter.limit == 1
+
+    def test_fast_successes_grow_window_additively(self):
+        """Test additive increase back towards the maximum."""
+        limiter = AIMDLimiter(4, overload_types=(Overloaded,), initial=1)
+
+        limiter.call(lambda: None)
+        assert limiter.limit == 2
+        # Roughly one extra slot per window's worth of successes
+        for _ in range(3):
+            limiter.call(lambda: None)
+        assert limiter.limit == 3
+        for _ in range(20):
+            limiter.call(lambda: None)
+        assert limiter.limit == 4
+
+    def test_slow_successes_hold_window(self):
+        """Test that calls slower than the latency target do not grow the window."""
+        clock = FakeClock()
+        limiter = AIMDLimiter(
+            4, overload_types=(), initial=2, latency_target=1.0, clock=clock
+        )
+
+        limiter.call(lambda: clock.sleep(2))
+
+        assert limiter.limit == 2
+
+    def test_window_bounds_calls_in_flight(self):
+        """Test that no more than `limit` calls run at the same time."""
+        limiter = AIMDLimiter(2, overload_types=(), initial=2, latency_target=0)
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def work():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+
+        threads = [
+            threading.Thread(target=limiter.call, args=(work,)) for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max(peak) == 2
+
+    def test_waiting_for_slot_respects_deadline(self):
+        """Test that a full window gives up at the deadline."""
+        limiter = AIMDLimiter(1, overload_types=(), initial=1)
+        release = threading.Event()
+        holder = threading.Thread(target=limiter.call, args=(lambda: release.wait(5),))
+        holder.start()
+        time.sleep(0.02)
+
+        with pytest.raises(DeadlineExceededError):
+            limiter.call(lambda: None, Deadline(0.05))
+
+        release.set()
+        holder.join()
+
+
+class TestLimiterInKRSClient:
+    """Test the limiter inside RealKRSClient."""
+
+    @responses.activate
+    def test_throttling_responses_shrink_window(self):
+        """Test that 429 responses are reported as overload."""
+        krs = "1234567890"
+        responses.add(responses.GET, krs_url(krs), status=429)
+        config = KRSClientConfig(concurrency=8, retry_attempts=1)
+        client = RealKRSClient(config)
+
+        assert not client.validate_krs(krs)[0]
+        assert client.limiter.limit == 4
+        assert "końcowe okno współbieżności KRS: 4" in client.summary_lines()
@@ -0,0 +1,126 @@
+"""
+Tests for recording and replaying KRS traffic.
+"""
+
+import json
+
+import pytest
+
+import krs_puller
+from krs_puller import KRSDataPuller, KRSTransientError
+from krs_recording import KRSRecorder, KRSReplayer, request_key
+from validators import RealKRSClient, KRSClientConfig
+
+FOUND = "1234567890"
+MISSING = "0000000001"
+MAINTENANCE = "0000000002"
+
+
+@pytest.fixture
+def registry(registry):
+    """The shared stand-in, with one number found and one under maintenance."""
+    registry.add_krs(FOUND, "Fundacja")
+    registry.routes[f"/api/krs/OdpisAktualny/{MAINTENANCE}"] = lambda request: (
+        200,
+        "<html>Przerwa techniczna</html>".encode(),
+        {},
+    )
+    return registry
+
+
+def run(**config):
+    client = RealKRSClient(KRSClientConfig(registries=("S",), rate_limit=0, **config))
+    items = [(FOUND, "Fundacja"), (MISSING, None), (MAINTENANCE, None)]
+    try:
+        return client.validate_many(items), client
+    finally:
+        client.close()
+
+
+def index_lines(directory):
+    with open(directory / "index.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestRecordReplay:
+    """Test recording a run and replaying it without the network."""
+
+    def test_replay_reproduces_recorded_run(self, registry, tmp_path, monkeypatch):
+        """Test that found, not-found and maintenance outcomes replay exactly."""
+        recording = tmp_path / "recording"
+        recorded, _ = run(record_dir=str(recording))
+
+        assert {line["krs"] for line in index_lines(recording)} == {
+            FOUND,
+            MISSING,
+            MAINTENANCE,
+        }
+        requests_made = len(registry.requests)
+        monkeypatch.setattr(krs_puller, "KRS_API_URL", "http://127.0.0.1:9/")
+
+        replayed, client = run(replay_dir=str(recording))
+
+        assert replayed == recorded
+        assert len(registry.requests) == requests_made
+        assert client.stats.get("replayed_responses") >= 3
+
+    def test_identical_outcomes_are_stored_once(self, registry, tmp_path):
+        """Test that the object store is content-addressed."""
+        recording = tmp_path / "recording"
+        run(record_dir=str(recording))
+        objects = set((recording / "objects").iterdir())
+
+        run(record_dir=str(recording))
+
+        assert set((recording / "objects").iterdir()) == objects
+        assert len(index_lines(recording)) > len(objects)
+
+    def test_unrecorded_request_fails(self, tmp_path):
+        """Test that a replay never falls back to the network."""
+        recording = tmp_path / "recording"
+        KRSRecorder(str(recording)).close()
+
+        client = RealKRSClient(
+            KRSClientConfig(replay_dir=str(recording), registries=("S",))
+        )
+        is_valid, message = client.validate_krs(FOUND)
+        client.close()
+
+        assert not is_valid
+        assert client.stats.get("replay_misses") == 1
+
+    def test_record_and_replay_are_exclusive(self, tmp_path):
+        """Test that recording and replaying at once is rejected."""
+        with pytest.raises(ValueError):
+            RealKRSClient(
+                KRSClientConfig(record_dir=str(tmp_path), replay_dir=str(tmp_path))
+            )
+
+
+class TestReplayer:
+    """Test replay ordering and latency."""
+
+    def test_outcomes_replay_in_order_with_latency(self, tmp_path):
+        """Test that a retried request replays as failure, then success."""
+        times = iter([0.0, 0.5, 1.0, 1.2])
+        recorder = KRSRecorder(str(tmp_path), clock=lambda: next(times))
+        key = request_key(FOUND, ("S",))
+        puller = KRSDataPuller.from_projection(FOUND, "S", {"x": 1}, etag='"1"')
+
+        def fail():
+            raise KRSTransientError("HTTP 503")
+
+        with pytest.raises(KRSTransientError):
+            recorder.call(key, fail)
+        recorder.call(key, lambda: puller)
+        recorder.close()
+
+        slept = []
+        replayer = KRSReplayer(str(tmp_path), latency=True, sleep=slept.append)
+
+        with pytest.raises(KRSTransientError):
+            replayer.replay(key)
+        replayed = replayer.replay(key)
+        assert (replayed.data, replayed.etag) == ({"x": 1}, '"1"')
+        assert replayer.replay(key).data == {"x": 1}
+        assert slept == [0.5, pytest.approx(0.2), pytest.approx(0.2)]
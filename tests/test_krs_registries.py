@@ -0,0 +1,131 @@
+"""
+Tests for concurrent lookups across the S and P registers.
+"""
+
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from conftest import krs_document
+from krs_cache import KRSCache
+from krs_puller import (
+    KRSMaintenanceError,
+    KRSNotFoundError,
+    KRSTransientError,
+    pull_any_registry,
+)
+from validators import RealKRSClient, KRSClientConfig
+
+KRS = "1234567890"
+
+
+def registry_of(request):
+    return parse_qs(urlparse(request.path).query)["rejestr"][0]
+
+
+def requested_registries(server):
+    return [parse_qs(urlparse(path).query)["rejestr"][0] for path, _ in server.requests]
+
+
+def serve(server, answers, delays=None):
+    """Answer each register with (status, name) after an optional delay."""
+
+    def handler(request):
+        register = registry_of(request)
+        time.sleep((delays or {}).get(register, 0))
+        status, name = answers[register]
+        return status, krs_document(name) if status == 200 else b"", {}
+
+    server.default_handler = handler
+
+
+class TestPullAnyRegistry:
+    """Test querying several registers at once."""
+
+    def test_entrepreneur_register_answers(self, registry):
+        """Test that an entity only in P is found."""
+        serve(registry, {"S": (404, None), "P": (200, "Spółka z o.o.")})
+
+        puller = pull_any_registry(KRS, ("S", "P"))
+
+        assert puller.registry == "P"
+        assert puller.name == "Spółka z o.o."
+
+    def test_first_answer_wins(self, registry):
+        """Test that a slow register does not delay the lookup."""
+        serve(
+            registry,
+            {"S": (200, "Fundacja"), "P": (404, None)},
+            delays={"P": 1.0},
+        )
+
+        started = time.monotonic()
+        puller = pull_any_registry(KRS, ("S", "P"))
+
+        assert puller.registry == "S"
+        assert time.monotonic() - started < 0.8
+
+    def test_not_found_in_any_register(self, registry):
+        """Test that not-found is reported only when every register says so."""
+        serve(registry, {"S": (404, None), "P": (404, None)})
+
+        with pytest.raises(KRSNotFoundError):
+            pull_any_registry(KRS, ("S", "P"))
+
+    def test_transient_failure_beats_not_found(self, registry):
+        """Test that a failing register is not mistaken for a missing entry."""
+        serve(registry, {"S": (503, None), "P": (404, None)})
+
+        with pytest.raises(KRSTransientError):
+            pull_any_registry(KRS, ("S", "P"))
+
+    def test_failures_reported_in_register_order(self, registry):
+        """Test that the reported failure does not depend on which fails first."""
+
+        def handler(request):
+            if registry_of(request) == "S":
+                time.sleep(0.2)
+                return 200, "Przerwa techniczna".encode(), {}
+            return 503, b"", {}
+
+        registry.default_handler = handler
+
+        with pytest.raises(KRSMaintenanceError):
+            pull_any_registry(KRS, ("S", "P"))
+
+
+class TestRegistryInKRSClient:
+    """Test that RealKRSClient remembers the answering register."""
+
+    def test_answering_register_is_cached(self, registry, tmp_path):
+        """Test that later lookups go straight to the remembered register."""
+        serve(registry, {"S": (404, None), "P": (200, "Spółka z o.o.")})
+        cache_path = str(tmp_path / "krs.sqlite")
+        config = KRSClientConfig(cache_path=cache_path, cache_ttl=0)
+
+        client = RealKRSClient(config)
+        assert client.validate_krs(KRS, "Spółka z o.o.") == (True, "")
+        assert client.stats.get("answers_registry_P") == 1
+        client.close()
+        assert KRSCache(cache_path).find(KRS, include_expired=True).registry == "P"
+
+        registry.requests.clear()
+        client = RealKRSClient(config)
+        assert client.validate_krs(KRS, "Spółka z o.o.") == (True, "")
+        client.close()
+
+        assert requested_registries(registry) == ["P"]
+
+    def test_not_found_is_cached_for_every_register(self, registry, tmp_path):
+        """Test that a miss in both registers is cached as not found."""
+        serve(registry, {"S": (404, None), "P": (404, None)})
+        cache_path = str(tmp_path / "krs.sqlite")
+
+        client = RealKRSClient(KRSClientConfig(cache_path=cache_path))
+        assert not client.validate_krs(KRS)[0]
+        client.close()
+
+        cache = KRSCache(cache_path)
+        assert not cache.get(KRS, registry="S").found
+        assert not cache.get(KRS, registry="P").found
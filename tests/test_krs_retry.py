@@ -0,0 +1,220 @@
+"""
+Tests for KRS retries with backoff and hedged requests.
+"""
+
+import itertools
+import threading
+import time
+
+import pytest
+import requests
+import responses
+
+from conftest import krs_document, krs_payload, krs_url
+from krs_resilience import Hedger, LatencyTracker, RetryPolicy
+from validators import RealKRSClient, KRSClientConfig
+
+
+class Flaky(Exception):
+    pass
+
+
+class Fatal(Exception):
+    pass
+
+
+def make_policy(attempts=3, sleeps=None):
+    return RetryPolicy(
+        attempts,
+        base_delay=0.25,
+        max_delay=0.6,
+        retry_types=(Flaky,),
+        sleep=sleeps.append if sleeps is not None else lambda _: None,
+        jitter=lambda: 1.0,
+    )
+
+
+def failing(times, error=Flaky):
+    calls = itertools.count(1)
+
+    def func():
+        if next(calls) <= times:
+            raise error()
+        return "ok"
+
+    return func
+
+
+class TestRetryPolicy:
+    """Test retries with exponential backoff."""
+
+    def test_retries_until_success(self):
+        """Test that transient failures are retried with growing delays."""
+        sleeps = []
+        policy = make_policy(sleeps=sleeps)
+
+        assert policy.call(failing(2)) == "ok"
+        assert sleeps == [0.25, 0.5]
+        assert policy.stats.get("retries") == 2
+
+    def test_delay_is_capped_and_jittered(self):
+        """Test that delays never exceed max_delay and scale with the jitter."""
+        policy = make_policy()
+
+        assert policy.delay(10) == 0.6
+        policy.jitter = lambda: 0.5
+        assert policy.delay(1) == 0.125
+
+    def test_gives_up_after_attempts(self):
+        """Test that the last transient error is raised."""
+        policy = make_policy(attempts=2)
+
+        with pytest.raises(Flaky):
+            policy.call(failing(5))
+        assert policy.stats.get("retries") == 1
+
+    def test_other_errors_are_not_retried(self):
+        """Test that non-transient errors propagate immediately."""
+        sleeps = []
+        policy = make_policy(sleeps=sleeps)
+
+        with pytest.raises(Fatal):
+            policy.call(failing(1, Fatal))
+        assert sleeps == []
+
+
+class TestHedger:
+    """Test hedged requests."""
+
+    def test_fast_call_is_not_hedged(self):
+        """Test that calls finishing before the delay run once."""
+        hedger = Hedger(initial_delay=1.0)
+
+        assert hedger.call(lambda: "ok") == "ok"
+        assert hedger.stats.get("hedged_requests") == 0
+        hedger.close()
+
+    def test_slow_call_is_hedged_and_hedge_wins(self):
+        """Test that a second call is started and the faster result is used."""
+        release = threading.Event()
+        calls = itertools.count(1)
+
+        def func():
+            if next(calls) == 1:
+                release.wait(5)
+                return "slow"
+            return "fast"
+
+        hedger = Hedger(initial_delay=0.01)
+        try:
+            assert hedger.call(func) == "fast"
+        finally:
+            release.set()
+            hedger.close()
+
+        assert hedger.stats.get("hedged_requests") == 1
+        assert hedger.stats.get("hedge_wins") == 1
+
+    def test_transient_hedge_failure_does_not_win(self):
+        """Test that a failing hedge waits for the primary result."""
+        calls = itertools.count(1)
+
+        def func():
+            if next(calls) == 1:
+                time.sleep(0.1)
+                return "primary"
+            raise Flaky()
+
+        hedger = Hedger(initial_delay=0.01, transient_types=(Flaky,))
+
+        assert hedger.call(func) == "primary"
+        assert hedger.stats.get("hedge_wins") == 0
+        hedger.close()
+
+    def test_delay_follows_p95_once_warmed_up(self):
+        """Test that the hedge delay switches from the initial value to p95."""
+        hedger = Hedger(initial_delay=1.0, min_samples=20)
+        for i in range(100):
+            hedger.latencies.record(i / 1000)
+
+        assert hedger.delay == 0.095
+        hedger.close()
+
+    def test_latency_tracker_window(self):
+        """Test that old samples fall out of the window."""
+        tracker = LatencyTracker(window=3)
+        for value in [9.0, 1.0, 2.0, 3.0]:
+            tracker.record(value)
+
+        assert len(tracker) == 3
+        assert tracker.percentile(1.0) == 3.0
+        assert LatencyTracker().percentile(0.95) is None
+
+
+class TestRetriesInKRSClient:
+    """Test RealKRSClient retrying transient failures."""
+
+    @responses.activate
+    def test_reset_connection_is_retried(self):
+        """Test that a reset connection does not fail the lookup."""
+        krs = "1234567890"
+        responses.add(
+            responses.GET,
+            krs_url(krs),
+            body=requests.exceptions.ConnectionError("reset"),
+        )
+        responses.add(responses.GET, krs_url(krs), json=krs_payload("Test Foundation"))
+        client = RealKRSClient(KRSClientConfig(retry_base_delay=0))
+
+        assert client.validate_krs(krs, "Test Foundation") == (True, "")
+        assert client.stats.get("attempts") == 2
+        assert client.stats.get("retries") == 1
+        assert any(
+            "próby pobrania z API KRS: 2" in line for line in client.summary_lines()
+        )
+
+    @responses.activate
+    def test_server_errors_exhaust_attempts(self):
+        """Test that persistent 5xx responses fail after all attempts."""
+        krs = "1234567890"
+        responses.add(responses.GET, krs_url(krs), status=503)
+        client = RealKRSClient(
+            KRSClientConfig(retry_attempts=3, retry_base_delay=0, registries=("S",))
+        )
+
+        is_valid, message = client.validate_krs(krs)
+
+        assert not is_valid
+        assert "błąd sieci" in message
+        assert len(responses.calls) == 3
+
+    @responses.activate
+    def test_not_found_is_not_retried(self):
+        """Test that a definitive 404 is not retried."""
+        krs = "1234567890"
+        responses.add(responses.GET, krs_url(krs), status=404)
+        client = RealKRSClient(KRSClientConfig(retry_base_delay=0, registries=("S",)))
+
+        assert not client.validate_krs(krs)[0]
+        assert len(responses.calls) == 1
+
+    def test_slow_response_is_hedged(self, registry):
+        """Test that a hedged request answers when the first one stalls."""
+        body = krs_document("Test Foundation")
+        calls = itertools.count(1)
+
+        def handler(request):
+            if next(calls) == 1:
+                time.sleep(1)
+            return 200, body, {"Content-Type": "application/json"}
+
+        registry.routes["/api/krs/OdpisAktualny/1234567890"] = handler
+        client = RealKRSClient(
+            KRSClientConfig(hedge=True, hedge_delay=0.05, registries=("S",))
+        )
+
+        started = time.monotonic()
+        assert client.validate_krs("1234567890", "Test Foundation") == (True, "")
+        assert time.monotonic() - started < 1
+        assert client.stats.get("hedge_wins") == 1
+        client.close()
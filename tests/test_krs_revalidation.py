@@ -0,0 +1,171 @@
+"""
+Tests for conditional revalidation of cached KRS entries.
+"""
+
+import threading
+import time
+
+from conftest import krs_document
+from krs_cache import KRSCache
+from validators import RealKRSClient, KRSClientConfig
+
+KRS = "1234567890"
+ROUTE = f"/api/krs/OdpisAktualny/{KRS}"
+
+
+def conditional_handler(name, etag=None, last_modified=None):
+    def handler(request):
+        if etag and request.headers.get("If-None-Match") == etag:
+            return 304, b"", {"ETag": etag}
+        if last_modified and request.headers.get("If-Modified-Since") == last_modified:
+            return 304, b"", {}
+        headers = {"Content-Type": "application/json"}
+        if etag:
+            headers["ETag"] = etag
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+        return 200, krs_document(name), headers
+
+    return handler
+
+
+def make_client(tmp_path):
+    config = KRSClientConfig(cache_path=str(tmp_path / "krs.sqlite"), registries=("S",))
+    return RealKRSClient(config)
+
+
+class TestKRSCacheValidators:
+    """Test storing HTTP validators in the cache."""
+
+    def test_validators_round_trip(self, tmp_path):
+        """Test that validators are stored and expired entries can be requested."""
+        cache = KRSCache(str(tmp_path / "krs.sqlite"), ttl=10)
+        cache.put(KRS, True, "X", fetched_at=0, etag='"v1"', content_hash="abc")
+
+        assert cache.get(KRS, now=100) is None
+        entry = cache.get(KRS, now=100, include_expired=True)
+        assert entry.is_expired
+        assert entry.etag == '"v1"'
+        assert entry.content_hash == "abc"
+        assert entry.can_revalidate
+
+        cache.touch(KRS, fetched_at=95)
+        assert cache.get(KRS, now=100).name == "X"
+
+
+class TestConditionalRevalidation:
+    """Test revalidating expired entries against a local KRS stand-in."""
+
+    def test_etag_not_modified(self, registry, tmp_path):
+        """Test that an unchanged entry costs only a 304 response."""
+        registry.routes[ROUTE] = conditional_handler("Fundacja", etag='"v1"')
+        client = make_client(tmp_path)
+        assert client.validate_krs(KRS, "Fundacja") == (True, "")
+        client.close()
+
+        KRSCache(str(tmp_path / "krs.sqlite")).touch(KRS, fetched_at=0)
+        client = make_client(tmp_path)
+
+        assert client.validate_krs(KRS, "Fundacja") == (True, "")
+        assert registry.requests[-1][1].get("If-None-Match") == '"v1"'
+        assert client.stats.get("cache_revalidated") == 1
+        entry = client.cache.get(KRS)
+        assert entry is not None and time.time() - entry.fetched_at < 60
+        client.close()
+
+    def test_last_modified_not_modified(self, registry, tmp_path):
+        """Test revalidation with If-Modified-Since."""
+        stamp = "Wed, 01 Oct 2025 10:00:00 GMT"
+        registry.routes[ROUTE] = conditional_handler("Fundacja", last_modified=stamp)
+        KRSCache(str(tmp_path / "krs.sqlite")).put(
+            KRS, True, "Fundacja", fetched_at=0, last_modified=stamp
+        )
+        client = make_client(tmp_path)
+
+        assert client.validate_krs(KRS, "Fundacja") == (True, "")
+        assert registry.requests[-1][1].get("If-Modified-Since") == stamp
+        assert client.stats.get("cache_revalidated") == 1
+        client.close()
+
+    def test_changed_entry_is_downloaded(self, registry, tmp_path):
+        """Test that a changed registry entry replaces the cached one."""
+        registry.routes[ROUTE] = conditional_handler("Nowa nazwa", etag='"v2"')
+        KRSCache(str(tmp_path / "krs.sqlite")).put(
+            KRS, True, "Stara nazwa", fetched_at=0, etag='"v1"'
+        )
+        client = make_client(tmp_path)
+
+        assert client.validate_krs(KRS, "Nowa nazwa") == (True, "")
+        assert client.stats.get("cache_revalidated") == 0
+        assert client.cache.get(KRS).etag == '"v2"'
+        client.close()
+
+    def test_content_hash_without_http_validators(self, registry, tmp_path):
+        """Test that servers without validators still report unchanged entries."""
+        registry.routes[ROUTE] = conditional_handler("Fundacja")
+        client = make_client(tmp_path)
+        client.validate_krs(KRS)
+        client.close()
+
+        cache = KRSCache(str(tmp_path / "krs.sqlite"))
+        assert not cache.get(KRS).can_revalidate
+        cache.touch(KRS, fetched_at=0)
+        client = make_client(tmp_path)
+
+        assert client.validate_krs(KRS, "Fundacja") == (True, "")
+        assert "If-None-Match" not in registry.requests[-1][1]
+        assert client.stats.get("cache_unchanged") == 1
+        client.close()
+
+
+class TestBackgroundRevalidation:
+    """Test refreshing stale entries in the background."""
+
+    def test_refreshes_are_bounded_and_deduplicated(self, registry, tmp_path):
+        """Test that many stale entries never start more than a few refreshes."""
+        numbers = [f"{i:010d}" for i in range(1, 13)]
+        path = str(tmp_path / "krs.sqlite")
+        cache = KRSCache(path)
+        for krs in numbers:
+            cache.put(krs, found=True, name="Fundacja", fetched_at=0)
+        cache.close()
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def slow(request):
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.pop()
+            return 200, krs_document("Fundacja"), {}
+
+        registry.default_handler = slow
+        config = KRSClientConfig(
+            cache_path=path, cache_ttl=1, cache_stale_ttl=1e12, registries=("S",)
+        )
+        client = RealKRSClient(config)
+
+        for _ in range(2):
+            for krs in numbers:
+                assert client.fetch(krs) == "Fundacja"
+        client.close()
+
+        assert len(registry.requests) == len(numbers)
+        assert max(peak) <= config.revalidation_workers
+        assert not any(
+            t.name.startswith("krs-revalidate") for t in threading.enumerate()
+        )
+
+    def test_close_releases_cache_connections(self, registry, tmp_path):
+        """Test that connections opened by worker threads are closed too."""
+        registry.add_krs(KRS, "Fundacja")
+        client = make_client(tmp_path)
+
+        client.validate_many([(KRS, "Fundacja"), ("0000000001", None)])
+        assert len(client.cache._connections) >= 2
+        client.close()
+
+        assert client.cache._connections == []
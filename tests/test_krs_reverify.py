@@ -0,0 +1,174 @@
+"""
+Tests for the rolling KRS re-verification scheduler.
+"""
+
+import json
+
+import responses
+import yaml
+from click.testing import CliRunner
+
+from conftest import krs_payload, krs_url
+import krs_reverify
+from krs_reverify import CatalogueEntry
+from krs_tools import cli
+
+
+def entries():
+    return [
+        CatalogueEntry("a.yaml", "0000000001", "Fundacja A"),
+        CatalogueEntry("b.yaml", "0000000002", "Fundacja B"),
+        CatalogueEntry("c.yaml", "0000000003", "Fundacja C"),
+    ]
+
+
+def record(krs, name, verified_at, status="ok"):
+    return {"krs": krs, "name": name, "verified_at": verified_at, "status": status}
+
+
+class TestSchedule:
+    """Test choosing which entries to re-verify."""
+
+    def test_never_verified_then_oldest_first(self):
+        """Test that new entries come first, then the longest unverified ones."""
+        records = {
+            "a.yaml": record("0000000001", "Fundacja A", 200),
+            "b.yaml": record("0000000002", "Fundacja B", 100),
+        }
+
+        batch = krs_reverify.schedule(entries(), records, budget=2)
+
+        assert [e.file for e in batch] == ["c.yaml", "b.yaml"]
+
+    def test_edited_entry_counts_as_unverified(self):
+        """Test that changing the expected name puts the entry back in front."""
+        records = {
+            "a.yaml": record("0000000001", "Stara nazwa", 300),
+            "b.yaml": record("0000000002", "Fundacja B", 100),
+            "c.yaml": record("0000000003", "Fundacja C", 200),
+        }
+
+        batch = krs_reverify.schedule(entries(), records, budget=1)
+
+        assert [e.file for e in batch] == ["a.yaml"]
+
+
+class TestReverify:
+    """Test updating verification records."""
+
+    def test_records_drift_and_skips_unverified(self, mock_krs_client):
+        """Test that drift is recorded and unchecked entries keep their time."""
+        mock_krs_client.set_response("0000000001", False, "Niezgodność nazwy")
+        mock_krs_client.set_response("0000000002", True, "⚠️ Przerwa techniczna")
+        records = {
+            "b.yaml": record("0000000002", "Fundacja B", 50),
+            "gone.yaml": record("0000000009", "Usunięta", 10),
+        }
+
+        result = krs_reverify.reverify(
+            entries(), records, mock_krs_client, budget=3, now=1000
+        )
+
+        assert records["a.yaml"]["status"] == krs_reverify.DRIFT
+        assert records["b.yaml"]["verified_at"] == 50
+        assert records["c.yaml"] == {
+            **record("0000000003", "Fundacja C", 1000),
+            "message": "",
+        }
+        assert "gone.yaml" not in records
+        report = krs_reverify.drift_report(result, records)
+        assert [item["file"] for item in report["drift"]] == ["a.yaml"]
+        assert [item["file"] for item in report["unverified"]] == ["b.yaml"]
+
+    def test_report_keeps_earlier_drift(self, mock_krs_client):
+        """Test that drift found in an earlier run stays in the report."""
+        records = {
+            "a.yaml": record("0000000001", "Fundacja A", 2000, status="drift"),
+        }
+
+        result = krs_reverify.reverify(
+            entries(), records, mock_krs_client, budget=1, now=1000
+        )
+
+        assert [e.file for e, _, _ in result.checked] == ["b.yaml"]
+        report = krs_reverify.drift_report(result, records)
+        assert [item["file"] for item in report["drift"]] == ["a.yaml"]
+
+
+class TestReverifyCommand:
+    """Test the reverify-krs command end to end."""
+
+    def write_organizations(self, directory, names):
+        for i, name in enumerate(names, start=1):
+            data = {"nazwa": name, "krs": f"{i:010d}", "nazwa_w_krs": name}
+            (directory / f"org-{i}.yaml").write_text(
+                yaml.dump(data, allow_unicode=True), encoding="utf-8"
+            )
+
+    def invoke(self, orgs, state, *args):
+        return CliRunner().invoke(
+            cli,
+            [
+                "reverify-krs",
+                "--organizations-dir",
+                str(orgs),
+                "--state",
+                str(state),
+                "--krs-rate-limit",
+                "0",
+                *args,
+            ],
+        )
+
+    @responses.activate
+    def test_budgeted_runs_cover_catalogue_and_report_drift(self, tmp_path):
+        """Test that runs with a budget of one walk the catalogue in turn."""
+        orgs = tmp_path / "organizations"
+        orgs.mkdir()
+        self.write_organizations(orgs, ["Fundacja A", "Fundacja B"])
+        responses.add(
+            responses.GET,
+            krs_url("0000000001", "S"),
+            json=krs_payload("Fundacja A"),
+        )
+        responses.add(
+            responses.GET,
+            krs_url("0000000002", "S"),
+            json=krs_payload("Fundacja B – nowa nazwa"),
+        )
+        for krs in ("0000000001", "0000000002"):
+            responses.add(responses.GET, krs_url(krs, "P"), status=404)
+        state = tmp_path / "state.json"
+        report = tmp_path / "drift.json"
+
+        first = self.invoke(orgs, state, "--budget", "1")
+        second = self.invoke(orgs, state, "--budget", "1", "--report", str(report))
+
+        assert first.exit_code == 0, first.output
+        assert second.exit_code == 1, second.output
+        assert "org-2.yaml" in second.output
+        drift = json.loads(report.read_text(encoding="utf-8"))["drift"]
+        assert [item["file"] for item in drift] == ["org-2.yaml"]
+        entries = json.loads(state.read_text(encoding="utf-8"))["entries"]
+        assert sorted(entries) == ["org-1.yaml", "org-2.yaml"]
+
+    def test_stamps_require_key(self, tmp_path):
+        """Test that stamps cannot be refreshed without the signing key."""
+        orgs = tmp_path / "organizations"
+        orgs.mkdir()
+        result = CliRunner().invoke(
+            cli,
+            [
+                "reverify-krs",
+                "--organizations-dir",
+                str(orgs),
+                "--state",
+                str(tmp_path / "state.json"),
+                "--stamps",
+                str(tmp_path / "stamps.json"),
+            ],
+            env={"KRS_STAMPS_KEY": ""},
+        )
+
+        assert result.exit_code == 2
+        assert "KRS_STAMPS_KEY" in result.output
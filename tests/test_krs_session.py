@@ -0,0 +1,143 @@
+"""
+Tests for the pooled keep-alive KRS HTTP session.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import responses
+
+from conftest import krs_payload, krs_url
+from krs_puller import KRSDataPuller, create_krs_session, session_pool_stats
+from validators import RealKRSClient, KRSClientConfig
+from validate import OrganizationValidator
+
+
+class TestKRSSession:
+    """Test connection pooling behaviour."""
+
+    def test_sequential_requests_reuse_one_connection(self, krs_server):
+        """Test that keep-alive requests share a single TCP connection."""
+        krs_server.add_krs("1234567890", "Test Foundation")
+        session = create_krs_session(pool_size=2)
+
+        for _ in range(5):
+            response = session.get(
+                f"{krs_server.base_url}/api/krs/OdpisAktualny/1234567890", timeout=5
+            )
+            assert response.status_code == 200
+
+        assert session_pool_stats(session) == (1, 5)
+
+    def test_pool_size_bounds_connections(self, krs_server):
+        """Test that concurrent requests never open more than pool_size connections."""
+        krs_server.add_krs("1234567890", "Test Foundation")
+        session = create_krs_session(pool_size=2)
+        url = f"{krs_server.base_url}/api/krs/OdpisAktualny/1234567890"
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(
+                executor.map(
+                    lambda _: session.get(url, timeout=5).status_code, range(20)
+                )
+            )
+
+        connections, sent = session_pool_stats(session)
+        assert statuses == [200] * 20
+        assert connections <= 2
+        assert sent == 20
+
+    def test_alternating_hosts_reuse_connections(self, krs_server_factory):
+        """Test that switching between failover hosts keeps both pools alive."""
+        servers = [krs_server_factory(), krs_server_factory()]
+        for server in servers:
+            server.add_krs("1234567890", "Test Foundation")
+        session = create_krs_session(pool_size=2, hosts=2)
+
+        for _ in range(10):
+            for server in servers:
+                url = f"{server.base_url}/api/krs/OdpisAktualny/1234567890"
+                assert session.get(url, timeout=5).status_code == 200
+
+        assert session_pool_stats(session) == (2, 20)
+
+    def test_evicted_pools_are_still_counted(self, krs_server_factory):
+        """Test that reuse statistics include pools evicted for another host."""
+        servers = [krs_server_factory(), krs_server_factory()]
+        for server in servers:
+            server.add_krs("1234567890", "Test Foundation")
+        session = create_krs_session(pool_size=2, hosts=1)
+
+        for _ in range(3):
+            for server in servers:
+                url = f"{server.base_url}/api/krs/OdpisAktualny/1234567890"
+                assert session.get(url, timeout=5).status_code == 200
+
+        assert session_pool_stats(session) == (6, 6)
+
+    def test_pools_cover_every_endpoint(self):
+        """Test that the client keeps a pool for every endpoint host."""
+        config = KRSClientConfig(
+            endpoints=("http://mirror:8080/api/", "https://api-krs.ms.gov.pl/api/"),
+            cache_service_url="http://cache:8765",
+        )
+        client = RealKRSClient(config)
+
+        assert client.session.get_adapter("http://x")._pool_connections == 2
+        assert client.remote_cache.session is not client.session
+        client.close()
+
+    @responses.activate
+    def test_puller_uses_injected_session(self):
+        """Test that KRSDataPuller sends its request through the given session."""
+        krs = "1234567890"
+        responses.add(
+            responses.GET,
+            krs_url(krs),
+            json=krs_payload("X"),
+        )
+        session = create_krs_session()
+        sent = []
+        original_get = session.get
+
+        def tracking_get(url, **kwargs):
+            sent.append(kwargs["timeout"])
+            return original_get(url, **kwargs)
+
+        session.get = tracking_get
+
+        puller = KRSDataPuller(krs, session=session, timeout=(1.0, 2.0))
+
+        assert puller.name == "X"
+        assert sent == [(1.0, 2.0)]
+
+
+class TestSessionWiring:
+    """Test that the session is shared across the validator."""
+
+    def test_validator_injects_single_session(self, mock_repository):
+        """Test that OrganizationValidator creates and injects one session."""
+        config = KRSClientConfig(pool_size=3, connect_timeout=1.5, read_timeout=4.0)
+        validator = OrganizationValidator(mock_repository, "adres", config)
+
+        assert validator.krs_client.session is validator.krs_session
+        adapter = validator.krs_session.get_adapter("https://api-krs.ms.gov.pl")
+        assert adapter._pool_maxsize == 3
+        validator.close()
+
+    @responses.activate
+    def test_summary_reports_lookups(self):
+        """Test that run statistics are reported by the client."""
+        krs = "1234567890"
+        responses.add(
+            responses.GET,
+            krs_url(krs),
+            json=krs_payload("X"),
+        )
+        client = RealKRSClient()
+
+        client.validate_krs(krs)
+        client.validate_krs(krs)
+
+        lines = client.summary_lines()
+        assert "zapytania KRS: 1" in lines
+        assert any(line.startswith("powtórzone numery KRS") for line in lines)
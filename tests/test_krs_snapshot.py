@@ -0,0 +1,121 @@
+"""
+Tests for offline KRS snapshots.
+"""
+
+import json
+
+import pytest
+import responses
+from click.testing import CliRunner
+
+from conftest import krs_payload, krs_url
+from krs_snapshot import KRSSnapshot, KRSSnapshotError, build_snapshot
+from krs_tools import cli
+from validators import RealKRSClient, KRSClientConfig
+
+
+def dump_lines(entries):
+    return [json.dumps({"krs": krs, "nazwa": name}) for krs, name in entries]
+
+
+class TestKRSSnapshot:
+    """Test building and reading snapshots."""
+
+    def test_lookup_every_entry(self, tmp_path):
+        """Test that every entry of the dump can be found by binary search."""
+        entries = [
+            (f"{i * 7919 % 10**10:010d}", f"Fundacja {i} ąęł") for i in range(500)
+        ]
+        path = str(tmp_path / "krs.snap")
+
+        assert build_snapshot(dump_lines(entries), path) == 500
+
+        snapshot = KRSSnapshot(path)
+        assert len(snapshot) == 500
+        for krs, name in entries:
+            assert snapshot.lookup(krs) == name
+        snapshot.close()
+
+    def test_missing_numbers_return_none(self, tmp_path):
+        """Test lookups below, between and above stored keys."""
+        path = str(tmp_path / "krs.snap")
+        build_snapshot(dump_lines([("0000000010", "A"), ("0000000030", "B")]), path)
+        snapshot = KRSSnapshot(path)
+
+        assert snapshot.lookup("0000000001") is None
+        assert snapshot.lookup("0000000020") is None
+        assert snapshot.lookup("0000000040") is None
+        assert snapshot.lookup("not-a-krs") is None
+
+    def test_empty_snapshot(self, tmp_path):
+        """Test that an empty dump produces a valid, empty snapshot."""
+        path = str(tmp_path / "krs.snap")
+        build_snapshot([], path)
+
+        assert KRSSnapshot(path).lookup("1234567890") is None
+
+    def test_invalid_dump_line(self, tmp_path):
+        """Test that malformed lines are reported."""
+        with pytest.raises(KRSSnapshotError):
+            build_snapshot(['{"krs": "12ab"}'], str(tmp_path / "krs.snap"))
+
+    def test_rejects_foreign_files(self, tmp_path):
+        """Test that files without the snapshot header are rejected."""
+        path = tmp_path / "krs.snap"
+        path.write_bytes(b"not a snapshot at all")
+
+        with pytest.raises(KRSSnapshotError):
+            KRSSnapshot(str(path))
+
+    def test_build_snapshot_command(self, tmp_path):
+        """Test the build-snapshot CLI command."""
+        dump = tmp_path / "dump.jsonl"
+        dump.write_text("\n".join(dump_lines([("1234567890", "Fundacja")])))
+        output = tmp_path / "krs.snap"
+
+        result = CliRunner().invoke(cli, ["build-snapshot", str(dump), str(output)])
+
+        assert result.exit_code == 0
+        assert KRSSnapshot(str(output)).lookup("1234567890") == "Fundacja"
+
+
+class TestSnapshotInKRSClient:
+    """Test RealKRSClient consulting a snapshot."""
+
+    @responses.activate
+    def test_snapshot_hit_needs_no_network(self, tmp_path):
+        """Test that snapshot hits never reach the API."""
+        path = str(tmp_path / "krs.snap")
+        build_snapshot(dump_lines([("1234567890", "Test Foundation")]), path)
+        client = RealKRSClient(KRSClientConfig(snapshot_path=path))
+
+        assert client.validate_krs("1234567890", "Test Foundation") == (True, "")
+        assert len(responses.calls) == 0
+
+    @responses.activate
+    def test_miss_falls_back_to_live_api(self, tmp_path):
+        """Test that misses query the API when fallback is enabled."""
+        path = str(tmp_path / "krs.snap")
+        build_snapshot([], path)
+        responses.add(
+            responses.GET,
+            krs_url("1234567890"),
+            json=krs_payload("X"),
+        )
+        client = RealKRSClient(KRSClientConfig(snapshot_path=path, registries=("S",)))
+
+        assert client.validate_krs("1234567890", "X") == (True, "")
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_miss_without_fallback_is_not_found(self, tmp_path):
+        """Test that misses fail without network access when fallback is disabled."""
+        path = str(tmp_path / "krs.snap")
+        build_snapshot([], path)
+        config = KRSClientConfig(snapshot_path=path, snapshot_fallback=False)
+
+        is_valid, message = RealKRSClient(config).validate_krs("1234567890")
+
+        assert not is_valid
+        assert "nie zostało znalezione" in message
+        assert len(responses.calls) == 0
@@ -0,0 +1,254 @@
+"""
+Tests for KRS verification stamps.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from click.testing import CliRunner
+
+from krs_snapshot import build_snapshot
+from krs_stamps import KRSStamps
+from validate import main
+from validators import OrganizationSchemaValidator
+
+KRS = "1234567890"
+KEY = "sekret"
+NOW = datetime(2026, 1, 31, tzinfo=timezone.utc)
+
+ORGANIZATION_YAML = f"""\
+nazwa: Fundacja
+adres: fundacja
+strona: https://fundacja.org
+krs: "{KRS}"
+nazwa_w_krs: Zmyślona nazwa
+dostawa:
+  ulica: Leśna 1
+  kod: 00-001
+  miasto: Łódź
+  telefon: "123456789"
+produkty:
+  - nazwa: Koc
+    link: https://example.com/koc
+"""
+
+
+def organization(name="Fundacja"):
+    return {"krs": KRS, "nazwa_w_krs": name}
+
+
+class CountingKRSClient:
+    """KRS client recording which numbers were looked up."""
+
+    def __init__(self, response=(True, "")):
+        self.response = response
+        self.looked_up = []
+
+    def validate_krs(self, krs, expected_name=None, deadline=None):
+        self.looked_up.append(krs)
+        return self.response
+
+    def validate_many(self, items, deadline=None):
+        return [self.validate_krs(krs, name) for krs, name in items]
+
+
+class TestKRSStamps:
+    """Test stamp freshness and persistence."""
+
+    def test_fresh_only_for_unchanged_values(self, tmp_path):
+        """Test that editing the name or waiting too long invalidates a stamp."""
+        stamps = KRSStamps(str(tmp_path / "stamps.json"), KEY, max_age_days=30)
+        stamps.stamp(KRS, "Fundacja", now=NOW)
+
+        assert stamps.is_fresh(KRS, "Fundacja", now=NOW + timedelta(days=29))
+        assert not stamps.is_fresh(KRS, "Fundacja", now=NOW + timedelta(days=31))
+        assert not stamps.is_fresh(KRS, "Inna nazwa", now=NOW)
+        assert not stamps.is_fresh("0000000001", "Fundacja", now=NOW)
+
+    def test_save_and_reload(self, tmp_path):
+        """Test that stamps survive a save and are written as sorted JSON."""
+        path = tmp_path / "stamps.json"
+        stamps = KRSStamps(str(path), KEY)
+        stamps.stamp(KRS, "Fundacja", now=NOW)
+        stamps.save()
+
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        assert manifest["stamps"][KRS]["verified_at"] == "2026-01-31T00:00:00+00:00"
+        assert KRSStamps(str(path), KEY).is_fresh(KRS, "Fundacja", now=NOW)
+
+    def test_prune_and_remove(self, tmp_path):
+        """Test that stamps of removed or drifted organizations are dropped."""
+        stamps = KRSStamps(str(tmp_path / "stamps.json"), KEY)
+        stamps.stamp(KRS, "Fundacja", now=NOW)
+        stamps.stamp("0000000001", "Inna", now=NOW)
+
+        stamps.prune([KRS])
+        assert not stamps.is_fresh("0000000001", "Inna", now=NOW)
+        stamps.remove(KRS)
+        assert not stamps.is_fresh(KRS, "Fundacja", now=NOW)
+
+    def test_stamps_are_signed(self, tmp_path):
+        """Test that stamps not made with the key are not trusted."""
+        path = tmp_path / "stamps.json"
+        stamps = KRSStamps(str(path), KEY)
+        stamps.stamp(KRS, "Fundacja", now=NOW)
+        stamps.save()
+
+        assert not KRSStamps(str(path), "inny").is_fresh(KRS, "Fundacja", now=NOW)
+        unkeyed = hashlib.sha256(json.dumps([KRS, "Fundacja"]).encode()).hexdigest()
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        manifest["stamps"][KRS]["hash"] = unkeyed
+        path.write_text(json.dumps(manifest), encoding="utf-8")
+        assert not KRSStamps(str(path), KEY).is_fresh(KRS, "Fundacja", now=NOW)
+
+    def test_time_is_signed(self, tmp_path):
+        """Test that moving the verification time invalidates the stamp."""
+        path = tmp_path / "stamps.json"
+        stamps = KRSStamps(str(path), KEY)
+        stamps.stamp(KRS, "Fundacja", now=NOW)
+        stamps.save()
+
+        later = NOW + timedelta(days=60)
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        manifest["stamps"][KRS]["verified_at"] = later.isoformat()
+        path.write_text(json.dumps(manifest), encoding="utf-8")
+        assert not KRSStamps(str(path), KEY).is_fresh(KRS, "Fundacja", now=later)
+
+    def test_future_stamp_is_not_fresh(self, tmp_path):
+        """Test that a stamp dated after now never counts as fresh."""
+        stamps = KRSStamps(str(tmp_path / "stamps.json"), KEY)
+        stamps.stamp(KRS, "Fundacja", now=datetime(2999, 1, 1, tzinfo=timezone.utc))
+
+        assert not stamps.is_fresh(KRS, "Fundacja", now=NOW)
+
+    @pytest.mark.parametrize(
+        "manifest",
+        [
+            "[]",
+            "{",
+            '{"version": 3, "stamps": []}',
+            '{"version": 3, "stamps": {"%s": "x"}}' % KRS,
+            '{"version": 3, "stamps": {"%s": {"hash": 1}}}' % KRS,
+        ],
+    )
+    def test_malformed_manifest_means_no_stamps(self, tmp_path, manifest):
+        """Test that a broken manifest from a pull request is treated as empty."""
+        path = tmp_path / "stamps.json"
+        path.write_text(manifest, encoding="utf-8")
+
+        assert not KRSStamps(str(path), KEY).is_fresh(KRS, "Fundacja", now=NOW)
+
+    def test_naive_verification_time_is_not_fresh(self, tmp_path):
+        """Test that a signed time without a timezone does not crash the check."""
+        stamps = KRSStamps(str(tmp_path / "stamps.json"), KEY)
+        stamps.stamp(KRS, "Fundacja", now=datetime(2026, 1, 30))
+
+        assert not stamps.is_fresh(KRS, "Fundacja", now=NOW)
+
+    def test_key_is_required(self, tmp_path):
+        """Test that stamps cannot be used without a key."""
+        with pytest.raises(ValueError):
+            KRSStamps(str(tmp_path / "stamps.json"), "")
+
+
+class TestStampsInValidateCommand:
+    """Test that a pull request cannot vouch for its own KRS values."""
+
+    def invoke(self, tmp_path, stamps_key, *args):
+        orgs = tmp_path / "organizations"
+        orgs.mkdir(exist_ok=True)
+        (orgs / "fundacja.yaml").write_text(ORGANIZATION_YAML, encoding="utf-8")
+        snapshot = str(tmp_path / "krs.snap")
+        build_snapshot([], snapshot)  # the made-up name is not in KRS
+        return CliRunner().invoke(
+            main,
+            [
+                "--files",
+                str(orgs / "fundacja.yaml"),
+                "--organizations-dir",
+                str(orgs),
+                "--krs-snapshot",
+                snapshot,
+                "--no-krs-snapshot-fallback",
+                "--krs-stamps",
+                str(tmp_path / "stamps.json"),
+                *args,
+            ],
+            env={"KRS_STAMPS_KEY": stamps_key or ""},
+        )
+
+    def write_stamp(self, tmp_path, key):
+        stamps = KRSStamps(str(tmp_path / "stamps.json"), key)
+        stamps.stamp(KRS, "Zmyślona nazwa")
+        stamps.save()
+
+    def test_stamp_forged_without_the_key_is_ignored(self, tmp_path):
+        """Test that a stamp signed with another key does not skip the check."""
+        self.write_stamp(tmp_path, "klucz-autora-pr")
+
+        result = self.invoke(tmp_path, KEY)
+
+        assert result.exit_code == 1, result.output
+        assert "Walidacja KRS nie powiodła się" in result.output
+
+    def test_stamps_ignored_without_key(self, tmp_path):
+        """Test that validation without the secret checks every number."""
+        self.write_stamp(tmp_path, KEY)
+
+        result = self.invoke(tmp_path, None)
+
+        assert result.exit_code == 1, result.output
+        assert "znaczniki weryfikacji pominięte" in result.output
+
+    def test_signed_stamp_skips_lookup(self, tmp_path):
+        """Test that a stamp signed with the key is still honoured."""
+        self.write_stamp(tmp_path, KEY)
+
+        result = self.invoke(tmp_path, KEY)
+
+        assert result.exit_code == 0, result.output
+        assert "pominięte dzięki znacznikom weryfikacji: 1" in result.output
+
+
+class TestStampsInSchemaValidator:
+    """Test that fresh stamps skip KRS lookups during validation."""
+
+    def test_fresh_stamp_skips_lookup(self, tmp_path):
+        """Test that a stamped, unchanged pair needs no KRS lookup at all."""
+        stamps = KRSStamps(str(tmp_path / "stamps.json"), KEY)
+        stamps.stamp(KRS, "Fundacja")
+        client = CountingKRSClient()
+        validator = OrganizationSchemaValidator("adres", client, stamps=stamps)
+
+        validator.prefetch_krs([organization()])
+        errors, _ = validator.check_structure(organization())
+
+        assert client.looked_up == []
+        assert not any("KRS" in error for error in errors)
+        assert stamps.hits == 1
+
+    def test_changed_name_is_checked_and_stamped(self, tmp_path):
+        """Test that edited values are verified again and get a new stamp."""
+        stamps = KRSStamps(str(tmp_path / "stamps.json"), KEY)
+        stamps.stamp(KRS, "Stara nazwa")
+        client = CountingKRSClient()
+        validator = OrganizationSchemaValidator("adres", client, stamps=stamps)
+
+        validator.check_structure(organization())
+
+        assert client.looked_up == [KRS]
+        assert stamps.is_fresh(KRS, "Fundacja")
+
+    def test_failed_check_is_not_stamped(self, tmp_path):
+        """Test that warnings and failures leave no stamp behind."""
+        stamps = KRSStamps(str(tmp_path / "stamps.json"), KEY)
+        validator = OrganizationSchemaValidator(
+            "adres", CountingKRSClient((True, "⚠️ Przerwa techniczna")), stamps=stamps
+        )
+
+        validator.check_structure(organization())
+
+        assert not stamps.is_fresh(KRS, "Fundacja")
+        assert not stamps.changed
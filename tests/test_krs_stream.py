@@ -0,0 +1,128 @@
+"""
+Tests for streaming extraction of KRS response fields.
+"""
+
+import json
+import tracemalloc
+
+import pytest
+import responses
+
+from conftest import krs_url
+from krs_puller import KRSDataPuller, KRSMaintenanceError, KRSResponseTooLargeError
+from krs_stream import JSONStreamError, ResponseTooLargeError, project_stream
+
+NAME_PATH = ("odpis", "dane", "dzial1", "danePodmiotu", "nazwa")
+
+
+def chunked(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def odpis(name, padding=0):
+    return {
+        "odpis": {
+            "rodzaj": "Aktualny",
+            "naglowekA": {"numerKRS": "1234567890", "flagi": [True, False, None]},
+            "dane": {
+                "dzial1": {
+                    "danePodmiotu": {"formaPrawna": "FUNDACJA", "nazwa": name},
+                    "siedziba": [{"kraj": "POLSKA", "kod": 1.5e3}] * padding,
+                },
+                "dzial2": {"reprezentacja": {"sklad": [{"imie": "Jan"}]}},
+            },
+        }
+    }
+
+
+class TestProjectStream:
+    """Test the incremental JSON projector."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 100000])
+    def test_extracts_name_for_any_chunking(self, chunk_size):
+        """Test that chunk boundaries never change the result."""
+        name = 'Fundacja "Ząbek" \\ ☃ \U0001f600'
+        body = json.dumps(odpis(name), ensure_ascii=chunk_size % 2 == 0).encode()
+
+        values = project_stream(chunked(body, chunk_size), [NAME_PATH], len(body))
+
+        assert values == {NAME_PATH: name}
+
+    def test_missing_field_is_absent(self):
+        """Test that absent paths are simply not returned."""
+        body = json.dumps({"odpis": {"dane": {}}}).encode()
+
+        assert project_stream(chunked(body, 5), [NAME_PATH], 10**6) == {}
+
+    def test_array_paths(self):
+        """Test matching values inside arrays with the [] marker."""
+        body = b'{"a": [{"b": 1}, {"b": 2}], "c": [true]}'
+
+        values = project_stream([body], [("a", "[]", "b"), ("c", "[]")], 10**6)
+
+        assert values == {("a", "[]", "b"): 2, ("c", "[]"): True}
+
+    @pytest.mark.parametrize(
+        "body",
+        [b"Przerwa techniczna", b'{"a": }', b'{"a": 1,}', b"[1, 2", b'{"a" 1}'],
+    )
+    def test_invalid_documents_raise(self, body):
+        """Test that malformed JSON is rejected."""
+        with pytest.raises(JSONStreamError):
+            project_stream(chunked(body, 3), [("zzz",)], 10**6)
+
+    def test_size_cap(self):
+        """Test that bodies over the cap are aborted."""
+        body = json.dumps(odpis("X", padding=1000)).encode()
+
+        with pytest.raises(ResponseTooLargeError):
+            project_stream(chunked(body, 1024), [("missing",)], 4096)
+
+    def test_memory_does_not_grow_with_document(self):
+        """Test that peak memory stays far below the document size."""
+        body = json.dumps(odpis("Fundacja", padding=70000)).encode()
+        chunks = chunked(body, 16384)
+        assert len(body) > 2 * 1024 * 1024
+
+        tracemalloc.start()
+        values = project_stream(iter(chunks), [("missing",)], len(body))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert values == {}
+        assert peak < 256 * 1024
+
+
+class TestStreamingPuller:
+    """Test KRSDataPuller on top of the streaming projector."""
+
+    @responses.activate
+    def test_keeps_only_projection(self):
+        """Test that the puller keeps only the projected fields."""
+        responses.add(
+            responses.GET, krs_url("1234567890"), json=odpis("Fundacja X", 50)
+        )
+
+        puller = KRSDataPuller("1234567890")
+
+        assert puller.name == "Fundacja X"
+        assert puller.data == {
+            "odpis": {"dane": {"dzial1": {"danePodmiotu": {"nazwa": "Fundacja X"}}}}
+        }
+
+    @responses.activate
+    def test_maintenance_page_after_markup(self):
+        """Test that maintenance pages are still recognised."""
+        body = "<html>" + " " * 20000 + "<p>Przerwa techniczna</p></html>"
+        responses.add(responses.GET, krs_url("1234567890"), body=body)
+
+        with pytest.raises(KRSMaintenanceError):
+            KRSDataPuller("1234567890")
+
+    @responses.activate
+    def test_response_size_cap(self):
+        """Test that oversized responses are rejected."""
+        responses.add(responses.GET, krs_url("1234567890"), json=odpis("X", 1000))
+
+        with pytest.raises(KRSResponseTooLargeError):
+            KRSDataPuller("1234567890", max_response_bytes=1024)
@@ -0,0 +1,126 @@
+"""
+Tests for bulk synchronisation of nazwa_w_krs with the KRS registry.
+"""
+
+import pytest
+import responses
+from click.testing import CliRunner
+
+from conftest import krs_payload, krs_url
+from krs_sync import replace_name, yaml_scalar
+from krs_tools import cli
+
+ORGANIZATION = """\
+# Fundacja z komentarzem
+nazwa: Fundacja A
+adres: fundacja-a
+krs: "0000000001"
+nazwa_w_krs: FUNDACJA STARA  # nazwa z KRS
+produkty:
+  - nazwa: Koc
+"""
+
+
+class TestReplaceName:
+    """Test minimal text edits of nazwa_w_krs."""
+
+    def test_only_the_value_changes(self):
+        """Test that comments and other lines are kept byte for byte."""
+        updated = replace_name(ORGANIZATION, "FUNDACJA NOWA")
+
+        assert updated == ORGANIZATION.replace("FUNDACJA STARA", "FUNDACJA NOWA")
+
+    def test_quoting_style_is_kept(self):
+        """Test that quoted values stay quoted and are escaped correctly."""
+        text = "nazwa_w_krs: 'Stara'\r\nkrs: '0000000001'\r\n"
+
+        assert replace_name(text, "O'Neil") == (
+            "nazwa_w_krs: 'O''Neil'\r\nkrs: '0000000001'\r\n"
+        )
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("FUNDACJA NOWA", "FUNDACJA NOWA"),
+            ("FUNDACJA: NOWA", '"FUNDACJA: NOWA"'),
+            ('FUNDACJA "NOWA" #1', '"FUNDACJA \\"NOWA\\" #1"'),
+            ("true", '"true"'),
+        ],
+    )
+    def test_plain_values_are_quoted_when_needed(self, value, expected):
+        """Test that values that would not read back unchanged are quoted."""
+        assert yaml_scalar(value) == expected
+
+    def test_multi_line_value_is_left_alone(self):
+        """Test that block scalars are not edited automatically."""
+        assert replace_name("nazwa_w_krs: >\n  FUNDACJA\n  STARA\n", "X") is None
+
+    def test_missing_field_is_added_after_krs(self):
+        """Test that a missing nazwa_w_krs is inserted only when asked to."""
+        text = 'nazwa: A\nkrs: "0000000001"\nadres: a\n'
+
+        assert replace_name(text, "FUNDACJA") is None
+        assert replace_name(text, "FUNDACJA", add_missing=True) == (
+            'nazwa: A\nkrs: "0000000001"\nnazwa_w_krs: FUNDACJA\nadres: a\n'
+        )
+
+
+class TestSyncCommand:
+    """Test the sync-krs-names command end to end."""
+
+    def add_registry_names(self, names):
+        for krs, name in names.items():
+            responses.add(responses.GET, krs_url(krs, "S"), json=krs_payload(name))
+            responses.add(responses.GET, krs_url(krs, "P"), status=404)
+
+    def invoke(self, orgs, *args):
+        return CliRunner().invoke(
+            cli,
+            [
+                "sync-krs-names",
+                "--organizations-dir",
+                str(orgs),
+                "--krs-rate-limit",
+                "0",
+                *args,
+            ],
+        )
+
+    @responses.activate
+    def test_rewrites_only_differing_names(self, tmp_path):
+        """Test that renamed entries are fixed and matching ones untouched."""
+        orgs = tmp_path / "organizations"
+        orgs.mkdir()
+        (orgs / "a.yaml").write_text(ORGANIZATION, encoding="utf-8")
+        matching = ORGANIZATION.replace('"0000000001"', '"0000000002"').replace(
+            "FUNDACJA STARA", "Fundacja B"
+        )
+        (orgs / "b.yaml").write_text(matching, encoding="utf-8")
+        self.add_registry_names(
+            {"0000000001": "FUNDACJA NOWA", "0000000002": "FUNDACJA B"}
+        )
+
+        result = self.invoke(orgs)
+
+        assert result.exit_code == 0, result.output
+        assert "Zmieniono: 1, bez zmian: 1" in result.output
+        assert "a.yaml: 'FUNDACJA STARA' → 'FUNDACJA NOWA'" in result.output
+        assert (orgs / "a.yaml").read_text(encoding="utf-8") == ORGANIZATION.replace(
+            "FUNDACJA STARA", "FUNDACJA NOWA"
+        )
+        assert (orgs / "b.yaml").read_text(encoding="utf-8") == matching
+        assert not [p for p in orgs.iterdir() if p.name.startswith(".")]
+
+    @responses.activate
+    def test_dry_run_writes_nothing(self, tmp_path):
+        """Test that --dry-run only reports the changes."""
+        orgs = tmp_path / "organizations"
+        orgs.mkdir()
+        (orgs / "a.yaml").write_text(ORGANIZATION, encoding="utf-8")
+        self.add_registry_names({"0000000001": "FUNDACJA NOWA"})
+
+        result = self.invoke(orgs, "--dry-run")
+
+        assert result.exit_code == 0, result.output
+        assert "Do zmiany: 1" in result.output
+        assert (orgs / "a.yaml").read_text(encoding="utf-8") == ORGANIZATION
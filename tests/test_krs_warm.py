@@ -0,0 +1,121 @@
+"""
+Tests for the warm-krs cache prefetch command.
+"""
+
+import yaml
+import responses
+from click.testing import CliRunner
+
+from conftest import krs_payload, krs_url
+from krs_cache import KRSCache
+from krs_tools import cli, collect_krs_numbers
+from repository import FileSystemRepository
+
+
+def write_organizations(directory, numbers):
+    for i, krs in enumerate(numbers):
+        data = {"nazwa": f"Org {i}", "adres": f"org-{i}", "krs": krs}
+        (directory / f"org-{i}.yaml").write_text(yaml.dump(data), encoding="utf-8")
+
+
+def warm(organizations_dir, cache_path):
+    return CliRunner().invoke(
+        cli,
+        [
+            "warm-krs",
+            "--organizations-dir",
+            str(organizations_dir),
+            "--krs-cache",
+            str(cache_path),
+            "--krs-rate-limit",
+            "0",
+        ],
+    )
+
+
+class TestWarmKRS:
+    """Test pre-populating the KRS cache."""
+
+    def test_collects_distinct_valid_numbers(self, tmp_path):
+        """Test that duplicates and malformed numbers are dropped."""
+        write_organizations(tmp_path, ["0000000002", "0000000001", "0000000002", "12"])
+
+        numbers, file_count = collect_krs_numbers(FileSystemRepository(str(tmp_path)))
+
+        assert numbers == ["0000000001", "0000000002"]
+        assert file_count == 4
+
+    @responses.activate
+    def test_fills_cache_and_reports_coverage(self, tmp_path):
+        """Test that every number ends up cached, including not-found ones."""
+        orgs = tmp_path / "organizations"
+        orgs.mkdir()
+        write_organizations(orgs, ["0000000001", "0000000002"])
+        responses.add(responses.GET, krs_url("0000000001"), json=krs_payload("Org 0"))
+        for registry in "SP":
+            responses.add(responses.GET, krs_url("0000000002", registry), status=404)
+        cache_path = tmp_path / "krs.sqlite"
+
+        result = warm(orgs, cache_path)
+
+        assert result.exit_code == 0, result.output
+        assert "Pokrycie: 2/2 (100.0%)" in result.output
+        assert "zapytań/s" in result.output
+        cache = KRSCache(str(cache_path))
+        assert cache.get("0000000001").name == "Org 0"
+        assert not cache.get("0000000002").found
+
+    @responses.activate
+    def test_number_only_in_p_register_is_covered(self, tmp_path):
+        """Test that a number found in the P register is not reported as failed."""
+        orgs = tmp_path / "organizations"
+        orgs.mkdir()
+        write_organizations(orgs, ["0000000003"])
+        responses.add(responses.GET, krs_url("0000000003"), status=404)
+        responses.add(
+            responses.GET,
+            krs_url("0000000003", "P"),
+            json=krs_payload("Fundacja P"),
+        )
+        cache_path = tmp_path / "krs.sqlite"
+
+        result = warm(orgs, cache_path)
+
+        assert result.exit_code == 0, result.output
+        assert "Pokrycie: 1/1 (100.0%)" in result.output
+        assert "błędy: 0" in result.output
+        assert KRSCache(str(cache_path)).find("0000000003").registry == "P"
+
+    @responses.activate
+    def test_resumes_after_interruption(self, tmp_path):
+        """Test that numbers cached by an earlier, interrupted run are skipped."""
+        orgs = tmp_path / "organizations"
+        orgs.mkdir()
+        write_organizations(orgs, ["0000000001", "0000000002"])
+        responses.add(responses.GET, krs_url("0000000002"), json=krs_payload("Org 1"))
+        cache_path = tmp_path / "krs.sqlite"
+        KRSCache(str(cache_path)).put("0000000001", True, "Org 0")
+
+        result = warm(orgs, cache_path)
+
+        assert result.exit_code == 0, result.output
+        assert "już w pamięci: 1, zapytania do API: 1" in result.output
+        assert all("0000000002" in call.request.url for call in responses.calls)
+
+    @responses.activate
+    def test_failures_are_reported(self, tmp_path):
+        """Test that numbers that could not be fetched fail the command."""
+        orgs = tmp_path / "organizations"
+        orgs.mkdir()
+        write_organizations(orgs, ["0000000001"])
+        responses.add(
+            responses.GET,
+            krs_url("0000000001"),
+            body="<html>Przerwa techniczna</html>",
+        )
+
+        result = warm(orgs, tmp_path / "krs.sqlite")
+
+        assert result.exit_code == 1
+        assert "Pokrycie: 0/1 (0.0%)" in result.output
+        assert "0000000001" in result.output
@@ -0,0 +1,158 @@
+"""
+Tests for the persistent slug index.
+"""
+
+import json
+import os
+
+import pytest
+
+import repository
+from repository import FileSystemRepository
+
+
+def write(directory, name, slug, mtime_ns=None):
+    path = directory / name
+    path.write_text(f"nazwa: {name}\nadres: {slug}\n", encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def catalogue(tmp_path):
+    """An organizations directory with three files and a warm index."""
+    organizations = tmp_path / "organizations"
+    organizations.mkdir()
+    for i in range(3):
+        write(organizations, f"org{i}.yaml", f"org-{i}", mtime_ns=10**18 + i)
+    index_path = tmp_path / "slug-index.json"
+    FileSystemRepository(organizations, index_path=index_path).load_all_organizations(
+        "adres"
+    )
+    return organizations, index_path
+
+
+def load(organizations, index_path, files=()):
+    indexed = FileSystemRepository(organizations, index_path=index_path)
+    result = indexed.load_organizations("adres", list(files))
+    full = FileSystemRepository(organizations).load_organizations("adres", list(files))
+    assert result[:2] == full[:2]  # same slug map and messages as without the index
+    return result, indexed.slug_index
+
+
+class TestSlugIndex:
+    """Test incremental updates of the slug index."""
+
+    def test_no_change_run_opens_no_file(self, catalogue, monkeypatch):
+        """Test that a warm index answers from stat calls alone."""
+        organizations, index_path = catalogue
+        saved = index_path.read_bytes()
+        indexed = FileSystemRepository(organizations, index_path=index_path)
+        monkeypatch.setattr(repository, "_load_file", None)  # must not be called
+
+        slug_to_file, errors = indexed.load_all_organizations("adres")
+
+        assert sorted(slug_to_file) == ["org-0", "org-1", "org-2"]
+        assert errors == []
+        assert (indexed.slug_index.reused, indexed.slug_index.parsed) == (3, 0)
+        assert index_path.read_bytes() == saved
+
+    def test_changed_file_is_reparsed(self, catalogue):
+        """Test that an edit creating a duplicate is detected incrementally."""
+        organizations, index_path = catalogue
+        write(organizations, "org2.yaml", "org-0")
+
+        (slug_to_file, errors, _), slug_index = load(organizations, index_path)
+
+        assert (slug_index.reused, slug_index.parsed) == (2, 1)
+        assert "org-2" not in slug_to_file
+        assert len(errors) == 1 and "Duplikat adres 'org-0'" in errors[0]
+
+    def test_touched_file_is_only_hashed(self, catalogue):
+        """Test that a new mtime with the same content needs no parse."""
+        organizations, index_path = catalogue
+        os.utime(organizations / "org1.yaml", ns=(1, 1))
+
+        _, slug_index = load(organizations, index_path)
+
+        assert (slug_index.reused, slug_index.parsed) == (3, 0)
+        entry = json.loads(index_path.read_text())["files"]["org1.yaml"]
+        assert entry["mtime_ns"] == 1
+
+    def test_added_and_deleted_files(self, catalogue):
+        """Test that added files are read and deleted ones dropped."""
+        organizations, index_path = catalogue
+        (organizations / "org0.yaml").unlink()
+        write(organizations, "new.yml", "nowy")
+
+        (slug_to_file, _, _), slug_index = load(organizations, index_path)
+
+        assert sorted(slug_to_file) == ["nowy", "org-1", "org-2"]
+        assert slug_index.parsed == 1
+        files = json.loads(index_path.read_text())["files"]
+        assert sorted(files) == ["new.yml", "org1.yaml", "org2.yaml"]
+
+    def test_validated_files_are_always_parsed(self, catalogue):
+        """Test that documents being validated are read in full."""
+        organizations, index_path = catalogue
+
+        (_, _, records), slug_index = load(
+            organizations, index_path, [str(organizations / "org1.yaml")]
+        )
+
+        assert records[0].data == {"nazwa": "org1.yaml", "adres": "org-1"}
+        assert (slug_index.reused, slug_index.parsed) == (2, 1)
+
+    def test_broken_file_is_reported_every_run(self, catalogue):
+        """Test that files that fail to load are not remembered."""
+        organizations, index_path = catalogue
+        (organizations / "org1.yaml").write_text("adres: [\n", encoding="utf-8")
+
+        for _ in range(2):
+            (_, errors, _), _ = load(organizations, index_path)
+            assert len(errors) == 1 and "org1.yaml" in errors[0]
+        assert "org1.yaml" not in json.loads(index_path.read_text())["files"]
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            "{nie json",
+            '{"version": 0}',
+            "[]",
+            '{"version": 1, "slug_field": "adres", "files": []}',
+            '{"version": 1, "slug_field": "adres", "files": {"org0.yaml": "x"}}',
+        ],
+    )
+    def test_unusable_index_is_rebuilt(self, catalogue, content):
+        """Test that a corrupt or outdated index only costs a full read."""
+        organizations, index_path = catalogue
+        index_path.write_text(content, encoding="utf-8")
+
+        _, slug_index = load(organizations, index_path)
+
+        assert (slug_index.reused, slug_index.parsed) == (0, 3)
+        assert len(json.loads(index_path.read_text())["files"]) == 3
+
+    def test_other_slug_field_rebuilds_index(self, catalogue):
+        """Test that an index built for another slug field is not reused."""
+        organizations, index_path = catalogue
+        indexed = FileSystemRepository(organizations, index_path=index_path)
+
+        slug_to_file, _ = indexed.load_all_organizations("nazwa")
+
+        assert "org0.yaml" in slug_to_file
+        assert indexed.slug_index.reused == 0
+
+    def test_with_process_pool(self, catalogue):
+        """Test that the index and the process pool work together."""
+        organizations, index_path = catalogue
+        write(organizations, "org2.yaml", "org-9")
+        os.utime(organizations / "org1.yaml", ns=(1, 1))
+        indexed = FileSystemRepository(
+            organizations, processes=2, chunk_size=1, index_path=index_path
+        )
+
+        slug_to_file, errors = indexed.load_all_organizations("adres")
+
+        assert sorted(slug_to_file) == ["org-0", "org-1", "org-9"]
+        assert (indexed.slug_index.reused, indexed.slug_index.parsed) == (2, 1)
@@ -0,0 +1,214 @@
+"""
+Tests for the slug-only scanner used to build the slug index.
+"""
+
+import random
+from pathlib import Path
+
+import pytest
+import yaml
+
+from repository import FileSystemRepository, Organization, scan_slug
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+ORGANIZATION = {
+    "nazwa": 'Fundacja "Azyl"',
+    "adres": "fundacja-azyl",
+    "strona": "https://azyl.org.pl/?a=1&b=2",
+    "krs": "0000123456",
+    "dostawa": {"ulica": "Leśna 1", "kod": "00-001", "miasto": "Łódź"},
+    "produkty": [{"nazwa": f"Produkt {i}", "link": "https://x.pl"} for i in range(50)],
+}
+
+# Documents the scanner must read without falling back to a full parse
+SCANNED = [
+    "nazwa: Fundacja A\nadres: fundacja-a\n",
+    'nazwa: Fundacja "Azyl" # komentarz\nadres: azyl  # adres\n',
+    "adres: [pierwszy, drugi]\nnazwa: A\n",
+    "adres:\n- pierwszy\n- drugi\nnazwa: A\n",
+    "adres:\n  - pierwszy  # komentarz\n\n  - drugi\nprodukty: []\n",
+    "---\nadres: fundacja\n",
+    "nazwa: A\r\nadres: 'cudzysłów'\r\nkrs: '1'\r\n",
+    "adres: 2024\n",
+    "adres: yes\n",
+    "adres: 2024-01-01\n",
+    "adres:\n",
+    "adres: slug\n  ciąg dalszy\n",
+    "adres: |\n  wiele\n  linii\nnazwa: A\n",
+    "nazwa: A\n",
+    "",
+    "# sam komentarz\n",
+    "dostawa:\n  miasto: Łódź\n  telefon: '123'\nadres: a\n",
+    "produkty:\n- nazwa: Koc\n  link: https://x.pl\nadres: a\n",
+    "produkty:\n  - nazwa: Koc\n    tagi:\n    - ciepłe\n  - Kołdra\nadres: a\n",
+    "opis: >-\n  tekst: z dwukropkiem: tu\n\n    # nie komentarz\nadres: a\n",
+    yaml.dump(ORGANIZATION, allow_unicode=True),
+    yaml.dump(ORGANIZATION, allow_unicode=True, sort_keys=False),
+]
+
+# Documents the scanner cannot read safely and must leave to the full parser
+FALLBACK = [
+    'opis: "tekst\nadres: fałszywy"\nadres: prawdziwy\n',
+    'dostawa:\n  ulica: "Leśna\nadres: fałszywy"\nadres: prawdziwy\n',
+    "dostawa:\n  ulica: [a,\nadres]\nadres: prawdziwy\n",
+    "wspolne: &a\n  - x\nadres: *a\n",
+    "adres: pierwszy\nadres: drugi\n",
+    "adres: pierwszy\n'adres': drugi\n",
+    "<<: {adres: x}\n",
+    '"adres": x\n',
+    "adres: x\n---\nadres: y\n",
+    "%YAML 1.1\n---\nadres: x\n",
+    "adres: !!str 123\n",
+    'adres: "wiele\nlinii"\n',
+    "- adres: lista\n",
+    "﻿adres: bom\n",
+    "nazwa: x adres: y\n",
+    "x: a\n\tadres: b\nadres: c\n",
+    "x: a\n  y: 1\nadres: b\n",
+    "dostawa:\n    ulica: a\n  kod: b\nadres: c\n",
+    "dostawa:\n  ulica: a\n- b\nadres: c\n",
+    "opis: |\n    tekst\n  wcięty\nadres: a\n",
+]
+
+# Lines that may come before the slug, indented correctly or not
+INDENTED_FRAGMENTS = [
+    "x:\n",
+    "x: a\n",
+    "  y: 1\n",
+    "  y:\n",
+    "    z: 2\n",
+    "   w: 3\n",
+    "  - 1\n",
+    "- 1\n",
+    "- a: 1\n",
+    "\ty: 1\n",
+    " \t\n",
+    "\t# komentarz\n",
+    "opis: |\n",
+    "  tekst\n",
+    " tekst\n",
+    "   \n",
+]
+
+# Line fragments combined at random into documents for the generated test
+FRAGMENTS = [
+    "adres: a\n",
+    "adres: [x, y]\n",
+    "adres:\n",
+    "- s1\n",
+    "  - s2\n",
+    '  - "otwarty\n',
+    'nazwa: "q\n',
+    'zamknięty"\n',
+    "opis: |+\n",
+    "  tekst\n",
+    "   \n",
+    "d: [a,\n",
+    "b]\n",
+    "---\n",
+    "# komentarz\n",
+    "\r\n",
+    "  adres: zagnieżdżony\n",
+    "e: &a t\n",
+    "adres: *a\n",
+    "adres: 12 # liczba\n",
+    "f: 'it''s'\n",
+    "? k\n",
+]
+
+
+def full_parse(text):
+    """The reference: slugs found by parsing the whole document."""
+    return Organization.from_data("x", yaml.safe_load(text), "adres").slugs
+
+
+def scanned(text):
+    data = scan_slug(text, "adres")
+    if data is None:
+        return None
+    return Organization.from_data("x", data, "adres").slugs
+
+
+class TestScanSlug:
+    """Test that the scanner agrees with the full YAML parser."""
+
+    @pytest.mark.parametrize("text", SCANNED)
+    def test_equivalent_to_full_parse(self, text):
+        """Test that supported documents give the same slugs without a fallback."""
+        assert scanned(text) is not None
+        assert scanned(text) == full_parse(text)
+
+    @pytest.mark.parametrize("text", FALLBACK)
+    def test_falls_back_when_unsure(self, text):
+        """Test that constructs the scanner cannot read safely are refused."""
+        assert scan_slug(text, "adres") is None
+
+    @pytest.mark.parametrize("path", sorted(FIXTURES.glob("*.yaml")), ids=str)
+    def test_fixtures(self, path):
+        """Test the scanner on the organization fixtures."""
+        text = path.read_text(encoding="utf-8")
+
+        assert scanned(text) in (None, full_parse(text))
+
+    def test_generated_documents(self):
+        """Test that random valid documents never give a different answer."""
+        rnd = random.Random(2024)
+        compared = 0
+        for _ in range(3000):
+            text = "".join(rnd.choices(FRAGMENTS, k=rnd.randint(1, 6)))
+            try:
+                expected = full_parse(text)
+            except (yaml.YAMLError, TypeError):
+                continue
+            result = scanned(text)
+            if result is not None:
+                compared += 1
+                assert result == expected, text
+
+        assert compared > 300
+
+    def test_refuses_documents_the_parser_rejects(self):
+        """Test that no slug is read past lines the full parser fails on."""
+        rnd = random.Random(2025)
+        rejected = 0
+        for _ in range(3000):
+            text = "".join(rnd.choices(INDENTED_FRAGMENTS, k=rnd.randint(1, 5)))
+            text += "adres: a\n"
+            try:
+                yaml.safe_load(text)
+            except yaml.YAMLError:
+                rejected += 1
+                assert scan_slug(text, "adres") is None, text
+
+        assert rejected > 300
+
+    def test_stops_reading_after_slug(self):
+        """Test that content after the slug is not parsed."""
+        text = "adres: a\nprodukty:\n  - nazwa: [niezamknięta\n"
+
+        assert scan_slug(text, "adres") == {"adres": "a"}
+
+    def test_custom_slug_field(self):
+        """Test a slug field other than adres."""
+        text = "adres: nie-ten\nslug: [a, b]\n"
+
+        assert scan_slug(text, "slug") == {"slug": ["a", "b"]}
+
+
+class TestScannerInRepository:
+    """Test that the slug index is the same with and without scanning."""
+
+    def test_same_index_as_full_parse(self, tmp_path):
+        """Test scanned, fallback and duplicate files together."""
+        documents = SCANNED + FALLBACK[:6] + ["adres: azyl\n"]
+        for i, text in enumerate(documents):
+            (tmp_path / f"org{i}.yaml").write_text(text, encoding="utf-8")
+
+        scanned_index = FileSystemRepository(tmp_path).load_all_organizations("adres")
+        full_index = FileSystemRepository(
+            tmp_path, scan_slugs=False
+        ).load_all_organizations("adres")
+
+        assert scanned_index == full_index
+        assert any("Duplikat adres 'azyl'" in error for error in full_index[1])
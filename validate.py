@@ -5,34 +5,73 @@ Validates organization files for schema compliance and slug conflicts.
 """
 
 import sys
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 import click
+from krs_cache import DEFAULT_TTL, DEFAULT_NEGATIVE_TTL, DEFAULT_STALE_TTL
+from krs_puller import (
+    DEFAULT_POOL_SIZE,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    create_krs_session,
+)
+from krs_remote_cache import TOKEN_ENVVAR
+from krs_resilience import Deadline
+from krs_stamps import DEFAULT_MAX_AGE_DAYS, KEY_ENVVAR, KRSStamps
 from repository import FileSystemRepository
-from validators import OrganizationSchemaValidator, SlugConflictValidator, RealKRSClient
+from validators import (
+    OrganizationSchemaValidator,
+    SlugConflictValidator,
+    RealKRSClient,
+    KRSClientConfig,
+)
 
 
 class OrganizationValidator:
     """Orchestrates organization validation using injected dependencies."""
 
-    def __init__(self, repository: FileSystemRepository, slug_field: str):
+    def __init__(
+        self,
+        repository: FileSystemRepository,
+        slug_field: str,
+        krs_config: Optional[KRSClientConfig] = None,
+        jobs: int = 1,
+        deadline: Optional[Deadline] = None,
+        stamps: Optional[KRSStamps] = None,
+    ):
         self.repository = repository
         self.slug_field = slug_field
+        self.jobs = jobs
+
+        # One pooled keep-alive session shared by every KRS lookup of the run
+        krs_config = krs_config or KRSClientConfig()
+        self.krs_session = create_krs_session(
+            krs_config.pool_size, krs_config.session_hosts
+        )
 
         # Initialize focused validators
-        krs_client = RealKRSClient()
-        self.schema_validator = OrganizationSchemaValidator(slug_field, krs_client)
+        self.krs_client = RealKRSClient(krs_config, session=self.krs_session)
+        self.schema_validator = OrganizationSchemaValidator(
+            slug_field, self.krs_client, deadline=deadline, stamps=stamps
+        )
         self.slug_validator = SlugConflictValidator(slug_field)
 
+    def close(self):
+        """Release resources held by the KRS client."""
+        self.krs_client.close()
+        self.krs_session.close()
+
     def validate_files(self, files_to_check: List[str]) -> bool:
         """Validate a list of organization files."""
 
         print("=================================================")
         print("🚀 Rozpoczynam walidację organizacji...")
 
-        # Load all organizations and check for duplicate slugs
-        all_organizations, load_errors = self.repository.load_all_organizations(
-            self.slug_field
+        # Parse every organization once: the same pass checks for duplicate
+        # slugs and keeps the documents of the files being validated
+        all_organizations, load_errors, organizations = (
+            self.repository.load_organizations(self.slug_field, files_to_check)
         )
 
         if load_errors:
@@ -42,6 +81,12 @@ class OrganizationValidator:
             print("💥 Walidacja nie powiodła się!")
             return False
 
+        slug_index = getattr(self.repository, "slug_index", None)
+        if slug_index is not None:
+            print(
+                f"Indeks adresów: {slug_index.reused} plików bez zmian, "
+                f"{slug_index.parsed} wczytanych ponownie"
+            )
         print(f"Walidacja {len(files_to_check)} pliku/ów organizacji...")
         print(f"Pole {self.slug_field}: {self.slug_field}")
         print(
@@ -51,27 +96,28 @@ class OrganizationValidator:
 
         all_valid = True
 
-        # Validate individual file structures
-        for file_path in files_to_check:
-            print(f"Walidacja {file_path}...")
+        # Files are validated on a worker pool, but their reports are printed
+        # in the original order so that the log is identical to a serial run
+        executor = ThreadPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        map_files = executor.map if executor else map
 
-            data = self.repository.load_organization_data(file_path)
-            if not data:
-                print(
-                    f"  ❌ Plik nie znaleziony lub nie można go odczytać: {file_path}"
-                )
-                all_valid = False
-                continue
+        try:
+            documents = [organization.data for organization in organizations]
 
-            is_valid, errors = self.schema_validator.validate_structure(data)
+            # Fetch all distinct KRS numbers up front, concurrently
+            self.schema_validator.prefetch_krs(documents)
 
-            if is_valid:
-                print("  ✅ Walidacja struktury zakończona pomyślnie")
-            else:
-                print("  ❌ Walidacja struktury nie powiodła się:")
-                for error in errors:
-                    print(f"     - {error}")
-                all_valid = False
+            # Validate individual file structures
+            reports = map_files(self._validate_document, files_to_check, documents)
+            for file_path, (is_valid, lines) in zip(files_to_check, reports):
+                print(f"Walidacja {file_path}...")
+                for line in lines:
+                    print(line)
+                if not is_valid:
+                    all_valid = False
+        finally:
+            if executor:
+                executor.shutdown()
 
         print()
 
@@ -91,6 +137,8 @@ class OrganizationValidator:
 
         print()
 
+        self._print_krs_stats()
+
         if all_valid:
             print("🎉 Wszystkie walidacje zakończone pomyślnie!")
         else:
@@ -100,6 +148,48 @@ class OrganizationValidator:
 
         return all_valid
 
+    def _validate_document(
+        self, file_path: str, data: Optional[dict]
+    ) -> Tuple[bool, List[str]]:
+        """
+        Validate a single loaded file.
+
+        Returns:
+            Tuple of (is_valid, report_lines)
+        """
+        if not data:
+            return False, [
+                f"  ❌ Plik nie znaleziony lub nie można go odczytać: {file_path}"
+            ]
+
+        errors, warnings = self.schema_validator.check_structure(data)
+        lines = [f"  ⚠️  {warning}" for warning in warnings]
+
+        if not errors:
+            lines.append("  ✅ Walidacja struktury zakończona pomyślnie")
+        else:
+            lines.append("  ❌ Walidacja struktury nie powiodła się:")
+            lines.extend(f"     - {error}" for error in errors)
+
+        return not errors, lines
+
+    def _print_krs_stats(self):
+        """Print KRS lookup statistics, if the client collects them."""
+        summary_lines = getattr(self.schema_validator.krs_client, "summary_lines", None)
+        lines = summary_lines() if summary_lines is not None else []
+        stamps = self.schema_validator.stamps
+        if stamps is not None and stamps.hits:
+            lines.insert(
+                0, f"sprawdzenia pominięte dzięki znacznikom weryfikacji: {stamps.hits}"
+            )
+        if not lines:
+            return
+
+        print("Statystyki KRS:")
+        for line in lines:
+            print(f"  - {line}")
+        print()
+
 
 @click.command()
 @click.option(
@@ -115,8 +205,302 @@ class OrganizationValidator:
 @click.option(
     "--slug-field", default="adres", help="YAML field name for organization slug"
 )
-def main(files: str, organizations_dir: str, slug_field: str):
+@click.option(
+    "--jobs",
+    default=1,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Number of files validated concurrently",
+)
+@click.option(
+    "--parse-processes",
+    default=1,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Processes used to parse the organization files (1 parses them in "
+    "the main process)",
+)
+@click.option(
+    "--slug-index",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="JSON file caching the slugs of every organization file between runs; "
+    "only added or changed files are read again",
+)
+@click.option(
+    "--deadline",
+    default=None,
+    type=click.FloatRange(min=0),
+    help="Total seconds allowed for KRS lookups; numbers not checked in time "
+    "are reported as warnings",
+)
+@click.option(
+    "--krs-cache",
+    "krs_cache",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="SQLite file used to cache KRS lookups between runs",
+)
+@click.option(
+    "--krs-cache-ttl",
+    default=DEFAULT_TTL,
+    type=float,
+    show_default=True,
+    help="Seconds a cached KRS entry is considered fresh",
+)
+@click.option(
+    "--krs-cache-negative-ttl",
+    default=DEFAULT_NEGATIVE_TTL,
+    type=float,
+    show_default=True,
+    help="Seconds a cached 'not found' KRS result is considered fresh",
+)
+@click.option(
+    "--krs-cache-stale-ttl",
+    default=DEFAULT_STALE_TTL,
+    type=float,
+    show_default=True,
+    help="Extra seconds an expired entry may be served while it is refreshed",
+)
+@click.option(
+    "--krs-cache-service",
+    default=None,
+    help="URL of a shared KRS cache service (python -m krs_cache_service) "
+    "consulted before the live KRS API",
+)
+@click.option(
+    "--krs-cache-service-token",
+    envvar=TOKEN_ENVVAR,
+    default=None,
+    show_envvar=True,
+    help="Shared secret for storing live lookups in the cache service; "
+    "without it the service is only read",
+)
+@click.option(
+    "--krs-pool-size",
+    default=DEFAULT_POOL_SIZE,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Maximum number of keep-alive connections to the KRS API",
+)
+@click.option(
+    "--krs-connect-timeout",
+    default=DEFAULT_CONNECT_TIMEOUT,
+    type=float,
+    show_default=True,
+    help="Seconds to wait for a connection to the KRS API",
+)
+@click.option(
+    "--krs-read-timeout",
+    default=DEFAULT_READ_TIMEOUT,
+    type=float,
+    show_default=True,
+    help="Seconds to wait for a KRS API response",
+)
+@click.option(
+    "--krs-concurrency",
+    default=KRSClientConfig.concurrency,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Maximum number of KRS lookups fetched at the same time; the adaptive "
+    "window stays at or below it",
+)
+@click.option(
+    "--krs-max-response-bytes",
+    default=KRSClientConfig.max_response_bytes,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Largest KRS response body accepted before the lookup is aborted",
+)
+@click.option(
+    "--krs-breaker-threshold",
+    default=KRSClientConfig.breaker_threshold,
+    type=click.IntRange(min=0),
+    show_default=True,
+    help="Consecutive KRS maintenance responses or timeouts that open the "
+    "circuit breaker (0 disables it)",
+)
+@click.option(
+    "--krs-breaker-reset",
+    default=KRSClientConfig.breaker_reset_timeout,
+    type=float,
+    show_default=True,
+    help="Seconds before an open breaker lets a probe request through",
+)
+@click.option(
+    "--krs-retries",
+    default=KRSClientConfig.retry_attempts,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Attempts per KRS lookup for timeouts, reset connections and 5xx responses",
+)
+@click.option(
+    "--krs-retry-backoff",
+    default=KRSClientConfig.retry_base_delay,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Base delay in seconds for jittered exponential backoff between attempts",
+)
+@click.option(
+    "--krs-hedge/--no-krs-hedge",
+    default=KRSClientConfig.hedge,
+    show_default=True,
+    help="Send a second KRS request when the first one is slower than the p95 latency",
+)
+@click.option(
+    "--krs-hedge-delay",
+    default=KRSClientConfig.hedge_delay,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Seconds to wait before hedging until enough latencies are known for p95",
+)
+@click.option(
+    "--krs-rate-limit",
+    default=KRSClientConfig.rate_limit,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Maximum KRS requests per second (0 disables the limit)",
+)
+@click.option(
+    "--krs-rate-burst",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Requests allowed in a burst above the rate limit [default: the rate]",
+)
+@click.option(
+    "--krs-latency-target",
+    default=KRSClientConfig.latency_target,
+    type=click.FloatRange(min=0, min_open=True),
+    show_default=True,
+    help="KRS response time in seconds below which the concurrency window grows",
+)
+@click.option(
+    "--krs-registry",
+    "krs_registries",
+    multiple=True,
+    default=KRSClientConfig.registries,
+    type=click.Choice(["S", "P"]),
+    show_default=True,
+    help="KRS register to query (repeatable); several registers are queried "
+    "concurrently and the first answer wins",
+)
+@click.option(
+    "--krs-endpoint",
+    "krs_endpoints",
+    multiple=True,
+    help="Base URL of an OdpisAktualny endpoint, e.g. an internal mirror "
+    "(repeatable, in order of preference) [default: the public KRS API]",
+)
+@click.option(
+    "--krs-endpoint-cooldown",
+    default=KRSClientConfig.endpoint_cooldown,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Seconds a repeatedly failing endpoint is left out before being retried",
+)
+@click.option(
+    "--krs-snapshot",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Offline KRS snapshot built with 'krs_tools.py build-snapshot'",
+)
+@click.option(
+    "--krs-snapshot-fallback/--no-krs-snapshot-fallback",
+    default=True,
+    show_default=True,
+    help="Query the live KRS API for numbers missing from the snapshot",
+)
+@click.option(
+    "--krs-stamps",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Verification stamp manifest; KRS checks with a fresh stamp for "
+    "unchanged krs/nazwa_w_krs values are skipped",
+)
+@click.option(
+    "--krs-stamps-max-age",
+    default=DEFAULT_MAX_AGE_DAYS,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Days a verification stamp stays fresh",
+)
+@click.option(
+    "--krs-stamps-key",
+    envvar=KEY_ENVVAR,
+    default=None,
+    show_envvar=True,
+    help="Secret key the stamps are signed with; without it stamps are ignored "
+    "and every KRS number is checked",
+)
+@click.option(
+    "--krs-stamps-update/--no-krs-stamps-update",
+    default=False,
+    show_default=True,
+    help="Write stamps for pairs verified in this run back to the manifest",
+)
+@click.option(
+    "--krs-record",
+    default=None,
+    type=click.Path(file_okay=False),
+    help="Record every KRS response, including errors, into this directory",
+)
+@click.option(
+    "--krs-replay",
+    default=None,
+    type=click.Path(exists=True, file_okay=False),
+    help="Serve KRS responses recorded with --krs-record instead of the network",
+)
+@click.option(
+    "--krs-replay-latency/--no-krs-replay-latency",
+    default=False,
+    show_default=True,
+    help="Delay replayed responses by their recorded latency",
+)
+def main(
+    files: str,
+    organizations_dir: str,
+    slug_field: str,
+    jobs: int,
+    parse_processes: int,
+    slug_index: Optional[str],
+    deadline: Optional[float],
+    krs_cache: Optional[str],
+    krs_cache_ttl: float,
+    krs_cache_negative_ttl: float,
+    krs_cache_stale_ttl: float,
+    krs_cache_service: Optional[str],
+    krs_cache_service_token: Optional[str],
+    krs_pool_size: int,
+    krs_connect_timeout: float,
+    krs_read_timeout: float,
+    krs_concurrency: int,
+    krs_max_response_bytes: int,
+    krs_breaker_threshold: int,
+    krs_breaker_reset: float,
+    krs_retries: int,
+    krs_retry_backoff: float,
+    krs_hedge: bool,
+    krs_hedge_delay: float,
+    krs_rate_limit: float,
+    krs_rate_burst: Optional[int],
+    krs_latency_target: float,
+    krs_registries: Tuple[str, ...],
+    krs_endpoints: Tuple[str, ...],
+    krs_endpoint_cooldown: float,
+    krs_snapshot: Optional[str],
+    krs_snapshot_fallback: bool,
+    krs_stamps: Optional[str],
+    krs_stamps_max_age: float,
+    krs_stamps_key: Optional[str],
+    krs_stamps_update: bool,
+    krs_record: Optional[str],
+    krs_replay: Optional[str],
+    krs_replay_latency: bool,
+):
     """Validate organization YAML files."""
+    if krs_record and krs_replay:
+        raise click.UsageError("--krs-record i --krs-replay wykluczają się nawzajem")
+    run_deadline = Deadline(deadline) if deadline is not None else None
 
     # Parse files list
     files_list = [f.strip() for f in files.split() if f.strip()]
@@ -126,10 +510,64 @@ def main(files: str, organizations_dir: str, slug_field: str):
         sys.exit(0)
 
     # Create repository and validator
-    repository = FileSystemRepository(organizations_dir)
-    validator = OrganizationValidator(repository, slug_field)
+    repository = FileSystemRepository(
+        organizations_dir, processes=parse_processes, index_path=slug_index
+    )
+    krs_config = KRSClientConfig(
+        cache_path=krs_cache,
+        cache_ttl=krs_cache_ttl,
+        cache_negative_ttl=krs_cache_negative_ttl,
+        cache_stale_ttl=krs_cache_stale_ttl,
+        cache_service_url=krs_cache_service,
+        cache_service_token=krs_cache_service_token,
+        pool_size=krs_pool_size,
+        connect_timeout=krs_connect_timeout,
+        read_timeout=krs_read_timeout,
+        concurrency=krs_concurrency,
+        max_response_bytes=krs_max_response_bytes,
+        breaker_threshold=krs_breaker_threshold,
+        breaker_reset_timeout=krs_breaker_reset,
+        retry_attempts=krs_retries,
+        retry_base_delay=krs_retry_backoff,
+        hedge=krs_hedge,
+        hedge_delay=krs_hedge_delay,
+        rate_limit=krs_rate_limit,
+        rate_burst=krs_rate_burst,
+        latency_target=krs_latency_target,
+        registries=krs_registries,
+        endpoints=krs_endpoints,
+        endpoint_cooldown=krs_endpoint_cooldown,
+        snapshot_path=krs_snapshot,
+        snapshot_fallback=krs_snapshot_fallback,
+        record_dir=krs_record,
+        replay_dir=krs_replay,
+        replay_latency=krs_replay_latency,
+    )
+    stamps = None
+    if krs_stamps and not krs_stamps_key:
+        # e.g. a pull request from a fork, which cannot read the CI secret
+        print(
+            f"⚠️  Brak klucza znaczników ({KEY_ENVVAR}) – znaczniki weryfikacji pominięte"
+        )
+    elif krs_stamps:
+        stamps = KRSStamps(krs_stamps, krs_stamps_key, krs_stamps_max_age)
+    validator = OrganizationValidator(
+        repository,
+        slug_field,
+        krs_config,
+        jobs=jobs,
+        deadline=run_deadline,
+        stamps=stamps,
+    )
+
+    try:
+        all_valid = validator.validate_files(files_list)
+    finally:
+        validator.close()
+    if stamps is not None and krs_stamps_update:
+        stamps.save()
 
-    if validator.validate_files(files_list):
+    if all_valid:
         sys.exit(0)
     else:
         sys.exit(1)
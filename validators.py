@@ -4,8 +4,53 @@ Each validator has a single responsibility and can be tested in isolation.
 """
 
 import re
-from typing import List, Tuple, Dict, Optional, Protocol
-from krs_puller import KRSDataPuller, KRSMaintenanceError
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+from typing import Iterator, List, Tuple, Dict, Optional, Protocol, Sequence, Set
+from krs_cache import (
+    CachedKRSEntry,
+    KRSCache,
+    DEFAULT_TTL,
+    DEFAULT_NEGATIVE_TTL,
+    DEFAULT_STALE_TTL,
+)
+from krs_puller import (
+    KRSDataPuller,
+    KRSMaintenanceError,
+    KRSNotFoundError,
+    KRSTimeoutError,
+    KRSTransientError,
+    REGISTRIES,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_MAX_RESPONSE_BYTES,
+    create_krs_session,
+    default_endpoints,
+    odpis_url,
+    pull_any_registry,
+    session_pool_stats,
+)
+from krs_recording import KRSRecorder, KRSReplayer, request_key
+from krs_remote_cache import CacheServiceReplyError, RemoteKRSCache
+from krs_resilience import (
+    AIMDLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    EndpointPool,
+    DeadlineExceededError,
+    Hedger,
+    RetryPolicy,
+    TokenBucket,
+)
+from krs_snapshot import KRSSnapshot
+from krs_stamps import KRSStamps
+from krs_stats import KRSStats
 import requests
 
 
@@ -13,66 +58,753 @@ class KRSClient(Protocol):
     """Protocol for KRS API client (allows mocking)."""
 
     def validate_krs(
-        self, krs: str, expected_name: Optional[str] = None
+        self,
+        krs: str,
+        expected_name: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> Tuple[bool, str]:
         """Validate KRS number and optionally check name match."""
         pass
 
+    def validate_many(
+        self,
+        items: Sequence[Tuple[str, Optional[str]]],
+        deadline: Optional[Deadline] = None,
+    ) -> List[Tuple[bool, str]]:
+        """Validate (krs, expected_name) pairs, returning results in input order."""
+        pass
+
+
+@dataclass
+class KRSClientConfig:
+    """Tunables for RealKRSClient."""
+
+    cache_path: Optional[str] = None
+    cache_ttl: float = DEFAULT_TTL
+    cache_negative_ttl: float = DEFAULT_NEGATIVE_TTL
+    cache_stale_ttl: float = DEFAULT_STALE_TTL
+    revalidation_workers: int = 2
+    cache_service_url: Optional[str] = None
+    cache_service_token: Optional[str] = None
+    cache_service_timeout: float = 30.0
+    pool_size: int = DEFAULT_POOL_SIZE
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_READ_TIMEOUT
+    concurrency: int = 4
+    max_response_bytes: int = DEFAULT_MAX_RESPONSE_BYTES
+    breaker_threshold: int = 3
+    breaker_reset_timeout: float = 60.0
+    snapshot_path: Optional[str] = None
+    snapshot_fallback: bool = True
+    record_dir: Optional[str] = None
+    replay_dir: Optional[str] = None
+    replay_latency: bool = False
+    registries: Tuple[str, ...] = REGISTRIES
+    endpoints: Tuple[str, ...] = ()
+    endpoint_failure_threshold: int = 3
+    endpoint_cooldown: float = 60.0
+    retry_attempts: int = 3
+    retry_base_delay: float = 0.25
+    retry_max_delay: float = 4.0
+    hedge: bool = False
+    hedge_delay: float = 1.0
+    rate_limit: float = 10.0
+    rate_burst: Optional[int] = None
+    min_concurrency: int = 1
+    latency_target: float = 2.0
+
+    @property
+    def session_hosts(self) -> int:
+        """Number of distinct hosts a KRS session of this config talks to."""
+        endpoints = self.endpoints or default_endpoints()
+        return len({urlsplit(endpoint).netloc for endpoint in endpoints})
+
 
 class RealKRSClient:
     """Real KRS client using the KRSDataPuller."""
 
+    def __init__(
+        self,
+        config: Optional[KRSClientConfig] = None,
+        session: Optional[requests.Session] = None,
+    ):
+        self.config = config or KRSClientConfig()
+        if self.config.record_dir and self.config.replay_dir:
+            raise ValueError("record_dir and replay_dir are mutually exclusive")
+        self._owns_session = session is None
+        self.session = session or create_krs_session(
+            self.config.pool_size, self.config.session_hosts
+        )
+        self.stats = KRSStats()
+        self.breaker = CircuitBreaker(
+            self.config.breaker_threshold,
+            self.config.breaker_reset_timeout,
+            failure_types=(KRSMaintenanceError, KRSTimeoutError),
+            success_types=(KRSNotFoundError,),
+            stats=self.stats,
+        )
+        self.retry = RetryPolicy(
+            self.config.retry_attempts,
+            self.config.retry_base_delay,
+            self.config.retry_max_delay,
+            retry_types=(KRSTimeoutError, KRSTransientError),
+            stats=self.stats,
+        )
+        self.rate_limiter = TokenBucket(
+            self.config.rate_limit, self.config.rate_burst, stats=self.stats
+        )
+        self.limiter = AIMDLimiter(
+            self.config.concurrency,
+            overload_types=(KRSTimeoutError, KRSTransientError),
+            minimum=self.config.min_concurrency,
+            latency_target=self.config.latency_target,
+            stats=self.stats,
+        )
+        self.endpoints = EndpointPool(
+            self.config.endpoints or default_endpoints(),
+            failure_types=(KRSTimeoutError, KRSTransientError),
+            failure_threshold=self.config.endpoint_failure_threshold,
+            cooldown=self.config.endpoint_cooldown,
+            stats=self.stats,
+        )
+        self.hedger: Optional[Hedger] = None
+        if self.config.hedge:
+            self.hedger = Hedger(
+                self.config.hedge_delay,
+                transient_types=(KRSTimeoutError, KRSTransientError),
+                max_workers=self.config.concurrency * 2,
+                stats=self.stats,
+            )
+        self.cache: Optional[KRSCache] = None
+        if self.config.cache_path:
+            self.cache = KRSCache(
+                self.config.cache_path,
+                ttl=self.config.cache_ttl,
+                negative_ttl=self.config.cache_negative_ttl,
+                stale_ttl=self.config.cache_stale_ttl,
+            )
+        self.remote_cache: Optional[RemoteKRSCache] = None
+        if self.config.cache_service_url:
+            self.remote_cache = RemoteKRSCache(
+                self.config.cache_service_url,
+                timeout=self.config.cache_service_timeout,
+                pool_size=self.config.pool_size,
+                token=self.config.cache_service_token,
+            )
+        self._remote_entries: Dict[str, CachedKRSEntry] = {}
+        self._remote_unreachable = False
+        self.snapshot: Optional[KRSSnapshot] = None
+        if self.config.snapshot_path:
+            self.snapshot = KRSSnapshot(self.config.snapshot_path)
+        self.recorder: Optional[KRSRecorder] = None
+        if self.config.record_dir:
+            self.recorder = KRSRecorder(self.config.record_dir)
+        self.replayer: Optional[KRSReplayer] = None
+        if self.config.replay_dir:
+            self.replayer = KRSReplayer(
+                self.config.replay_dir,
+                latency=self.config.replay_latency,
+                stats=self.stats,
+            )
+        # Background refreshes of stale entries by KRS number, with the
+        # deadline of their run; each number is refreshed at most once
+        self._revalidations: Dict[str, Tuple[Future, Optional[Deadline]]] = {}
+        self._revalidation_executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._lookups: Dict[str, Future] = {}
+        # Numbers already reported as missing the deadline; a lookup is
+        # evaluated by both the prefetch batch and the per-file check
+        self._deadline_missed: Set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Requests to the individual registers of multi-register lookups
+        self._registry_executor = ThreadPoolExecutor(
+            max_workers=self.config.concurrency * len(self.config.registries) * 2,
+            thread_name_prefix="krs-registry",
+        )
+
     def validate_krs(
-        self, krs: str, expected_name: Optional[str] = None
+        self,
+        krs: str,
+        expected_name: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> Tuple[bool, str]:
         """Validate KRS number against the registry and optionally check name match."""
+        return self.validate_many([(krs, expected_name)], deadline)[0]
+
+    def validate_many(
+        self,
+        items: Sequence[Tuple[str, Optional[str]]],
+        deadline: Optional[Deadline] = None,
+    ) -> List[Tuple[bool, str]]:
+        """
+        Validate many KRS numbers at once.
+
+        Each distinct KRS number is fetched at most once per run; the fetches
+        run concurrently on a bounded thread pool.
+
+        Args:
+            items: Sequence of (krs, expected_name) pairs
+            deadline: Run-wide deadline; lookups that miss it become warnings
+
+        Returns:
+            List of (is_valid, message) tuples in input order
+        """
+        unique = dict.fromkeys(k for k, _ in items)
+        if self.remote_cache is not None:
+            self._prefetch_remote(unique, deadline)
+        lookups = {krs: self._lookup(krs, deadline) for krs in unique}
+        return [
+            self._evaluate(krs, name, lookups[krs], deadline) for krs, name in items
+        ]
+
+    def validate_as_completed(
+        self,
+        items: Sequence[Tuple[str, Optional[str]]],
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[Tuple[int, Tuple[bool, str]]]:
+        """
+        Validate many KRS numbers, yielding results as their lookups finish.
+
+        Like validate_many, but for streaming large batches: the caller sees
+        each result as soon as it is known instead of after the slowest one.
+
+        Yields:
+            (index into items, (is_valid, message)) in completion order
+        """
+        positions: Dict[str, List[int]] = {}
+        for index, (krs, _) in enumerate(items):
+            positions.setdefault(krs, []).append(index)
+        if self.remote_cache is not None:
+            self._prefetch_remote(list(positions), deadline)
+        lookups = {self._lookup(krs, deadline): krs for krs in positions}
+
+        def results(lookup: Future):
+            krs = lookups[lookup]
+            for index in positions[krs]:
+                yield index, self._evaluate(krs, items[index][1], lookup, deadline)
+
+        timeout = deadline.remaining() if deadline is not None else None
+        pending = set(lookups)
         try:
-            krs_data = KRSDataPuller(krs)
+            for lookup in as_completed(lookups, timeout=timeout):
+                pending.discard(lookup)
+                yield from results(lookup)
+        except FutureTimeoutError:
+            # Out of run time: the rest are reported as deadline warnings
+            for lookup in lookups:
+                if lookup in pending:
+                    yield from results(lookup)
+
+    def lookup_names(
+        self, numbers: Sequence[str], deadline: Optional[Deadline] = None
+    ) -> Dict[str, Tuple[Optional[str], str]]:
+        """
+        Look up the registry names of many KRS numbers concurrently.
+
+        Returns:
+            {krs: (registry name, "")} for numbers found with a name, and
+            {krs: (None, message)} for the rest, with the same message
+            validation would report
+        """
+        unique = list(dict.fromkeys(numbers))
+        if self.remote_cache is not None:
+            self._prefetch_remote(unique, deadline)
+        lookups = {krs: self._lookup(krs, deadline) for krs in unique}
+
+        names = {}
+        for krs, lookup in lookups.items():
+            is_valid, message = self._evaluate(krs, None, lookup, deadline)
+            if is_valid and not message:
+                names[krs] = (lookup.result(), "")
+            else:
+                names[krs] = (None, message)
+        return names
+
+    def fetch(self, krs: str, deadline: Optional[Deadline] = None) -> Optional[str]:
+        """
+        Look up a single KRS number, bypassing the in-run memo.
+
+        Meant for long-running callers such as the shared cache service,
+        which must see registry changes over time.
+
+        Raises:
+            KRSNotFoundError: If the number is not in any queried register
+        """
+        return self._fetch_name(krs, deadline)
+
+    def _prefetch_remote(
+        self, numbers: Sequence[str], deadline: Optional[Deadline] = None
+    ):
+        """Fetch in one request the shared-cache entries of numbers not resolved yet."""
+        with self._lock:
+            pending = [krs for krs in numbers if krs not in self._lookups]
+        if self.cache is not None:
+            pending = [krs for krs in pending if self.cache.find(krs) is None]
+        timeout = self._remote_timeout(deadline)
+        if len(pending) < 2 or self._remote_unreachable or timeout <= 0:
+            return
 
-            if not krs_data.name:
-                return (
-                    False,
-                    f"KRS {krs} istnieje, ale dane organizacji są niekompletne",
+        try:
+            entries = self.remote_cache.get_many(pending, timeout=timeout)
+        except requests.RequestException as e:
+            self._remote_failed(e)
+            return
+        with self._lock:
+            self._remote_entries.update(entries)
+
+    def _lookup(self, krs: str, deadline: Optional[Deadline] = None) -> Future:
+        """Return the (possibly shared) pending lookup for a KRS number."""
+        with self._lock:
+            future = self._lookups.get(krs)
+            if future is not None:
+                self.stats.incr("run_memo_hits")
+                return future
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.config.concurrency,
+                    thread_name_prefix="krs-lookup",
                 )
-
-            # Check name match if provided
-            if expected_name:
-                yaml_name = expected_name.strip()
-                krs_name = krs_data.name.strip()
-
-                if yaml_name.lower() != krs_name.lower():
-                    return (
-                        False,
-                        f"Niezgodność nazwy organizacji: w YAML jest '{yaml_name}', ale w KRS jest '{krs_name}'",
-                    )
-
-            return True, ""
+            future = self._executor.submit(self._fetch_name, krs, deadline)
+            self._lookups[krs] = future
+            return future
+
+    def _evaluate(
+        self,
+        krs: str,
+        expected_name: Optional[str],
+        lookup: Future,
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[bool, str]:
+        """Turn a finished lookup into a validation result."""
+        try:
+            timeout = deadline.remaining() if deadline is not None else None
+            krs_name = lookup.result(timeout=timeout)
 
         except KRSMaintenanceError as e:
             # During maintenance, return warning but don't fail validation
             return True, f"⚠️ {e}"
 
+        except (DeadlineExceededError, FutureTimeoutError):
+            # Out of run time: warn instead of holding up the whole job
+            with self._lock:
+                first_miss = krs not in self._deadline_missed
+                self._deadline_missed.add(krs)
+            if first_miss:
+                self.stats.incr("deadline_exceeded")
+            return (
+                True,
+                f"⚠️ Nie zdążono sprawdzić KRS {krs} przed upływem limitu czasu "
+                f"walidacji. Proszę zweryfikować KRS ręcznie: {odpis_url(krs)}",
+            )
+
         except requests.HTTPError:
             return (
                 False,
                 f"KRS {krs} nie zostało znalezione w rejestrze lub wystąpił błąd sieci",
             )
 
+        if not krs_name:
+            return (
+                False,
+                f"KRS {krs} istnieje, ale dane organizacji są niekompletne",
+            )
+
+        # Check name match if provided
+        if expected_name:
+            yaml_name = expected_name.strip()
+            krs_name = krs_name.strip()
+
+            if yaml_name.lower() != krs_name.lower():
+                return (
+                    False,
+                    f"Niezgodność nazwy organizacji: w YAML jest '{yaml_name}', ale w KRS jest '{krs_name}'",
+                )
+
+        return True, ""
+
+    def _fetch_name(
+        self, krs: str, deadline: Optional[Deadline] = None
+    ) -> Optional[str]:
+        """Return the registry name for a KRS number, consulting local sources first."""
+        self.stats.incr("lookups")
+        if self.snapshot is not None:
+            name = self.snapshot.lookup(krs)
+            if name is not None:
+                self.stats.incr("snapshot_hits")
+                return name
+            self.stats.incr("snapshot_misses")
+            if not self.config.snapshot_fallback:
+                raise KRSNotFoundError(f"KRS {krs} not found in offline snapshot")
+
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.find(krs, include_expired=True)
+            if entry is not None and not entry.is_expired:
+                self.stats.incr("cache_hits")
+                if entry.is_stale:
+                    self.stats.incr("cache_stale_hits")
+                    self._revalidate_in_background(krs, entry, deadline)
+                if not entry.found:
+                    raise KRSNotFoundError(f"Failed to fetch data for KRS {krs}")
+                return entry.name
+            self.stats.incr("cache_misses")
+
+        if self.remote_cache is not None:
+            shared = self._fetch_remote(krs, deadline)
+            if shared is not None:
+                if self.cache is not None:
+                    self.cache.put(
+                        krs,
+                        found=shared.found,
+                        name=shared.name,
+                        registry=shared.registry,
+                        fetched_at=shared.fetched_at,
+                        etag=shared.etag,
+                        last_modified=shared.last_modified,
+                        content_hash=shared.content_hash,
+                    )
+                if not shared.found:
+                    raise KRSNotFoundError(f"Failed to fetch data for KRS {krs}")
+                return shared.name
+
+        return self._fetch_live(krs, deadline, previous=entry)
+
+    def _remote_timeout(self, deadline: Optional[Deadline] = None) -> float:
+        """Timeout for one cache service request; 0 once the deadline has passed."""
+        timeout = self.config.cache_service_timeout
+        return deadline.cap(timeout) if deadline is not None else timeout
+
+    def _fetch_remote(
+        self, krs: str, deadline: Optional[Deadline] = None
+    ) -> Optional[CachedKRSEntry]:
+        """Ask the shared cache service; None means "go to the live API"."""
+        with self._lock:
+            entry = self._remote_entries.pop(krs, None)
+        if entry is None:
+            timeout = self._remote_timeout(deadline)
+            if self._remote_unreachable or timeout <= 0:
+                return None
+            try:
+                entry = self.remote_cache.get(krs, timeout=timeout)
+            except requests.RequestException as e:
+                self._remote_failed(e)
+                return None
+
+        if entry is None:
+            self.stats.incr("cache_service_misses")
+            return None
+        self.stats.incr("cache_service_hits")
+        return entry
+
+    def _share(self, entry: CachedKRSEntry, deadline: Optional[Deadline] = None):
+        """Hand a live lookup result to the shared cache service, if allowed to."""
+        if (
+            self.remote_cache is None
+            or self.remote_cache.token is None
+            or self._remote_unreachable
+        ):
+            return
+        timeout = self._remote_timeout(deadline)
+        if timeout <= 0:
+            return
+        try:
+            self.remote_cache.put(entry, timeout=timeout)
+        except requests.RequestException as e:
+            self._remote_failed(e)
+
+    def _remote_failed(self, error: requests.RequestException):
+        """Count a shared cache failure; stop using an unreachable or broken service."""
+        self.stats.incr("cache_service_errors")
+        if isinstance(
+            error, (requests.ConnectionError, requests.Timeout, CacheServiceReplyError)
+        ):
+            with self._lock:
+                if self._remote_unreachable:
+                    return
+                self._remote_unreachable = True
+            self.stats.record_event(
+                f"wspólna pamięć podręczna KRS niedostępna ({error.__class__.__name__}) "
+                f"– pozostałe zapytania trafiają bezpośrednio do API KRS"
+            )
+
+    def _fetch_live(
+        self,
+        krs: str,
+        deadline: Optional[Deadline] = None,
+        previous: Optional[CachedKRSEntry] = None,
+    ) -> Optional[str]:
+        """
+        Fetch a KRS entry from the registry and store the outcome in the cache.
+
+        All configured registers are queried concurrently unless a previous
+        cache entry says which one holds the KRS number. With a previous entry
+        the request is also conditional, so an unchanged registry entry only
+        costs a 304 response.
+        """
+        registries = self.config.registries
+        if previous is not None and previous.found:
+            registries = (previous.registry,)
+
+        validators = {}
+        if previous is not None and previous.can_revalidate:
+            validators = {
+                "etag": previous.etag,
+                "last_modified": previous.last_modified,
+            }
+        key = request_key(krs, registries, **validators)
+
+        def pull(base_url: str, timeout) -> KRSDataPuller:
+            if self.replayer is not None:
+                return self.replayer.replay(key)
+
+            def fetch() -> KRSDataPuller:
+                return pull_any_registry(
+                    krs,
+                    registries,
+                    executor=self._registry_executor,
+                    session=self.session,
+                    timeout=timeout,
+                    max_response_bytes=self.config.max_response_bytes,
+                    base_url=base_url,
+                    **validators,
+                )
+
+            if self.recorder is not None:
+                return self.recorder.call(key, fetch)
+            return fetch()
+
+        def request_timeout() -> Tuple[float, float]:
+            # Read once per request, after any wait for the rate limiter or a
+            # concurrency slot, so the cap reflects the time actually left
+            timeout = (self.config.connect_timeout, self.config.read_timeout)
+            if deadline is None:
+                return timeout
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                raise DeadlineExceededError(f"No time left to fetch KRS {krs}")
+            return (min(timeout[0], remaining), min(timeout[1], remaining))
+
+        def attempt() -> KRSDataPuller:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceededError(f"No time left to fetch KRS {krs}")
+            for _ in registries:
+                self.rate_limiter.acquire(deadline)
+            self.stats.incr("attempts")
+            try:
+                return self.limiter.call(
+                    lambda: self.endpoints.call(
+                        lambda url: pull(url, request_timeout())
+                    ),
+                    deadline,
+                )
+            except KRSTimeoutError as e:
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceededError(str(e)) from e
+                raise
+
+        def hedged_attempt() -> KRSDataPuller:
+            if self.hedger is None:
+                return attempt()
+            return self.hedger.call(attempt)
+
+        try:
+            puller = self.breaker.call(
+                lambda: self.retry.call(hedged_attempt, deadline)
+            )
+        except CircuitOpenError:
+            raise KRSMaintenanceError(
+                f"Przerwa techniczna serwisu weryfikującego KRS "
+                f"(pominięto zapytanie po wcześniejszych błędach). "
+                f"Proszę zweryfikować KRS ręcznie: {odpis_url(krs)}"
+            )
+        except KRSNotFoundError:
+            for registry in registries:
+                if self.cache is not None:
+                    self.cache.put(krs, found=False, registry=registry)
+                self._share(
+                    CachedKRSEntry(krs, registry, False, None, time.time()), deadline
+                )
+            raise
+
+        if puller.not_modified:
+            self.stats.incr("cache_revalidated")
+            self.cache.touch(krs, previous.registry)
+            return previous.name
+
+        self.stats.incr(f"answers_registry_{puller.registry}")
+        if self.cache is not None:
+            if previous is not None and previous.content_hash == puller.content_hash:
+                self.stats.incr("cache_unchanged")
+            self.cache.put(
+                krs,
+                found=True,
+                name=puller.name,
+                registry=puller.registry,
+                etag=puller.etag,
+                last_modified=puller.last_modified,
+                content_hash=puller.content_hash,
+            )
+        self._share(
+            CachedKRSEntry(
+                krs,
+                puller.registry,
+                True,
+                puller.name,
+                time.time(),
+                etag=puller.etag,
+                last_modified=puller.last_modified,
+                content_hash=puller.content_hash,
+            ),
+            deadline,
+        )
+        return puller.name
+
+    def _revalidate_in_background(
+        self, krs: str, entry: CachedKRSEntry, deadline: Optional[Deadline] = None
+    ):
+        """
+        Refresh a stale cache entry without blocking the current lookup.
+
+        The refresh is bound by the run deadline like any other request; once
+        it has passed, the stale entry is simply served as it is.
+        """
+        if deadline is not None and deadline.expired:
+            return
+
+        def refresh():
+            if deadline is not None and deadline.expired:
+                return  # queued behind other refreshes until time ran out
+            try:
+                self._fetch_live(krs, deadline, previous=entry)
+            except (KRSMaintenanceError, requests.HTTPError, DeadlineExceededError):
+                pass
+
+        with self._lock:
+            if krs in self._revalidations:
+                return
+            if self._revalidation_executor is None:
+                self._revalidation_executor = ThreadPoolExecutor(
+                    max_workers=self.config.revalidation_workers,
+                    thread_name_prefix="krs-revalidate",
+                )
+            future = self._revalidation_executor.submit(refresh)
+            self._revalidations[krs] = (future, deadline)
+
+    def summary_lines(self) -> List[str]:
+        """Return run statistics, including HTTP connection reuse and endpoint health."""
+        connections, sent = session_pool_stats(self.session)
+        self.stats.set("http_requests", sent)
+        self.stats.set("http_connections", connections)
+        self.stats.set("http_connections_reused", max(sent - connections, 0))
+        if self.stats.get("concurrency_decreases"):
+            self.stats.set("concurrency_window", self.limiter.limit)
+        lines = self.stats.summary_lines()
+        if self.config.endpoints:
+            lines.extend(self.endpoints.summary_lines())
+        return lines
+
+    def close(self):
+        """Cancel queued lookups, wait for running ones and release the session."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        finished = self._finish_revalidations()
+        if self.hedger is not None:
+            self.hedger.close()
+            self.hedger = None
+        self._registry_executor.shutdown(wait=True)
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self._owns_session:
+            self.session.close()
+        if self.remote_cache is not None:
+            self.remote_cache.close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+        if self.cache is not None:
+            # Worker threads are done with their connections unless a refresh
+            # was left running at the deadline
+            if finished:
+                self.cache.close_all()
+            else:
+                self.cache.close()
+
+    def _finish_revalidations(self) -> bool:
+        """
+        Wait for background refreshes, but not past the deadline of their run.
+
+        Returns:
+            True if every refresh has finished
+        """
+        if self._revalidation_executor is None:
+            return True
+        for future, deadline in self._revalidations.values():
+            wait([future], deadline.remaining() if deadline is not None else None)
+        finished = all(future.done() for future, _ in self._revalidations.values())
+        # Refreshes still running end within their deadline-capped timeouts
+        self._revalidation_executor.shutdown(wait=False, cancel_futures=True)
+        self._revalidation_executor = None
+        self._revalidations.clear()
+        return finished
+
 
 class OrganizationSchemaValidator:
     """Validates YAML structure and required fields."""
 
-    def __init__(self, slug_field: str, krs_client: KRSClient):
+    def __init__(
+        self,
+        slug_field: str,
+        krs_client: KRSClient,
+        deadline: Optional[Deadline] = None,
+        stamps: Optional[KRSStamps] = None,
+    ):
         self.slug_field = slug_field
         self.krs_client = krs_client
+        self.deadline = deadline
+        self.stamps = stamps
+
+    def krs_lookup(self, data: dict) -> Optional[Tuple[str, Optional[str]]]:
+        """Return the (krs, expected_name) pair validate_structure would check, if any."""
+        if not isinstance(data, dict) or "krs" not in data:
+            return None
+
+        krs = str(data["krs"])
+        if not re.fullmatch(r"\d{10}", krs):
+            return None
+        return krs, data.get("nazwa_w_krs")
+
+    def prefetch_krs(self, documents: Sequence[Optional[dict]]):
+        """Look up the KRS numbers of many documents in a single batch."""
+        pairs = [pair for pair in map(self.krs_lookup, documents) if pair]
+        if self.stamps is not None:
+            pairs = [pair for pair in pairs if not self.stamps.is_fresh(*pair)]
+        if pairs:
+            self.krs_client.validate_many(pairs, deadline=self.deadline)
 
     def validate_structure(self, data: dict) -> Tuple[bool, List[str]]:
         """Validate organization data structure and required fields."""
+        errors, warnings = self.check_structure(data)
+        for warning in warnings:
+            print(f"  ⚠️  {warning}")
+
+        return len(errors) == 0, errors
+
+    def check_structure(self, data: dict) -> Tuple[List[str], List[str]]:
+        """
+        Validate organization data without printing anything.
+
+        Returns:
+            Tuple of (errors, warnings)
+        """
         errors = []
+        warnings = []
 
         if not data:
             errors.append("Pusty plik YAML")
-            return False, errors
+            return errors, warnings
 
         # Required fields
         required_fields = [
@@ -94,13 +826,19 @@ class OrganizationSchemaValidator:
             if not re.fullmatch(r"\d{10}", krs):
                 errors.append(f"Nieprawidłowy format KRS: {krs} (oczekiwano 10 cyfr)")
             else:
-                # Validate KRS against external API, including name match
+                # Validate KRS against external API, including name match,
+                # unless a fresh verification stamp vouches for the same values
                 org_name = data.get("nazwa_w_krs")
-                is_valid, error_msg = self.krs_client.validate_krs(krs, org_name)
-                if not is_valid:
-                    errors.append(f"Walidacja KRS nie powiodła się: {error_msg}")
-                elif error_msg:  # Warning message
-                    print(f"  ⚠️  {error_msg}")
+                if self.stamps is None or not self.stamps.skip(krs, org_name):
+                    is_valid, error_msg = self.krs_client.validate_krs(
+                        krs, org_name, deadline=self.deadline
+                    )
+                    if not is_valid:
+                        errors.append(f"Walidacja KRS nie powiodła się: {error_msg}")
+                    elif error_msg:  # Warning message
+                        warnings.append(error_msg)
+                    elif self.stamps is not None:
+                        self.stamps.stamp(krs, org_name)
 
         if self.slug_field in data:
             slug_data: str | list[str] = data[self.slug_field]
@@ -132,7 +870,7 @@ class OrganizationSchemaValidator:
         if "produkty" in data and data["produkty"]:
             errors.extend(self._validate_products(data["produkty"]))
 
-        return len(errors) == 0, errors
+        return errors, warnings
 
     def _validate_delivery(self, delivery: dict) -> List[str]:
         """Validate delivery data structure."""